@@ -0,0 +1,108 @@
+"""
+Сравнение скорости построения матриц зависимостей: исходные вложенные
+циклы против векторизованного движка fuzzy_sii.implication.
+
+Запуск: python bench/bench_implication.py [--sizes 5x6 50x50 200x200] [--rules 7]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from fuzzy_sii import implication
+
+
+def synthetic_rule_base(size_a, size_b, num_rules, seed=0):
+    rng = np.random.default_rng(seed)
+    A = pd.DataFrame({f"a{r}": rng.random(size_a).round(2) for r in range(num_rules)})
+    B = pd.DataFrame({f"b{r}": rng.random(size_b).round(2) for r in range(num_rules)})
+    rules = pd.DataFrame(
+        [(f"a{r}", f"b{r}") for r in range(num_rules)], columns=["Условие", "Следствие"]
+    )
+    return A, B, rules
+
+
+def legacy_Mamdani(A, B, rules):
+    correspondences = []
+    for r in range(len(rules["Условие"])):
+        correspondence = []
+        for i in range(len(A)):
+            row = []
+            for j in range(len(B)):
+                row.append(min(A[rules["Условие"][r]][i], B[rules["Следствие"][r]][j]))
+            correspondence.append(row)
+        correspondences.append(correspondence)
+    return correspondences
+
+
+def legacy_Larsen(A, B, rules):
+    correspondences = []
+    for r in range(len(rules["Условие"])):
+        correspondence = []
+        for i in range(len(A)):
+            row = []
+            for j in range(len(B)):
+                row.append(
+                    round(A[rules["Условие"][r]][i] * B[rules["Следствие"][r]][j], 2)
+                )
+            correspondence.append(row)
+        correspondences.append(correspondence)
+    return correspondences
+
+
+def rule_terms(A, B, rules):
+    a = A[list(rules["Условие"])].to_numpy(dtype=float).T
+    b = B[list(rules["Следствие"])].to_numpy(dtype=float).T
+    return a, b
+
+
+def vectorized_Mamdani(A, B, rules):
+    a, b = rule_terms(A, B, rules)
+    return implication.relation_tensor(a, b, "mamdani")
+
+
+def vectorized_Larsen(A, B, rules):
+    a, b = rule_terms(A, B, rules)
+    return np.round(implication.relation_tensor(a, b, "larsen"), 2)
+
+
+def timeit(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", default=["5x6", "50x50", "100x100"])
+    parser.add_argument("--rules", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'метод':<8} {'|A|x|B|':>10} {'циклы, с':>12} {'numpy, с':>12} {'ускорение':>10}")
+    for size in args.sizes:
+        size_a, size_b = map(int, size.split("x"))
+        A, B, rules = synthetic_rule_base(size_a, size_b, args.rules)
+        for label, legacy, vectorized in (
+            ("Мамдани", legacy_Mamdani, vectorized_Mamdani),
+            ("Ларсен", legacy_Larsen, vectorized_Larsen),
+        ):
+            t_legacy, expected = timeit(legacy, A, B, rules, repeat=1)
+            t_vector, actual = timeit(vectorized, A, B, rules)
+            if actual.tolist() != expected:
+                raise AssertionError(f"{label} {size}: результаты не совпадают")
+            print(
+                f"{label:<8} {size:>10} {t_legacy:>12.4f} {t_vector:>12.6f} "
+                f"{t_legacy / t_vector:>9.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
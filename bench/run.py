@@ -0,0 +1,287 @@
+"""
+Набор бенчмарков по стадиям вывода на синтетических базах правил.
+
+Для каждой комбинации параметров (размер множеств определения, число
+правил, число входов, размер пакета) отдельно замеряются стадии:
+process_file, get_correspondences_*, outputs_aggregation /
+rules_aggregation, levels_of_truth_of_premises, defuzzification и
+пакетный вывод fuzzy_sii. Для каждой стадии записываются время (лучшее
+из --repeat) и пик памяти, выделенной за вызов (tracemalloc).
+
+Пик памяти от машины не зависит, поэтому по умолчанию он сравнивается с
+bench/baseline.json — там только стадии из списка выше и только пики
+памяти. Это ловит ошибки масштабирования (лишние промежуточные тензоры)
+на любой машине. Время сравнивается только с явно указанным прогоном
+той же машины:
+
+    python bench/run.py -o before.json --no-compare
+    python bench/run.py --baseline before.json
+
+При замедлении или росте пика больше чем в --tolerance раз процесс
+завершается с кодом 1. После намеренного изменения расхода памяти
+эталон обновляется и коммитится вместе с изменением:
+
+    python bench/run.py --update-baseline
+
+Запуск: python bench/run.py -o bench_results.json [--baseline old.json | --no-compare]
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import core_combined
+import core_many
+from fuzzy_sii import composition
+from fuzzy_sii.inference import Predictor
+
+from synthetic import generate
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Стадии, пики памяти которых хранятся в эталоне
+BASELINE_STAGES = (
+    "process_file",
+    "get_correspondences_Mamdani",
+    "get_correspondences_Larsen",
+    "outputs_aggregation",
+    "rules_aggregation",
+    "levels_of_truth_of_premises",
+    "defuzzification",
+)
+# Рост пика памяти меньше этого не считается регрессией: мелкие
+# выделения зависят от версии Python
+MIN_BYTES = 64 * 1024
+
+
+def measure(func, *args, repeat=3):
+    """
+    Замеры стадии {"seconds": лучшее из repeat, "peak_bytes": пик памяти}
+    и результат функции; вывод функции на stdout подавляется. Пик
+    измеряется отдельным запуском, чтобы tracemalloc не влиял на время.
+    """
+    best = float("inf")
+    result = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}, result
+
+
+def bench_single(path, batch, repeat):
+    """Стадии core_combined для базы с одним входом."""
+    timings = {}
+    timings["process_file"], model = measure(core_combined.process_file, path, repeat=repeat)
+    given = model.given[0]
+
+    timings["get_correspondences_Mamdani"], corr_m = measure(
+        core_combined.get_correspondences_Mamdani, model, repeat=repeat
+    )
+    timings["get_correspondences_Larsen"], _ = measure(
+        core_combined.get_correspondences_Larsen, model, repeat=repeat
+    )
+    timings["outputs_aggregation"], output = measure(
+        core_combined.outputs_aggregation, corr_m, given, repeat=repeat
+    )
+    timings["rules_aggregation"], _ = measure(
+        core_combined.rules_aggregation, corr_m, given, repeat=repeat
+    )
+    timings["defuzzification"], _ = measure(
+        core_combined.defuzzification, output, model, given, repeat=repeat
+    )
+
+    givens = np.tile(given, (batch, 1))
+    timings["batch_rules_aggregation"], _ = measure(
+        composition.batch_rules_aggregation, givens, corr_m, repeat=repeat
+    )
+    predictor = Predictor(model, "rules")
+    timings["predictor_rules"], _ = measure(predictor, [givens], repeat=repeat)
+    return timings
+
+
+def bench_many(path, batch, repeat):
+    """Стадии core_many для базы с несколькими входами."""
+    timings = {}
+    timings["process_file"], model = measure(core_many.process_file, path, repeat=repeat)
+    given = model.given
+
+    timings["levels_of_truth_of_premises"], levels = measure(
+        core_many.levels_of_truth_of_premises, model, given, repeat=repeat
+    )
+    timings["get_outputs"], outputs = measure(
+        core_many.get_outputs, model, levels, repeat=repeat
+    )
+    timings["outputs_aggregation"], aggregation = measure(
+        core_many.outputs_aggregation, outputs, repeat=repeat
+    )
+    timings["defuzzification"], _ = measure(
+        core_many.defuzzification, model, given, aggregation, repeat=repeat
+    )
+
+    givens = [np.tile(g, (batch, 1)) for g in given]
+    timings["predictor_truth"], _ = measure(Predictor(model, "truth"), givens, repeat=repeat)
+    timings["predictor_sparse"], _ = measure(Predictor(model, "sparse"), givens, repeat=repeat)
+    return timings
+
+
+def run(universe_sizes, rule_counts, input_counts, batch_sizes, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size, num_rules, num_inputs, batch in itertools.product(
+            universe_sizes, rule_counts, input_counts, batch_sizes
+        ):
+            params = {
+                "universe_size": size,
+                "rules": num_rules,
+                "inputs": num_inputs,
+                "batch": batch,
+            }
+            path = generate(
+                os.path.join(directory, "config.txt"), num_inputs, size, num_rules
+            )
+            bench = bench_single if num_inputs == 1 else bench_many
+            for stage, metrics in bench(path, batch, repeat).items():
+                results.append({"stage": stage, "params": params, **metrics})
+                print(
+                    f"{stage:<30} {json.dumps(params)} {metrics['seconds']:.6f} с "
+                    f"{metrics['peak_bytes'] / 2**20:.2f} МБ",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def _key(entry):
+    return entry["stage"], json.dumps(entry["params"], sort_keys=True)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Список регрессий: замеры, выросшие больше чем в tolerance раз. Сравниваются
+    те метрики (seconds, peak_bytes), что есть в записи эталона.
+    """
+    previous = {_key(entry): entry for entry in baseline["results"]}
+    # Стадии, которых в эталоне нет совсем, не сравниваются намеренно
+    stages = {entry["stage"] for entry in baseline["results"]}
+    regressions = []
+    missing = 0
+    for entry in results:
+        old = previous.get(_key(entry))
+        if old is None:
+            missing += entry["stage"] in stages
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if metric not in old:
+                continue
+            value, reference = entry[metric], old[metric]
+            if metric == "peak_bytes" and value - reference <= MIN_BYTES:
+                continue
+            if value > reference * tolerance:
+                regressions.append(
+                    {
+                        "stage": entry["stage"],
+                        "params": entry["params"],
+                        "metric": metric,
+                        "value": value,
+                        "baseline": reference,
+                        "ratio": value / reference if reference else float("inf"),
+                    }
+                )
+    if missing:
+        print(f"Нет в эталоне, не сравниваются: {missing} замеров", file=sys.stderr)
+    return regressions
+
+
+def baseline_report(report):
+    """Эталон: только пики памяти стадий BASELINE_STAGES."""
+    return {
+        "meta": {key: report["meta"][key] for key in ("python", "numpy")},
+        "results": [
+            {"stage": entry["stage"], "params": entry["params"], "peak_bytes": entry["peak_bytes"]}
+            for entry in report["results"]
+            if entry["stage"] in BASELINE_STAGES
+        ],
+    }
+
+
+def write_baseline(baseline, path):
+    # По записи на строку, чтобы изменения эталона читались в diff
+    lines = [json.dumps(entry, ensure_ascii=False, sort_keys=True) for entry in baseline["results"]]
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{\n"meta": ' + json.dumps(baseline["meta"]) + ',\n"results": [\n')
+        file.write(",\n".join(lines) + "\n]}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки стадий нечеткого вывода")
+    parser.add_argument("-o", "--output", help="файл результатов JSON (по умолчанию stdout)")
+    parser.add_argument("--universe-sizes", type=int, nargs="+", default=[5, 50, 200])
+    parser.add_argument("--rules", type=int, nargs="+", default=[7, 100])
+    parser.add_argument("--inputs", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE,
+        help="JSON для сравнения: эталон пиков памяти или прогон этой же машины (и время)",
+    )
+    parser.add_argument("--no-compare", action="store_true", help="не сравнивать с эталоном")
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="записать пики памяти как новый эталон"
+    )
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": run(args.universe_sizes, args.rules, args.inputs, args.batch, args.repeat),
+    }
+
+    exit_code = 0
+    if args.update_baseline:
+        write_baseline(baseline_report(report), args.baseline)
+        print(f"Эталон записан в {args.baseline}", file=sys.stderr)
+    elif not args.no_compare:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(report["results"], json.load(file), args.tolerance)
+        report["regressions"] = regressions
+        for entry in regressions:
+            print(
+                f"РЕГРЕССИЯ {entry['stage']} {json.dumps(entry['params'])} {entry['metric']}: "
+                f"{entry['baseline']:.6g} -> {entry['value']:.6g} ({entry['ratio']:.2f}x)",
+                file=sys.stderr,
+            )
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Генератор синтетических баз правил в формате config_*.txt.
+
+Одна входная переменная дает файл для core_combined, несколько — для
+core_many. Термы — случайные «горбы» на равномерном множестве
+определения, правила — случайные сочетания термов.
+"""
+import numpy as np
+
+
+def random_terms(rng, num_terms, size):
+    """«Горбы» со случайными центрами (термы, size); значения округлены до сотых."""
+    centers = rng.uniform(0, size - 1, num_terms)
+    widths = rng.uniform(1, max(2.0, size / 3), num_terms)
+    points = np.arange(size)
+    values = 1.0 - np.abs(points[None, :] - centers[:, None]) / widths[:, None]
+    return np.clip(values, 0.0, 1.0).round(2)
+
+
+def _write_variable(lines, name, size, terms):
+    lines.append(f"Множество определения {name}")
+    lines.append(" ".join(str(v) for v in range(0, 10 * size, 10)))
+    for t, values in enumerate(terms):
+        lines.append(f"Нечеткое множество {name}_t{t}")
+        lines.append(" ".join(f"{v:g}" for v in values))
+    lines.append("")
+
+
+def generate(path, num_inputs=1, universe_size=5, num_rules=7, num_terms=7, seed=0):
+    """Записывает синтетическую базу правил в path и возвращает path."""
+    rng = np.random.default_rng(seed)
+    names = [f"x{k}" for k in range(num_inputs)]
+    lines = []
+    for name in names + ["y"]:
+        _write_variable(lines, name, universe_size, random_terms(rng, num_terms, universe_size))
+
+    for _ in range(num_rules):
+        conditions = " и ".join(f"{n} {n}_t{rng.integers(num_terms)}" for n in names)
+        lines.append(f"Если {conditions} то y y_t{rng.integers(num_terms)}")
+    lines.append("")
+
+    for name in names:
+        lines.append(f"Пусть {name}")
+        lines.append(" ".join(f"{v:.2f}" for v in rng.random(universe_size)))
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
@@ -1,263 +1,179 @@
 import os
 import sys
 
-import pandas as pd
+import numpy as np
 
-# Import script with plots drawings
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-import plt.plotting
+# pandas (fuzzy_sii.frames) и matplotlib (plt.plotting) импортируются только
+# там, где нужны, чтобы расчет не ждал их загрузки
+from fuzzy_sii import composition, defuzz, implication, parser, profiling, storage
 
 
 def process_file(filename):
-    # Матрицы для хранения данных
-    A = {}
-    B = {}
-    rules = []
-    given = []
-
-    with open(filename, "r", encoding="utf-8") as file:
-        lines = file.readlines()
-
-    current_set_name = None
-    current_set_values = []
-    current_set_length = 0
-    A_set = False
-    a_name = ""
-    b_name = ""
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-
-        if not line:
-            i += 1
-            continue
-
-        elif line.startswith("Множество определения"):
-            # Завершаем предыдущее множество, если оно есть
-            if current_set_name:
-                if A_set:
-                    A[current_set_name] = current_set_values + [0] * (
-                        current_set_length - len(current_set_values)
-                    )
-                else:
-                    B[current_set_name] = current_set_values + [0] * (
-                        current_set_length - len(current_set_values)
-                    )
-
-            A_set = not A_set
-
-            # Начинаем обработку нового множества
-            parts = line.split()
-            current_set_name = parts[-1]
-            if A_set:
-                a_name = current_set_name
-            else:
-                b_name = current_set_name
-            current_set_values = []
-            current_set_length = 0
-
-        elif line.startswith("0") or line.startswith("-") or line[0].isdigit():
-            # Считываем числовые значения множества
-            values = list(map(float, line.split()))
-            if current_set_length == 0:
-                current_set_length = len(values)
-            current_set_values.extend(values)
-
-        elif line.startswith("Нечеткое множество"):
-            # Считываем название нечеткого множества
-            parts = line.split()
-            fuzzy_set_name = parts[-1]
-            i += 1  # Переходим к следующей строке, содержащей значения
-            if i < len(lines):
-                fuzzy_set_values = list(map(float, lines[i].strip().split()))
-                fuzzy_set_values.extend(
-                    [0] * (current_set_length - len(fuzzy_set_values))
-                )
-                # Добавляем в матрицу множеств
-                if A_set:
-                    A[fuzzy_set_name] = fuzzy_set_values
-                else:
-                    B[fuzzy_set_name] = fuzzy_set_values
-
-        elif line.startswith("Если"):
-            # Обработка правила
-            parts = line.split()
-            antecedent = parts[2]  # Название нечеткого множества условия
-            consequent = parts[-1]  # Название нечеткого множества результата
-            rules.append((antecedent, consequent))
-
-        elif line.startswith("Пусть"):
-            # Обработка начального состояния
-            i += 1
-            line = lines[i].strip()
-            values = list(map(float, line.split()))
-            given.extend(values)
-
-        i += 1
-
-    # Обрабатываем последнее множество
-    if current_set_name:
-        if A_set:
-            A[current_set_name] = current_set_values
-        else:
-            B[current_set_name] = current_set_values
-
-    # Преобразуем матрицу множеств в DataFrame
-    A = pd.DataFrame(A)
-    B = pd.DataFrame(B)
-
-    # Преобразуем правила в DataFrame
-    rules = pd.DataFrame(rules, columns=["Условие", "Следствие"])
-
-    return A, B, rules, given, a_name, b_name
-
-
-def get_correspondences_Mamdani(A, B):
-    print("===ИМПЛИКАЦИЯ МЕТОДОМ МАМДАНИ===")
-    correspondences = []
-    for r in range(len(rules["Условие"])):
-        correspondence = []
-        for i in range(len(A)):
-            row = []
-            for j in range(len(B)):
-                row.append(min(A[rules["Условие"][r]][i], B[rules["Следствие"][r]][j]))
-            correspondence.append(row)
-        correspondences.append(correspondence)
-
-    print("")
-    for i, corr in enumerate(correspondences, start=1):
-        print(f"Матрица зависимостей {i}")
-        for row in corr:
-            print([float(value) for value in row])
+    # Модель с массивами функций принадлежности и таблицей номеров термов;
+    # имена нужны только для вывода на экран
+    model = parser.parse_file(filename)
+    if len(model.inputs) != 1:
+        raise ValueError(f"Ожидалась одна входная переменная, получено {len(model.inputs)}")
+    return model
+
+
+def print_correspondences(correspondences):
+    if profiling.debug_enabled():
         print("")
+        for i, corr in enumerate(correspondences, start=1):
+            print(f"Матрица зависимостей {i}")
+            for row in corr:
+                print([float(value) for value in row])
+            print("")
+
+
+def correspondences_tensor(model, implication_name, path=None, dtype=np.float64):
+    """
+    Тензор (правила, |A|, |B|) одним векторизованным вызовом; только при
+    заданном path он заполняется по правилам в .npy файле с memory map.
+    """
+    a, b = model.antecedents(0), model.consequent_terms()
+    if path is None:
+        return implication.relation_tensor(a, b, implication_name, dtype)
+    out = storage.allocate((len(a), a.shape[1], b.shape[1]), dtype, path)
+    return implication.relation_tensor(a, b, implication_name, dtype, out=out)
+
+
+@profiling.profiled("implication")
+def get_correspondences_Mamdani(model, path=None, dtype=np.float64):
+    """
+    Матрицы зависимостей всех правил (правила, |A|, |B|); при заданном path
+    тензор размещается в .npy файле через memory map.
+    """
+    print("===ИМПЛИКАЦИЯ МЕТОДОМ МАМДАНИ===")
+    correspondences = correspondences_tensor(model, "mamdani", path, dtype)
+
+    print_correspondences(correspondences)
     return correspondences
 
 
-def get_correspondences_Larsen(A, B):
+@profiling.profiled("implication")
+def get_correspondences_Larsen(model, path=None, dtype=np.float64):
+    """
+    Матрицы зависимостей всех правил (правила, |A|, |B|); при заданном path
+    тензор размещается в .npy файле через memory map.
+    """
     print("===ИМПЛИКАЦИЯ МЕТОДОМ ЛАРСЕНА===")
-    correspondences = []
-    for r in range(len(rules["Условие"])):
-        correspondence = []
-        for i in range(len(A)):
-            row = []
-            for j in range(len(B)):
-                row.append(
-                    round(A[rules["Условие"][r]][i] * B[rules["Следствие"][r]][j], 2)
-                )
-            correspondence.append(row)
-        correspondences.append(correspondence)
-
-    print("")
-    for i, corr in enumerate(correspondences, start=1):
-        print(f"Матрица зависимостей {i}")
-        for row in corr:
-            print([float(value) for value in row])
-        print("")
+    correspondences = correspondences_tensor(model, "larsen", path, dtype)
+    np.round(correspondences, 2, out=correspondences)
+
+    print_correspondences(correspondences)
     return correspondences
 
 
+@profiling.profiled("aggregation")
 def outputs_aggregation(correspondences, given):
     print("===ВЫЧИСЛЕНИЕ МЕТОДОМ АГРЕГАЦИИ ВЫХОДОВ===\n")
-    outputs = []
-
-    for num, correspondence in enumerate(correspondences, start=1):
-        output = []
-        for i in range(len(correspondence[0])):
-            column = [min(given[j], correspondence[j][i]) for j in range(len(given))]
-            output.append(max(column))
-
-        print(f"Выход для правила {num}")
-        print([float(value) for value in output])
-        outputs.append(output)
-
-    print("\nАггрегация выходов")
-    aggregation = [max(output[i] for output in outputs) for i in range(len(outputs[0]))]
-    print([float(value) for value in aggregation])
+    outputs = composition.compose_rules(given, correspondences)[0]
+    if profiling.debug_enabled():
+        for num, output in enumerate(outputs, start=1):
+            print(f"Выход для правила {num}")
+            print([float(value) for value in output])
+
+    aggregation = outputs.max(axis=0)
+    if profiling.debug_enabled():
+        print("\nАггрегация выходов")
+        print([float(value) for value in aggregation])
     return aggregation
 
 
+@profiling.profiled("aggregation")
 def rules_aggregation(correspondences, given):
     print(f"===ВЫЧИСЛЕНИЕ МЕТОДОМ АГРЕГАЦИИ ПРАВИЛ===\n")
-    aggregation = correspondences[0]
-    for correspondence in correspondences:
-        for i in range(len(A)):
-            for j in range(len(B)):
-                aggregation[i][j] = max(aggregation[i][j], correspondence[i][j])
-
-    print(f"Агрегация правил")
-    for i in range(len(aggregation)):
-        print([float(value) for value in aggregation[i]])
-
-    output = []
-    for i in range(len(aggregation[0])):
-        column = []
-        for j in range(len(given)):
-            column.append(min(given[j], aggregation[j][i]))
-        output.append(max(column))
-
-    print("")
-    print(f"Значение выхода")
-    print([float(value) for value in output])
-    print("")
+    aggregation = np.max(correspondences, axis=0)
+
+    if profiling.debug_enabled():
+        print(f"Агрегация правил")
+        for i in range(len(aggregation)):
+            print([float(value) for value in aggregation[i]])
+
+    output = composition.compose(given, aggregation)[0]
+
+    if profiling.debug_enabled():
+        print("")
+        print(f"Значение выхода")
+        print([float(value) for value in output])
+        print("")
     return output
 
 
-def defuzzification(output, values_a, a_name, given, values_b, b_name):
-    sum_1 = 0
-    sum_2 = 0
-    for i in range(len(given)):
-        sum_1 += given[i] * values_a[i]
-        sum_2 += given[i]
-    mid = sum_1 / sum_2
-    print(f"ДЕФАЗАФИКАЦИЯ")
-    print(f"Четкое значение входа {a_name}: {round(mid)}")
-    sum_1 = 0
-    sum_2 = 0
-    for i in range(len(output)):
-        sum_1 += output[i] * values_b[i]
-        sum_2 += output[i]
-    mid = sum_1 / sum_2
-    print(f"Четкое значение выхода {b_name}: {round(mid)}")
-    print("\n")
+def format_crisp(value):
+    return str(round(value)) if np.isfinite(value) else "не определено (ни одно правило не сработало)"
 
 
-filename = "config_combined.txt"
-A, B, rules, given, a_name, b_name = process_file(filename)
+@profiling.profiled("defuzzification")
+def defuzzification(output, model, given, method="centroid", fallback=np.nan):
+    """Печатает и возвращает четкие значения входа и выхода (метод — см. defuzz)."""
+    a, b = model.inputs[0], model.output
+    print(f"ДЕФАЗАФИКАЦИЯ")
+    crisp_input = defuzz.defuzzify(given, a.universe, method, fallback)[0]
+    print(f"Четкое значение входа {a.name}: {format_crisp(crisp_input)}")
+    crisp_output = defuzz.defuzzify(output, b.universe, method, fallback)[0]
+    print(f"Четкое значение выхода {b.name}: {format_crisp(crisp_output)}")
+    print("\n")
+    return crisp_input, crisp_output
+
+
+if __name__ == "__main__":
+    filename = "config_combined.txt"
+    # Промежуточные матрицы печатаются, если не задано FUZZY_DEBUG=0
+    profiling.configure_from_env(debug=True)
+    model = process_file(filename)
+    given = model.given[0]
+
+    if profiling.debug_enabled():
+        from fuzzy_sii import frames
+
+        A, B, rules, _, a_name, _ = frames.combined_tables(model)
+        print("\nА:")
+        print(A)
+        print("\nB:")
+        print(B)
+        print("\nМатрица правил:")
+        print(rules)
+        print(f"\nПусть {a_name}:")
+        print(given.tolist())
+        print("")
 
-print("\nА:")
-print(A)
-print("\nB:")
-print(B)
-print("\nМатрица правил:")
-print(rules)
-print(f"\nПусть {a_name}:")
-print(given)
-print("")
+    input("Нажмите любую клавишу, чтобы посмотреть результат метода Мамдани...")
 
-input("Нажмите любую клавишу, чтобы посмотреть результат метода Мамдани...")
+    correspondences_M = get_correspondences_Mamdani(model)
 
-correspondences_M = get_correspondences_Mamdani(A, B)
+    input("Нажмите любую клавишу, чтобы посмотреть результат агрегации...")
 
-input("Нажмите любую клавишу, чтобы посмотреть результат агрегации...")
+    output = outputs_aggregation(correspondences_M, given)
+    defuzzification(output, model, given)
 
-output = outputs_aggregation(correspondences_M, given)
-defuzzification(output, A[a_name], a_name, given, B[b_name], b_name)
 
+    output = rules_aggregation(correspondences_M, given)
+    defuzzification(output, model, given)
 
-output = rules_aggregation(correspondences_M, given)
-defuzzification(output, A[a_name], a_name, given, B[b_name], b_name)
+    input("Нажмите любую клавишу, чтобы посмотреть результат метода Ларсена...")
 
-input("Нажмите любую клавишу, чтобы посмотреть результат метода Ларсена...")
+    correspondences_L = get_correspondences_Larsen(model)
+    output = outputs_aggregation(correspondences_L, given)
+    defuzzification(output, model, given)
 
-correspondences_L = get_correspondences_Larsen(A, B)
-output = outputs_aggregation(correspondences_L, given)
-defuzzification(output, A[a_name], a_name, given, B[b_name], b_name)
+    input("Нажмите любую клавишу, чтобы посмотреть результат агрегации...")
 
-input("Нажмите любую клавишу, чтобы посмотреть результат агрегации...")
+    output = rules_aggregation(correspondences_L, given)
 
-output = rules_aggregation(correspondences_L, given)
 
+    import plt.plotting
+    from fuzzy_sii import frames
 
-input("Нажмите любую клавишу, чтобы посмотреть график...")
-plt.plotting.plot_comparison_Q(correspondences_M, correspondences_L, A, B)
+    A, B, *_ = frames.combined_tables(model)
+    # FUZZY_REPORT=отчет.pdf (или .png) — сохранить графики в файл без окон
+    report = os.environ.get("FUZZY_REPORT")
+    if report:
+        files = plt.plotting.render_comparison(correspondences_M, correspondences_L, A, B, report)
+        print(f"Графики сохранены: {', '.join(files)}")
+    else:
+        input("Нажмите любую клавишу, чтобы посмотреть график...")
+        plt.plotting.plot_comparison_Q(correspondences_M, correspondences_L, A, B)
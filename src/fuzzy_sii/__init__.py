@@ -0,0 +1,47 @@
+"""
+Библиотека нечеткого вывода.
+
+Ядро вывода зависит только от numpy. Имена ниже загружаются при первом
+обращении (fuzzy_sii.Predictor импортирует fuzzy_sii.inference только
+тогда), поэтому `import fuzzy_sii` ничего не стоит. pandas нужен лишь
+модулю frames (таблицы для печати), matplotlib — скриптам построения
+графиков в src/plt.
+"""
+import importlib
+
+_EXPORTS = {
+    "FuzzyModel": "model",
+    "Variable": "model",
+    "load_model": "model",
+    "ParseError": "parser",
+    "parse_file": "parser",
+    "Predictor": "inference",
+    "fuzzify": "inference",
+    "load_cached": "compiled",
+    "compile_file": "compiled",
+    "CompiledRelation": "relation",
+    "LookupTable": "lookup",
+    "ModelRegistry": "registry",
+    "defuzzify": "defuzz",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        # Подмодули (fuzzy_sii.frames и т. п.) тоже загружаются по требованию
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
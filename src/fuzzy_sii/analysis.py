@@ -0,0 +1,249 @@
+"""
+Анализ чувствительности и поверхности отклика базы правил.
+
+Все входы перебираются по своим множествам определения — на полной
+сетке (grid_points) или латинским гиперкубом (latin_hypercube), когда
+входов много: по умолчанию сетка строится не больше чем для
+MAX_GRID_INPUTS входов, иначе берется гиперкуб из GRID_POINTS^MAX_GRID_INPUTS
+точек. Выборка обрабатывается порциями одним пакетным выводом
+механизма "truth": по тем же уровням истинности считаются и четкие
+выходы, и максимальный уровень каждого правила, так что правила, ни
+разу не сработавшие на выборке, находятся без отдельного прохода.
+
+Чувствительность:
+- sobol_indices — индексы Соболя первого порядка и полные (оценки
+  Салтелли и Янсена), n · (V + 2) выводов;
+- finite_differences — средний модуль центральной разности по каждому
+  входу, умноженный на ширину его множества определения.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.analysis config_many.txt --grid 100 -o surface.npy
+"""
+import argparse
+import itertools
+
+import numpy as np
+
+from . import profiling, storage
+from .composition import MAX_ELEMENTS
+from .inference import Predictor, fuzzify
+from .model import load_model
+from .parser import rule_text
+from .premises import TNORMS, premise_levels
+from .streaming import add_defuzz_arguments
+
+CHUNK_SIZE = 65536
+# Выборка по умолчанию: сетка GRID_POINTS на ось до MAX_GRID_INPUTS входов
+GRID_POINTS = 21
+MAX_GRID_INPUTS = 3
+# Предел размера явно заданной сетки (--grid), растущей как points^V
+MAX_GRID_SIZE = 10**7
+
+
+def chunk_points(model, max_elements=MAX_ELEMENTS):
+    """
+    Точек в порции Sweep: на точку приходится правила × |B| элементов
+    промежуточных массивов вывода, порция не больше max_elements.
+    """
+    per_point = max(1, model.num_rules * len(model.output.universe))
+    return int(min(CHUNK_SIZE, max(1, max_elements // per_point)))
+
+
+def bounds(model):
+    """Границы множеств определения входов: (нижние, верхние), по V значений."""
+    lower = np.array([var.universe[0] for var in model.inputs])
+    upper = np.array([var.universe[-1] for var in model.inputs])
+    return lower, upper
+
+
+def grid_points(model, points_per_axis):
+    """Полная сетка (points^V, V); points_per_axis — число или список по входам."""
+    lower, upper = bounds(model)
+    counts = np.broadcast_to(points_per_axis, lower.shape)
+    axes = [np.linspace(lo, hi, int(n)) for lo, hi, n in zip(lower, upper, counts)]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return np.stack([axis.ravel() for axis in mesh], axis=1)
+
+
+def default_points(model, seed=None):
+    """Выборка без явных --grid и --lhs: сетка при малом числе входов, иначе гиперкуб."""
+    if len(model.inputs) <= MAX_GRID_INPUTS:
+        return grid_points(model, GRID_POINTS)
+    return latin_hypercube(model, GRID_POINTS**MAX_GRID_INPUTS, seed)
+
+
+def latin_hypercube(model, n, seed=None):
+    """n точек (n, V): в каждом из n слоев по каждому входу ровно одна точка."""
+    rng = np.random.default_rng(seed)
+    lower, upper = bounds(model)
+    strata = np.argsort(rng.random((len(lower), n)), axis=1).T
+    unit = (strata + rng.random((n, len(lower)))) / n
+    return lower + unit * (upper - lower)
+
+
+class Sweep:
+    """
+    Пакетный вывод по точкам с учетом срабатывания правил.
+    max_levels — наибольший уровень истинности каждого правила на всех
+    обработанных точках. chunk_size по умолчанию — chunk_points(model).
+    """
+
+    def __init__(
+        self, model, tnorm="min", defuzzifier="centroid", chunk_size=None, fallback=np.nan
+    ):
+        self.model = model
+        self.predictor = Predictor(
+            model, "truth", tnorm=tnorm, defuzzifier=defuzzifier, fallback=fallback
+        )
+        self.chunk_size = chunk_size or chunk_points(model)
+        self.max_levels = np.zeros(model.num_rules)
+
+    def __call__(self, points, out=None):
+        """Четкие выходы для точек (N, V); out — необязательный массив (N,)."""
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        result = out if out is not None else np.empty(len(points))
+        for start in range(0, len(points), self.chunk_size):
+            chunk = points[start : start + self.chunk_size]
+            givens = [fuzzify(chunk[:, k], var.universe) for k, var in enumerate(self.model.inputs)]
+            levels = premise_levels(self.model, givens, self.predictor.tnorm)
+            np.maximum(self.max_levels, levels.max(axis=0), out=self.max_levels)
+            result[start : start + len(chunk)] = self.predictor.from_levels(givens, levels)[1]
+        return result
+
+    def never_fired(self):
+        """Номера правил, уровень истинности которых ни разу не был больше нуля."""
+        return np.flatnonzero(self.max_levels <= 0)
+
+
+def sobol_indices(sweep, n, seed=None):
+    """
+    Индексы Соболя по n базовым точкам латинского гиперкуба.
+    Наблюдения, где хотя бы один вывод дал nan, отбрасываются.
+
+    Returns: (первого порядка (V,), полные (V,)).
+    """
+    model = sweep.model
+    rng = np.random.default_rng(seed)
+    a = latin_hypercube(model, n, rng)
+    b = latin_hypercube(model, n, rng)
+    inputs = len(model.inputs)
+    samples = [a, b]
+    for k in range(inputs):
+        mixed = a.copy()
+        mixed[:, k] = b[:, k]
+        samples.append(mixed)
+    values = sweep(np.concatenate(samples)).reshape(inputs + 2, n)
+    values = values[:, ~np.isnan(values).any(axis=0)]
+    y_a, y_b, y_mixed = values[0], values[1], values[2:]
+    variance = np.var(np.concatenate([y_a, y_b]))
+    if variance == 0:
+        return np.zeros(inputs), np.zeros(inputs)
+    first = np.mean(y_b * (y_mixed - y_a), axis=1) / variance
+    total = 0.5 * np.mean((y_a - y_mixed) ** 2, axis=1) / variance
+    return first, total
+
+
+def finite_differences(sweep, points, step=1e-3):
+    """
+    Средний модуль центральной разности по каждому входу в точках
+    (N, V), нормированный на ширину множества определения: (V,).
+    """
+    lower, upper = bounds(sweep.model)
+    span = upper - lower
+    points = np.atleast_2d(points)
+    shifted = []
+    steps = []
+    for k in range(points.shape[1]):
+        h = step * span[k]
+        plus, minus = points.copy(), points.copy()
+        plus[:, k] = np.clip(points[:, k] + h, lower[k], upper[k])
+        minus[:, k] = np.clip(points[:, k] - h, lower[k], upper[k])
+        shifted += [plus, minus]
+        # У границ сдвиг обрезан, поэтому разность делится на фактический шаг, а не на 2h
+        steps.append(plus[:, k] - minus[:, k])
+    values = sweep(np.concatenate(shifted)).reshape(points.shape[1], 2, len(points))
+    result = np.empty(points.shape[1])
+    for k, (plus, minus) in enumerate(values):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = np.abs(plus - minus) / steps[k] * span[k]
+        result[k] = np.nanmean(slope) if np.isfinite(slope).any() else 0.0
+    return result
+
+
+def save_surface(points, values, path, names):
+    """Поверхность отклика в .npy (N, V + 1) или CSV с заголовком."""
+    if path.endswith(".npy"):
+        surface = storage.allocate((len(points), points.shape[1] + 1), np.float64, path)
+        surface[:, :-1] = points
+        surface[:, -1] = values
+        surface.flush()
+        return
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(",".join(names) + "\n")
+        for start in range(0, len(points), CHUNK_SIZE):
+            block = np.column_stack(
+                [points[start : start + CHUNK_SIZE], values[start : start + CHUNK_SIZE]]
+            )
+            np.savetxt(file, block, delimiter=",", fmt="%.6g")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Анализ чувствительности базы правил")
+    parser.add_argument("config", help="файл базы правил config_*.txt")
+    sampling = parser.add_mutually_exclusive_group()
+    sampling.add_argument("--grid", type=int, help="точек на ось полной сетки")
+    sampling.add_argument("--lhs", type=int, help="точек латинского гиперкуба")
+    parser.add_argument("-o", "--output", help="поверхность отклика: .npy или .csv")
+    parser.add_argument("--sobol", type=int, default=4096, help="базовых точек для индексов Соболя")
+    parser.add_argument("--fd-points", type=int, default=4096, help="точек для конечных разностей")
+    parser.add_argument("--tnorm", choices=TNORMS, default="min")
+    add_defuzz_arguments(parser)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+
+    model = load_model(args.config)
+    try:
+        sweep = Sweep(model, args.tnorm, args.defuzz, fallback=args.fallback)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.grid and args.grid ** len(model.inputs) > MAX_GRID_SIZE:
+        parser.error(
+            f"сетка {args.grid}^{len(model.inputs)} больше {MAX_GRID_SIZE} точек, "
+            f"используйте --lhs"
+        )
+    if args.lhs:
+        points = latin_hypercube(model, args.lhs, args.seed)
+    elif args.grid:
+        points = grid_points(model, args.grid)
+    else:
+        points = default_points(model, args.seed)
+    values = sweep(points)
+    names = [var.name for var in model.inputs] + [model.output.name]
+    if args.output:
+        save_surface(points, values, args.output, names)
+
+    defined = values[~np.isnan(values)]
+    print(f"Точек: {len(points)}, без сработавших правил: {len(points) - len(defined)}")
+    if len(defined):
+        print(
+            f"{model.output.name}: min {defined.min():.4g}, max {defined.max():.4g}, "
+            f"среднее {defined.mean():.4g}"
+        )
+
+    rng = np.random.default_rng(args.seed)
+    first, total = sobol_indices(sweep, args.sobol, rng)
+    fd_points = points[rng.choice(len(points), min(args.fd_points, len(points)), replace=False)]
+    slopes = finite_differences(sweep, fd_points)
+    print(f"\n{'Вход':<20} {'Соболь S1':>10} {'Соболь ST':>10} {'|dy/dx|·ширина':>16}")
+    for var, s1, st, slope in zip(model.inputs, first, total, slopes):
+        print(f"{var.name:<20} {s1:>10.4f} {st:>10.4f} {slope:>16.4g}")
+
+    # max_levels накоплены по всем точкам: выборке, Соболю и конечным разностям
+    never = sweep.never_fired()
+    print(f"\nНе сработавших правил: {len(never)}")
+    for rule in itertools.islice(never, 50):
+        print(f"  {rule + 1}: {rule_text(model, rule)}")
+
+
+if __name__ == "__main__":
+    main()
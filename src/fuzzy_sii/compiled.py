@@ -0,0 +1,158 @@
+"""
+Скомпилированная база правил.
+
+Текстовый config_*.txt компилируется в несжатый .npz с матрицами
+функций принадлежности и таблицей правил. Имя артефакта содержит хеш
+исходного файла, поэтому изменение конфигурации автоматически приводит
+к перекомпиляции, а при совпадении хеша разбор текста не выполняется.
+Хеш абсолютного пути файла в имени отделяет артефакты одноименных
+конфигураций из разных каталогов, собранные в общий cache_dir.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.compiled config_combined.txt
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from . import profiling
+from .model import FuzzyModel, Variable
+
+CACHE_DIR = ".fuzzy_cache"
+# Увеличивается при изменении состава артефакта, чтобы старые файлы
+# не читались новым кодом
+FORMAT_VERSION = 5
+
+
+def source_hash(filename):
+    with open(filename, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _artifact_prefix(filename):
+    """Начало имени всех артефактов файла: имя и хеш абсолютного пути."""
+    location = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()[:8]
+    return f"{os.path.basename(filename)}-{location}-"
+
+
+def cache_path(filename, digest, cache_dir=None):
+    directory = cache_dir or os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIR)
+    name = f"{_artifact_prefix(filename)}v{FORMAT_VERSION}-{digest[:16]}.npz"
+    return os.path.join(directory, name)
+
+
+def _pack_variable(arrays, prefix, variable):
+    arrays[f"{prefix}_universe"] = variable.universe
+    arrays[f"{prefix}_terms"] = variable.terms
+    return {"name": variable.name, "terms": variable.term_names, "params": variable.params}
+
+
+def save_compiled(model, path, digest=""):
+    arrays = {}
+    meta = {
+        "source_hash": digest,
+        "inputs": [_pack_variable(arrays, f"input{k}", v) for k, v in enumerate(model.inputs)],
+        "output": _pack_variable(arrays, "output", model.output),
+        "given": len(model.given),
+    }
+    for k, given in enumerate(model.given):
+        arrays[f"given{k}"] = given
+    arrays["rules"] = model.rules
+    arrays["consequents"] = model.consequents
+    arrays["connectives"] = model.connectives
+    if model.coefficients is not None:
+        arrays["coefficients"] = model.coefficients
+    arrays["meta"] = np.array(json.dumps(meta, ensure_ascii=False))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Запись во временный файл и переименование, чтобы читатели не увидели
+    # недописанный артефакт
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_compiled(path):
+    """Возвращает (модель, хеш исходного файла)."""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+
+        def unpack(prefix, info):
+            return Variable(
+                info["name"],
+                data[f"{prefix}_universe"],
+                info["terms"],
+                data[f"{prefix}_terms"],
+                [tuple(p) if p is not None else None for p in info["params"]],
+            )
+
+        inputs = [unpack(f"input{k}", info) for k, info in enumerate(meta["inputs"])]
+        output = unpack("output", meta["output"])
+        given = [data[f"given{k}"] for k in range(meta["given"])]
+        coefficients = data["coefficients"] if "coefficients" in data.files else None
+        model = FuzzyModel(
+            inputs,
+            output,
+            data["rules"],
+            data["consequents"],
+            given,
+            data["connectives"],
+            coefficients,
+        )
+    return model, meta["source_hash"]
+
+
+def _remove_stale(filename, keep):
+    directory = os.path.dirname(keep)
+    prefix = _artifact_prefix(filename)
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if entry.startswith(prefix) and entry.endswith(".npz") and path != keep:
+            os.remove(path)
+
+
+def compile_file(filename, cache_dir=None):
+    """Разбирает текстовую базу правил и сохраняет артефакт. Возвращает путь."""
+    from .model import load_model
+
+    digest = source_hash(filename)
+    path = cache_path(filename, digest, cache_dir)
+    save_compiled(load_model(filename), path, digest)
+    _remove_stale(filename, path)
+    return path
+
+
+def cached_artifact(filename, cache_dir=None):
+    """Путь к артефакту текущего содержимого файла; компилирует, только если его нет."""
+    digest = source_hash(filename)
+    path = cache_path(filename, digest, cache_dir)
+    if not os.path.exists(path):
+        path = compile_file(filename, cache_dir)
+    return path
+
+
+def load_cached(filename, cache_dir=None):
+    """
+    Загружает базу правил из артефакта, если он соответствует текущему
+    содержимому файла, иначе компилирует заново.
+    """
+    model, _ = load_compiled(cached_artifact(filename, cache_dir))
+    return model
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Компиляция базы правил в .npz")
+    parser.add_argument("configs", nargs="+")
+    parser.add_argument("--cache-dir", default=None)
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+    for filename in args.configs:
+        print(compile_file(filename, args.cache_dir))
+
+
+if __name__ == "__main__":
+    main()
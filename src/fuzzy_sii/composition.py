@@ -0,0 +1,143 @@
+"""
+Пакетная max-min (и max-product) композиция.
+
+Все функции принимают матрицу входов формы (N, |A|) — по одной строке
+функции принадлежности на наблюдение — и обрабатывают её порциями,
+чтобы промежуточный массив (порция, ..., |A|, |B|) не превышал
+max_elements элементов независимо от N.
+"""
+import numpy as np
+
+from . import defuzz, profiling
+from .storage import as_float
+
+TNORMS = {
+    "min": np.minimum,
+    "product": np.multiply,
+}
+
+# Ограничение на размер промежуточного массива (элементов float64 ≈ 32 МБ)
+MAX_ELEMENTS = 2**22
+
+
+def get_tnorm(tnorm):
+    if callable(tnorm):
+        return tnorm
+    try:
+        return TNORMS[tnorm]
+    except KeyError:
+        raise ValueError(
+            f"Неизвестная t-норма {tnorm!r}, доступны: {', '.join(TNORMS)}"
+        ) from None
+
+
+def _chunk_rows(cells, chunk_size, max_elements):
+    if chunk_size is not None:
+        return max(1, int(chunk_size))
+    return max(1, max_elements // max(1, cells))
+
+
+@profiling.profiled("composition")
+def compose(givens, relation, tnorm="min", chunk_size=None, max_elements=MAX_ELEMENTS, out=None):
+    """
+    Композиция входов с одной матрицей отношения.
+
+    Parameters:
+    - givens: массив (N, |A|) функций принадлежности входов.
+    - relation: матрица (|A|, |B|).
+    - tnorm: "min" (max-min) или "product" (max-product).
+    - chunk_size: число наблюдений в порции; по умолчанию подбирается
+      по max_elements.
+    - out: массив (N, |B|) для результата, например memmap.
+
+    Returns: массив (N, |B|).
+    """
+    givens = np.atleast_2d(as_float(givens))
+    relation = as_float(relation)
+    func = get_tnorm(tnorm)
+    result = np.empty((len(givens), relation.shape[1])) if out is None else out
+    if profiling.enabled():
+        profiling.count("cells_computed", len(givens) * relation.size)
+        profiling.count("bytes_allocated", result.nbytes if out is None else 0)
+    rows = _chunk_rows(relation.size, chunk_size, max_elements)
+    for start in range(0, len(givens), rows):
+        chunk = givens[start : start + rows]
+        result[start : start + rows] = func(chunk[:, :, None], relation[None]).max(axis=1)
+    return result
+
+
+@profiling.profiled("composition")
+def compose_rules(givens, correspondences, tnorm="min", chunk_size=None, max_elements=MAX_ELEMENTS, out=None):
+    """
+    Композиция входов с матрицей зависимостей каждого правила.
+
+    Parameters:
+    - givens: массив (N, |A|).
+    - correspondences: тензор (правила, |A|, |B|).
+
+    Returns: массив (N, правила, |B|) — выход каждого правила.
+    """
+    givens = np.atleast_2d(as_float(givens))
+    correspondences = as_float(correspondences)
+    func = get_tnorm(tnorm)
+    num_rules, _, size_b = correspondences.shape
+    result = np.empty((len(givens), num_rules, size_b)) if out is None else out
+    if profiling.enabled():
+        profiling.count("cells_computed", len(givens) * correspondences.size)
+        profiling.count("bytes_allocated", result.nbytes if out is None else 0)
+    rows = _chunk_rows(correspondences.size, chunk_size, max_elements)
+    for start in range(0, len(givens), rows):
+        chunk = givens[start : start + rows]
+        result[start : start + rows] = func(
+            chunk[:, None, :, None], correspondences[None]
+        ).max(axis=2)
+    return result
+
+
+@profiling.profiled("aggregation")
+def batch_outputs_aggregation(givens, correspondences, tnorm="min", chunk_size=None, out=None):
+    """
+    Агрегация выходов: композиция с каждым правилом, затем максимум по правилам.
+    Выходы отдельных правил существуют только в пределах одной порции.
+    """
+    givens = np.atleast_2d(as_float(givens))
+    correspondences = as_float(correspondences)
+    result = np.empty((len(givens), correspondences.shape[2])) if out is None else out
+    rows = _chunk_rows(correspondences.size, chunk_size, MAX_ELEMENTS)
+    for start in range(0, len(givens), rows):
+        chunk = compose_rules(givens[start : start + rows], correspondences, tnorm)
+        result[start : start + rows] = chunk.max(axis=1)
+    return result
+
+
+@profiling.profiled("aggregation")
+def batch_rules_aggregation(givens, correspondences, tnorm="min", chunk_size=None, out=None):
+    """
+    Агрегация правил: максимум матриц зависимостей, затем одна композиция.
+    """
+    relation = as_float(correspondences).max(axis=0)
+    return compose(givens, relation, tnorm, chunk_size, out=out)
+
+
+@profiling.profiled("defuzzification")
+def centroid(outputs, values):
+    """
+    Дефаззификация методом центра тяжести для каждой строки outputs.
+    Для строк с нулевой суммой возвращается nan. Другие методы — в defuzz.
+    """
+    return defuzz.centroid(outputs, values)
+
+
+AGGREGATIONS = {
+    "outputs": batch_outputs_aggregation,
+    "rules": batch_rules_aggregation,
+}
+
+
+def infer_batch(givens, correspondences, values_b, aggregation="rules", tnorm="min", chunk_size=None, out=None):
+    """
+    Пакетный вывод: (N, |A|) входов -> (N, |B|) выходов и N четких значений.
+    out — необязательный массив (N, |B|) для выходов (например memmap).
+    """
+    outputs = AGGREGATIONS[aggregation](givens, correspondences, tnorm, chunk_size, out)
+    return outputs, centroid(outputs, values_b)
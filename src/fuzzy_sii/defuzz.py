@@ -0,0 +1,149 @@
+"""
+Дефаззификация пакета выходов.
+
+Все методы принимают матрицу (N, |B|) функций принадлежности выходов и
+множество определения values (|B|,) и возвращают массив N четких
+значений. Для пустых выходов (ни одно правило не сработало) возвращается
+fallback, по умолчанию nan.
+
+Методы:
+- "centroid": центр тяжести;
+- "bisector": точка, делящая площадь под функцией пополам;
+- "mom", "som", "lom": среднее, наименьшее и наибольшее из значений,
+  на которых достигается максимум;
+- "height": взвешенное среднее пиков термов следствия по уровням
+  истинности правил — см. height, принимает уровни правил, а не выходы;
+- "continuous": центр тяжести без дискретизации выхода — термы
+  вычисляются по параметрам и интегрируются адаптивно
+  (inference.continuous_defuzzification), тоже по уровням правил.
+"""
+import numpy as np
+
+from .storage import as_float
+
+
+def _prepare(outputs, values):
+    outputs = np.atleast_2d(as_float(outputs))
+    values = as_float(values)
+    if outputs.shape[1] != len(values):
+        raise ValueError(
+            f"Ожидались выходы длины {len(values)}, получено {outputs.shape[1]}"
+        )
+    return outputs, values
+
+
+def _with_fallback(result, empty, fallback):
+    if empty.any():
+        result[empty] = fallback
+    return result
+
+
+def centroid(outputs, values, fallback=np.nan):
+    outputs, values = _prepare(outputs, values)
+    total = outputs.sum(axis=1)
+    empty = total <= 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = outputs @ values / total
+    return _with_fallback(result, empty, fallback)
+
+
+def bisector(outputs, values, fallback=np.nan):
+    """
+    Функция принадлежности считается кусочно-линейной между точками
+    values; ищется отрезок, на котором площадь достигает половины, и точка
+    внутри него находится из квадратного уравнения для площади трапеции.
+    """
+    outputs, values = _prepare(outputs, values)
+    if len(values) == 1:
+        return _with_fallback(np.full(len(outputs), values[0]), outputs[:, 0] <= 0, fallback)
+    widths = np.diff(values)
+    left, right = outputs[:, :-1], outputs[:, 1:]
+    cumulative = np.cumsum((left + right) / 2 * widths, axis=1)
+    half = cumulative[:, -1] / 2
+    empty = half <= 0
+    segment = np.argmax(cumulative >= half[:, None], axis=1)
+    rows = np.arange(len(outputs))
+    before = np.where(segment > 0, cumulative[rows, np.maximum(segment - 1, 0)], 0.0)
+    area = half - before
+    y0, y1, width = left[rows, segment], right[rows, segment], widths[segment]
+    slope = (y1 - y0) / width
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # y0·t + slope·t²/2 = area
+        curved = (np.sqrt(np.maximum(y0**2 + 2 * slope * area, 0.0)) - y0) / slope
+        offset = np.where(np.abs(slope) > 1e-12, curved, area / y0)
+    result = values[segment] + np.clip(np.nan_to_num(offset), 0.0, width)
+    return _with_fallback(result, empty, fallback)
+
+
+def _maximum_mask(outputs, atol):
+    peak = outputs.max(axis=1)
+    return outputs >= (peak - atol)[:, None], peak <= 0
+
+
+def mom(outputs, values, fallback=np.nan, atol=1e-12):
+    outputs, values = _prepare(outputs, values)
+    mask, empty = _maximum_mask(outputs, atol)
+    result = mask @ values / mask.sum(axis=1)
+    return _with_fallback(result, empty, fallback)
+
+
+def som(outputs, values, fallback=np.nan, atol=1e-12):
+    outputs, values = _prepare(outputs, values)
+    mask, empty = _maximum_mask(outputs, atol)
+    result = np.where(mask, values, np.inf).min(axis=1)
+    return _with_fallback(result, empty, fallback)
+
+
+def lom(outputs, values, fallback=np.nan, atol=1e-12):
+    outputs, values = _prepare(outputs, values)
+    mask, empty = _maximum_mask(outputs, atol)
+    result = np.where(mask, values, -np.inf).max(axis=1)
+    return _with_fallback(result, empty, fallback)
+
+
+def term_peaks(variable):
+    """Середина множества максимумов каждого терма: (термы,)."""
+    return mom(variable.terms, variable.universe)
+
+
+def height(levels, peaks, fallback=np.nan):
+    """
+    Метод высот: sum_r l_r * c_r / sum_r l_r.
+
+    Parameters:
+    - levels: уровни истинности правил (N, правила).
+    - peaks: пики термов следствия правил (правила,) или значения
+      следствий для каждого наблюдения (N, правила), как в выводе Сугено.
+    """
+    levels = np.atleast_2d(as_float(levels))
+    peaks = as_float(peaks)
+    total = levels.sum(axis=1)
+    weighted = levels @ peaks if peaks.ndim == 1 else (levels * peaks).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = weighted / total
+    return _with_fallback(result, total <= 0, fallback)
+
+
+DEFUZZIFIERS = {
+    "centroid": centroid,
+    "bisector": bisector,
+    "mom": mom,
+    "som": som,
+    "lom": lom,
+}
+
+# "height" и "continuous" работают с уровнями истинности правил, их выбирает Predictor
+METHODS = tuple(DEFUZZIFIERS) + ("height", "continuous")
+
+
+def get_defuzzifier(name):
+    try:
+        return DEFUZZIFIERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Неизвестный метод дефаззификации {name!r}, доступны: {', '.join(METHODS)}"
+        ) from None
+
+
+def defuzzify(outputs, values, method="centroid", fallback=np.nan):
+    return get_defuzzifier(method)(outputs, values, fallback)
@@ -0,0 +1,57 @@
+"""
+Преобразование FuzzyModel в таблицы pandas для вывода на экран.
+
+pandas используется только здесь, на границе ввода-вывода: таблицы
+печатаются скриптами core_combined и core_many (столбцы — термы,
+последний столбец — точки множества определения) и подписывают оси
+графиков plt.plotting.
+"""
+import pandas as pd
+
+from .parser import linear_text
+
+
+def to_frame(variable):
+    columns = dict(zip(variable.term_names, variable.terms.tolist()))
+    columns[variable.name] = variable.universe.tolist()
+    frame = pd.DataFrame(columns)
+    frame.attrs["membership"] = {
+        term: params for term, params in zip(variable.term_names, variable.params) if params
+    }
+    return frame
+
+
+def rule_names(model):
+    """Правила с именами термов: по строке на правило, None — вход не участвует."""
+    rows = []
+    for r, terms in enumerate(model.rules.tolist()):
+        row = [var.term_names[t] if t >= 0 else None for var, t in zip(model.inputs, terms)]
+        if model.mode == "sugeno":
+            consequent = linear_text(model, model.coefficients[r])
+        else:
+            consequent = model.output.term_names[model.consequents[r]]
+        rows.append(row + [consequent])
+    return rows
+
+
+def combined_tables(model):
+    """Результат в форме core_combined.process_file: A, B, rules, given, a_name, b_name."""
+    if len(model.inputs) != 1:
+        raise ValueError(f"Ожидалась одна входная переменная, получено {len(model.inputs)}")
+    a, b = model.inputs[0], model.output
+    rules = pd.DataFrame(rule_names(model), columns=["Условие", "Следствие"])
+    given = model.given[0].tolist() if model.given else []
+    return to_frame(a), to_frame(b), rules, given, a.name, b.name
+
+
+def many_tables(model):
+    """Результат в форме core_many.process_file: A, B, rules, given, name."""
+    name = [model.output.name] + [var.name for var in model.inputs]
+    connectives = ["или" if c else "и" for c in model.connectives.tolist()]
+    rules = pd.DataFrame(
+        [row + [c] for row, c in zip(rule_names(model), connectives)],
+        columns=name[1:] + [name[0], "Связка"],
+    )
+    A = [[]] + [to_frame(var) for var in model.inputs]
+    given = [g.tolist() for g in model.given]
+    return A, to_frame(model.output), rules, given, name
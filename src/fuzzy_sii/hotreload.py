@@ -0,0 +1,199 @@
+"""
+Горячая перезагрузка базы правил.
+
+ModelHandle хранит ссылку на неизменяемую версию модели (ModelVersion).
+Читатели просто берут handle.current и работают с ней до конца запроса;
+новая версия собирается в фоне и подменяет ссылку одним присваиванием,
+поэтому блокировок на пути чтения нет, а начатые запросы завершаются на
+старой версии.
+
+При перезагрузке переиспользуется все, что не изменилось: переменные с
+теми же множествами определения и термами остаются прежними объектами,
+а отношение механизма "rules" копируется и обновляется только по
+добавленным и удаленным правилам.
+
+Watcher — фоновый поток, который опрашивает время изменения файла.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+import numpy as np
+
+from .compiled import load_cached, source_hash
+from .inference import Predictor, default_method
+from .model import FuzzyModel
+
+
+def rule_keys(model):
+    """Правило как кортеж (термы входов..., терм следствия, связка)."""
+    table = np.column_stack([model.rules, model.consequents, model.connectives])
+    return [tuple(row) for row in table.tolist()]
+
+
+def _same_variable(old, new):
+    return (
+        old.name == new.name
+        and old.term_names == new.term_names
+        and np.array_equal(old.universe, new.universe)
+        and np.array_equal(old.terms, new.terms)
+    )
+
+
+def reuse_variables(old, new):
+    """Модель new, в которой неизменные переменные заменены объектами из old."""
+    previous = {variable.name: variable for variable in old.inputs + [old.output]}
+
+    def pick(variable):
+        candidate = previous.get(variable.name)
+        return candidate if candidate is not None and _same_variable(candidate, variable) else variable
+
+    return FuzzyModel(
+        [pick(v) for v in new.inputs],
+        pick(new.output),
+        new.rules,
+        new.consequents,
+        new.given,
+        new.connectives,
+        new.coefficients,
+    )
+
+
+class ModelVersion:
+    def __init__(self, version, digest, model, predictor, rule_ids=None):
+        self.version = version
+        self.digest = digest
+        self.model = model
+        self.predictor = predictor
+        self.keys = rule_keys(model)
+        # Идентификаторы правил в CompiledRelation по строкам model.rules
+        self.rule_ids = rule_ids if rule_ids is not None else list(range(model.num_rules))
+
+
+class ModelHandle:
+    def __init__(
+        self, path, method=None, implication_name="mamdani", defuzzifier="centroid", fallback=np.nan
+    ):
+        self.path = path
+        self.method = method
+        self.implication_name = implication_name
+        self.defuzzifier = defuzzifier
+        self.fallback = fallback
+        self._lock = threading.Lock()
+        digest = source_hash(path)
+        self.current = self._build(load_cached(path), digest, version=1)
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def _build(self, model, digest, version):
+        method = self.method or default_method(model)
+        predictor = Predictor(
+            model,
+            method,
+            self.implication_name,
+            defuzzifier=self.defuzzifier,
+            fallback=self.fallback,
+        )
+        return ModelVersion(version, digest, model, predictor)
+
+    def _incremental(self, old, model, digest):
+        """Новая версия на основе старой: обновляются только измененные правила."""
+        model = reuse_variables(old.model, model)
+        predictor = old.predictor
+        unchanged = (
+            predictor.method == "rules"
+            and model.inputs[0] is old.model.inputs[0]
+            and model.output is old.model.output
+        )
+        if not unchanged:
+            return self._build(model, digest, old.version + 1)
+
+        keys = rule_keys(model)
+        removed = Counter(old.keys) - Counter(keys)
+        added = Counter(keys) - Counter(old.keys)
+        if sum(removed.values()) + sum(added.values()) > model.num_rules:
+            return self._build(model, digest, old.version + 1)
+
+        # Копия отношения, чтобы запросы к старой версии не видели изменений
+        relation = predictor.relation.copy()
+        free = {}
+        for key, rule_id in zip(old.keys, old.rule_ids):
+            if removed[key] > 0:
+                removed[key] -= 1
+                relation.remove_rule(rule_id)
+            else:
+                free.setdefault(key, []).append(rule_id)
+        antecedents, consequents = model.antecedents(0), model.consequent_terms()
+        rule_ids = []
+        for row, key in enumerate(keys):
+            if free.get(key):
+                rule_ids.append(free[key].pop())
+            else:
+                rule_ids.append(relation.add_rule(antecedents[row], consequents[row]))
+        new_predictor = Predictor(
+            model,
+            "rules",
+            self.implication_name,
+            predictor.tnorm,
+            relation=relation,
+            defuzzifier=predictor.defuzzifier,
+            fallback=predictor.fallback,
+        )
+        return ModelVersion(old.version + 1, digest, model, new_predictor, rule_ids)
+
+    def reload(self):
+        """Перечитывает файл; возвращает True, если версия сменилась."""
+        with self._lock:
+            digest = source_hash(self.path)
+            old = self.current
+            if digest == old.digest:
+                return False
+            version = self._incremental(old, load_cached(self.path), digest)
+            # Подмена ссылки атомарна: читатели видят либо старую, либо новую версию
+            self.current = version
+            return True
+
+
+class Watcher(threading.Thread):
+    """Фоновая проверка файлов базы правил каждые interval секунд."""
+
+    def __init__(self, handles, interval=1.0):
+        super().__init__(daemon=True, name="fuzzy-watcher")
+        self.handles = list(handles)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._stamps = {id(h): self._stamp(h.path) for h in self.handles}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        for handle in self.handles:
+            stamp = self._stamp(handle.path)
+            if stamp is None or stamp == self._stamps[id(handle)]:
+                continue
+            self._stamps[id(handle)] = stamp
+            try:
+                if handle.reload():
+                    print(
+                        f"{handle.path}: загружена версия {handle.current.version}",
+                        file=sys.stderr,
+                    )
+            except (OSError, ValueError) as error:
+                # Ошибочный файл не должен останавливать работу со старой версией
+                print(f"{handle.path}: перезагрузка не удалась: {error}", file=sys.stderr)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,92 @@
+"""
+Векторизованный движок импликаций.
+
+Матрицы зависимостей всех правил строятся одной операцией broadcast:
+R[r, i, j] = I(a_r[i], b_r[j]), где a_r — функция принадлежности условия,
+а b_r — следствия правила r. Результат — тензор формы (правила, |A|, |B|).
+"""
+import numpy as np
+
+from . import profiling
+
+
+def mamdani(a, b):
+    return np.minimum(a, b)
+
+
+def larsen(a, b):
+    return a * b
+
+
+def lukasiewicz(a, b):
+    return np.minimum(1.0, 1.0 - a + b)
+
+
+def godel(a, b):
+    return np.where(a <= b, 1.0, b)
+
+
+def kleene_dienes(a, b):
+    return np.maximum(1.0 - a, b)
+
+
+def zadeh(a, b):
+    return np.maximum(np.minimum(a, b), 1.0 - a)
+
+
+IMPLICATIONS = {
+    "mamdani": mamdani,
+    "larsen": larsen,
+    "lukasiewicz": lukasiewicz,
+    "godel": godel,
+    "kleene_dienes": kleene_dienes,
+    "zadeh": zadeh,
+}
+
+
+def register_implication(name, func):
+    """
+    Регистрирует пользовательскую импликацию.
+
+    func(a, b) должна принимать массивы, совместимые по broadcast,
+    и возвращать массив значений импликации.
+    """
+    IMPLICATIONS[name] = func
+
+
+def get_implication(implication):
+    if callable(implication):
+        return implication
+    try:
+        return IMPLICATIONS[implication]
+    except KeyError:
+        raise ValueError(
+            f"Неизвестная импликация {implication!r}, "
+            f"доступны: {', '.join(IMPLICATIONS)}"
+        ) from None
+
+
+@profiling.profiled("implication")
+def relation_tensor(antecedents, consequents, implication="mamdani", dtype=np.float64, out=None):
+    """
+    Строит тензор матриц зависимостей для всех правил сразу.
+
+    Parameters:
+    - antecedents: массив (правила, |A|), функции принадлежности условий.
+    - consequents: массив (правила, |B|), функции принадлежности следствий.
+    - implication: имя из IMPLICATIONS или функция f(a, b).
+    - out: готовый массив (правила, |A|, |B|), например memmap из
+      storage.allocate; заполняется по одному правилу, без временного
+      тензора полного размера.
+    """
+    a = np.asarray(antecedents, dtype=dtype)
+    b = np.asarray(consequents, dtype=dtype)
+    func = get_implication(implication)
+    if profiling.enabled():
+        profiling.count("cells_computed", a.shape[0] * a.shape[1] * b.shape[1])
+        profiling.count("bytes_allocated", a.shape[0] * a.shape[1] * b.shape[1] * a.itemsize)
+    if out is None:
+        return func(a[:, :, None], b[:, None, :]).astype(dtype, copy=False)
+    for r in range(len(a)):
+        out[r] = func(a[r, :, None], b[r, None, :])
+    return out
@@ -0,0 +1,224 @@
+"""
+Пакетный вывод по модели FuzzyModel.
+
+Вход — список матриц (N, |U_v|) функций принадлежности по каждому входу,
+выход — матрица (N, |B|) и N четких значений (центр тяжести).
+Механизмы:
+- "rules": агрегация правил и max-min композиция (только один вход);
+- "outputs": агрегация выходов (только один вход);
+- "truth": уровни истинности предпосылок правил (любое число входов);
+- "sparse": то же, но вычисляются только сработавшие правила (SparseIndex).
+
+Модель Сугено (model.mode == "sugeno") поддерживает только "truth":
+выходом тогда служат уровни истинности правил (N, правила), а четкое
+значение — их взвешенное среднее линейных следствий, поэтому выбрать
+другой дефаззификатор для нее нельзя.
+"""
+import numpy as np
+
+from . import composition, defuzz, implication, membership, profiling
+from .premises import premise_levels
+from .relation import CompiledRelation
+from .sparse import SparseIndex
+
+METHODS = ("rules", "outputs", "truth", "sparse")
+# Дефаззификация по уровням истинности правил, а не по выходам
+LEVEL_DEFUZZIFIERS = ("height", "continuous")
+
+
+def fuzzify(values, universe):
+    """
+    Переводит четкие значения в функции принадлежности на дискретном
+    множестве определения: значение делится между двумя соседними точками
+    пропорционально расстоянию, так что центр тяжести равен самому значению.
+    Значения за границами прижимаются к крайним точкам.
+    """
+    values = np.atleast_1d(np.asarray(values, dtype=float))
+    universe = np.asarray(universe, dtype=float)
+    result = np.zeros((len(values), len(universe)))
+    if len(universe) == 1:
+        result[:, 0] = 1.0
+        return result
+    clipped = np.clip(values, universe[0], universe[-1])
+    right = np.clip(np.searchsorted(universe, clipped, side="right"), 1, len(universe) - 1)
+    left = right - 1
+    weight = (clipped - universe[left]) / (universe[right] - universe[left])
+    rows = np.arange(len(values))
+    result[rows, left] = 1.0 - weight
+    result[rows, right] += weight
+    return result
+
+
+def default_method(model):
+    """Механизм по умолчанию: "rules" для одного входа, иначе "truth"."""
+    if len(model.inputs) == 1 and model.mode == "mamdani":
+        return "rules"
+    return "truth"
+
+
+def crisp_inputs(model, givens):
+    """
+    Четкие значения входов (N, V) — центры тяжести их функций
+    принадлежности. Пустой вход считается нулем.
+    """
+    columns = [defuzz.centroid(g, var.universe) for var, g in zip(model.inputs, givens)]
+    return np.nan_to_num(np.column_stack(columns))
+
+
+def sugeno_outputs(model, inputs):
+    """Значения линейных следствий правил для четких входов (N, V): (N, правила)."""
+    return inputs @ model.coefficients[:, :-1].T + model.coefficients[:, -1]
+
+
+def truth_outputs(model, levels, max_elements=composition.MAX_ELEMENTS):
+    """
+    Усеченные следствия, агрегированные максимумом: (N, |B|).
+
+    Промежуточный массив (наблюдения, правила, |B|) строится порциями не
+    больше max_elements элементов — по наблюдениям, а при большом числе
+    правил и по правилам.
+    """
+    consequents = model.consequent_terms()
+    levels = np.atleast_2d(levels)
+    size = consequents.shape[1]
+    outputs = np.zeros((len(levels), size))
+    rules = max(1, min(len(consequents), max_elements // max(1, size)))
+    rows = max(1, max_elements // (rules * max(1, size)))
+    for start in range(0, len(levels), rows):
+        block = outputs[start : start + rows]
+        for lo in range(0, len(consequents), rules):
+            part = np.minimum(
+                levels[start : start + rows, lo : lo + rules, None], consequents[None, lo : lo + rules]
+            ).max(axis=1)
+            np.maximum(block, part, out=block)
+    return outputs
+
+
+@profiling.profiled("defuzzification")
+def continuous_defuzzification(model, levels, tol=1e-9, fallback=np.nan):
+    """
+    Центр тяжести выхода механизма «truth» без дискретизации: функция
+    принадлежности выхода max_r min(уровень_r, терм_r(y)) вычисляется
+    по параметрическим (или интерполированным) термам и интегрируется
+    адаптивно. levels — массив (N, правила); возвращает N значений,
+    fallback — там, где ни одно правило не сработало.
+    """
+    output = model.output
+    lo, hi = output.universe[0], output.universe[-1]
+    breakpoints = output.breakpoints()
+    result = np.empty(len(levels))
+    for row, row_levels in enumerate(np.atleast_2d(levels)):
+        active = np.flatnonzero(row_levels > 0)
+        terms = model.consequents[active]
+        heights = row_levels[active]
+
+        def mu(y):
+            values = [min(h, output.membership(t, y)) for h, t in zip(heights, terms)]
+            return max(values, default=0.0)
+
+        result[row] = membership.continuous_centroid(mu, lo, hi, tol, breakpoints)
+    return np.where(np.isnan(result), fallback, result)
+
+
+def check_defuzzifier(model, defuzzifier):
+    """ValueError, если дефаззификатор неизвестен или неприменим к модели."""
+    if defuzzifier not in LEVEL_DEFUZZIFIERS:
+        defuzz.get_defuzzifier(defuzzifier)
+    if model.mode == "sugeno" and defuzzifier != "centroid":
+        raise ValueError(
+            f"Для вывода Сугено четкое значение — взвешенное среднее следствий, "
+            f"дефаззификатор {defuzzifier!r} не применяется"
+        )
+
+
+class Predictor:
+    """
+    Подготовленный вывод: матрицы зависимостей строятся один раз при
+    создании, после чего __call__ обрабатывает пакеты наблюдений.
+    """
+
+    def __init__(
+        self,
+        model,
+        method="rules",
+        implication_name="mamdani",
+        tnorm="min",
+        relation=None,
+        defuzzifier="centroid",
+        fallback=np.nan,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"Неизвестный механизм {method!r}, доступны: {', '.join(METHODS)}")
+        check_defuzzifier(model, defuzzifier)
+        if method in ("rules", "outputs") and len(model.inputs) != 1:
+            raise ValueError(f"Механизм {method!r} поддерживает только один вход")
+        if model.mode == "sugeno" and method != "truth":
+            raise ValueError(f"Для вывода Сугено доступен только механизм 'truth', не {method!r}")
+        self.model = model
+        self.method = method
+        self.tnorm = tnorm
+        self.implication_name = implication_name
+        self.defuzzifier = defuzzifier
+        # Четкое значение для наблюдений, на которых не сработало ни одно правило
+        self.fallback = fallback
+        if defuzzifier == "height" and model.mode == "mamdani":
+            self.peaks = defuzz.term_peaks(model.output)[model.consequents]
+        if method == "rules":
+            # relation — уже собранное отношение, например при горячей перезагрузке
+            self.relation = (
+                relation
+                if relation is not None
+                else CompiledRelation.from_model(model, implication_name)
+            )
+        elif method == "outputs":
+            self.correspondences = implication.relation_tensor(
+                model.antecedents(0), model.consequent_terms(), implication_name
+            )
+        elif method == "sparse":
+            self.index = SparseIndex(model)
+
+    @profiling.profiled("inference")
+    def __call__(self, givens):
+        levels = None
+        if self.method == "rules":
+            outputs = self.relation.query(givens[0], self.tnorm)
+        elif self.method == "outputs":
+            outputs = composition.batch_outputs_aggregation(
+                givens[0], self.correspondences, self.tnorm
+            )
+        elif self.method == "sparse":
+            givens = [np.atleast_2d(given) for given in givens]
+            outputs = np.empty((len(givens[0]), len(self.model.output.universe)))
+            for row in range(len(outputs)):
+                observation = [given[row] for given in givens]
+                outputs[row] = self.index.infer(observation, self.tnorm)[0]
+        else:
+            return self.from_levels(givens, premise_levels(self.model, givens, self.tnorm))
+        return outputs, self.defuzzify(outputs, givens, levels)
+
+    def from_levels(self, givens, levels):
+        """Выходы и четкие значения по уже вычисленным уровням истинности правил."""
+        if self.model.mode == "sugeno":
+            values = sugeno_outputs(self.model, crisp_inputs(self.model, givens))
+            return levels, defuzz.height(levels, values, self.fallback)
+        outputs = truth_outputs(self.model, levels)
+        return outputs, self.defuzzify(outputs, givens, levels)
+
+    @property
+    def output_size(self):
+        """Число столбцов первого результата __call__."""
+        if self.model.mode == "sugeno":
+            return self.model.num_rules
+        return len(self.model.output.universe)
+
+    def defuzzify(self, outputs, givens, levels=None):
+        """Четкие значения выходов; levels нужны только методам по уровням правил."""
+        if self.defuzzifier not in LEVEL_DEFUZZIFIERS:
+            return defuzz.defuzzify(
+                outputs, self.model.output.universe, self.defuzzifier, self.fallback
+            )
+        if levels is None:
+            levels = premise_levels(self.model, givens, self.tnorm)
+        if self.defuzzifier == "continuous":
+            return continuous_defuzzification(self.model, levels, fallback=self.fallback)
+        return defuzz.height(levels, self.peaks, self.fallback)
@@ -0,0 +1,132 @@
+"""
+Генератор нагрузки для fuzzy_sii.server.
+
+Открывает --connections соединений, каждое держит до --pipeline
+запросов в полете, и отправляет всего --requests запросов со случайными
+четкими входами из множеств определения модели. В конце печатает
+задержки p50/p99 на стороне клиента, пропускную способность и
+статистику сервера.
+
+С --serve сервер запускается в том же процессе, что позволяет проверить
+все локально одной командой:
+
+    PYTHONPATH=src python -m fuzzy_sii.loadgen --serve config_many.txt --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from .compiled import load_cached
+from .server import add_server_arguments, check_configs, make_server, model_name
+
+
+async def _connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def _worker(args, requests, latencies, errors):
+    reader, writer = await _connect(args)
+    sent = {}
+    done = asyncio.Event()
+
+    async def receive():
+        while sent:
+            line = await reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            start = sent.pop(response["id"])
+            latencies.append(time.perf_counter() - start)
+            if "error" in response:
+                errors.append(response["error"])
+            done.set()
+
+    receiver = None
+    for request in requests:
+        while len(sent) >= args.pipeline:
+            done.clear()
+            await done.wait()
+        sent[request["id"]] = time.perf_counter()
+        writer.write((json.dumps(request, ensure_ascii=False) + "\n").encode())
+        await writer.drain()
+        if receiver is None or receiver.done():
+            receiver = asyncio.create_task(receive())
+    if receiver is not None:
+        await receiver
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _request(args, payload):
+    reader, writer = await _connect(args)
+    writer.write((json.dumps(payload) + "\n").encode())
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    return response
+
+
+def make_requests(model, name, count, seed=0):
+    rng = np.random.default_rng(seed)
+    lows = [var.universe[0] for var in model.inputs]
+    highs = [var.universe[-1] for var in model.inputs]
+    points = rng.uniform(lows, highs, (count, len(model.inputs)))
+    return [{"id": k, "model": name, "input": row} for k, row in enumerate(points.tolist())]
+
+
+async def run(args):
+    listener = None
+    if args.serve:
+        server = make_server(args)
+        listener = await server.start(args.host, args.port, args.unix)
+
+    path = args.configs[0].rpartition("=")[2]
+    name = args.configs[0].rpartition("=")[0] or model_name(path)
+    requests = make_requests(load_cached(path), name, args.requests)
+    shards = [requests[k :: args.connections] for k in range(args.connections)]
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(args, shard, latencies, errors) for shard in shards))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    print(f"Запросов: {len(latencies)}, ошибок: {len(errors)}, за {elapsed:.2f} с")
+    print(f"Пропускная способность: {len(latencies) / elapsed:.0f} запр/с")
+    print(
+        f"Задержка клиента: p50 {np.percentile(latencies, 50) * 1e3:.2f} мс, "
+        f"p99 {np.percentile(latencies, 99) * 1e3:.2f} мс"
+    )
+    stats = (await _request(args, {"cmd": "stats"}))["stats"]
+    print(f"Сервер: {json.dumps(stats, ensure_ascii=False)}")
+
+    if listener is not None:
+        await asyncio.sleep(0)
+        listener.close()
+        await listener.wait_closed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генератор нагрузки для сервера нечеткого вывода")
+    add_server_arguments(parser)
+    parser.add_argument("--serve", action="store_true", help="запустить сервер в этом же процессе")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--pipeline", type=int, default=8, help="запросов в полете на соединение")
+    args = parser.parse_args(argv)
+    if args.serve:
+        try:
+            check_configs(args.configs, args.defuzz)
+        except ValueError as error:
+            parser.error(str(error))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
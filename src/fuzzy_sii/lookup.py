@@ -0,0 +1,238 @@
+"""
+Таблица-суррогат для четкого входа и четкого выхода.
+
+Для фиксированной базы правил путь «фаззификация — композиция —
+дефаззификация» является детерминированной функцией четких входов.
+build_table вычисляет ее на сетке по каждому входу (равномерная сетка
+плюс точки множества определения, где у функции изломы), после чего
+запрос — это поиск ячейки и мультилинейная интерполяция.
+
+Погрешность проверяется в центрах всех ячеек: если она больше tol,
+сетка сгущается вдвое, пока не будет достигнута точность или предел
+max_points. Если предел не позволяет достичь tol, выдается
+предупреждение с достигнутой погрешностью. Она сохраняется в max_error; это
+измеренная, а не доказанная оценка — между контрольными точками
+ошибка может быть несколько больше. Узлы, где не срабатывает ни одно
+правило (nan), в интерполяцию не входят: значение считается по
+конечным углам ячейки, и nan получается, только если nan все углы.
+Контрольная точка, где nan дает сам вывод, в оценку не входит, а
+nan таблицы при конечном выводе считается бесконечной погрешностью.
+Размер таблицы растет как
+(точек на ось)^входы, так что подход рассчитан на небольшое число входов.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.lookup config_combined.txt -o table.npz --tol 1
+"""
+import argparse
+import bisect
+import itertools
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import profiling
+from .implication import IMPLICATIONS
+from .inference import METHODS, Predictor, default_method
+from .parallel import split_matrix
+
+_predictor = None
+
+
+def _init_worker(predictor):
+    global _predictor
+    _predictor = predictor
+
+
+def _evaluate_chunk(points):
+    return _predictor(split_matrix(points, _predictor.model))[1]
+
+
+def evaluate_points(predictor, points, workers=1, chunk_size=65536):
+    """Четкие выходы для матрицы четких входов (N, входы), при workers > 1 — в пуле процессов."""
+    points = np.atleast_2d(points)
+    chunks = [points[lo : lo + chunk_size] for lo in range(0, len(points), chunk_size)]
+    if workers <= 1 or len(chunks) == 1:
+        results = [predictor(split_matrix(chunk, predictor.model))[1] for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(predictor,)) as pool:
+            results = list(pool.map(_evaluate_chunk, chunks))
+    return np.concatenate(results) if results else np.empty(0)
+
+
+def _grid(axes):
+    return np.stack([g.ravel() for g in np.meshgrid(*axes, indexing="ij")], axis=1)
+
+
+class LookupTable:
+    def __init__(self, axes, values, max_error=float("nan"), names=()):
+        self.axes = [np.asarray(axis, dtype=float) for axis in axes]
+        self.values = np.asarray(values, dtype=float).reshape([len(a) for a in self.axes])
+        self.max_error = float(max_error)
+        self.names = list(names)
+        # Списки Python для скалярного пути без накладных расходов numpy
+        self._axes_list = [axis.tolist() for axis in self.axes]
+        self._flat = self.values.ravel().tolist()
+        self._strides = [s // self.values.itemsize for s in self.values.strides]
+
+    def __call__(self, points):
+        """Пакетный запрос: points (N, входы) или (N,) для одного входа -> (N,)."""
+        points = np.asarray(points, dtype=float)
+        points = points.reshape(len(points), -1) if points.ndim else points.reshape(1, 1)
+        index = []
+        weight = []
+        for k, axis in enumerate(self.axes):
+            x = np.clip(points[:, k], axis[0], axis[-1])
+            i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+            index.append(i)
+            weight.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+        result = np.zeros(len(points))
+        total = np.zeros(len(points))
+        for corner in itertools.product((0, 1), repeat=len(self.axes)):
+            w = np.ones(len(points))
+            for k, bit in enumerate(corner):
+                w *= weight[k] if bit else 1.0 - weight[k]
+            value = self.values[tuple(i + bit for i, bit in zip(index, corner))]
+            # Углы с nan пропускаются, веса остальных нормируются
+            finite = ~np.isnan(value)
+            result += np.where(finite, w * value, 0.0)
+            total += np.where(finite, w, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return result / total
+
+    def scalar(self, *x):
+        """Запрос для одного наблюдения на чистом Python (без массивов numpy)."""
+        base = 0
+        weights = []
+        for k, axis in enumerate(self._axes_list):
+            value = min(max(x[k], axis[0]), axis[-1])
+            i = min(max(bisect.bisect_right(axis, value) - 1, 0), len(axis) - 2)
+            base += i * self._strides[k]
+            weights.append((value - axis[i]) / (axis[i + 1] - axis[i]))
+        if len(weights) == 1:
+            w = weights[0]
+            left, right = self._flat[base], self._flat[base + 1]
+            # nan != nan: быстрый путь только для конечных углов
+            if left == left and right == right:
+                return left * (1.0 - w) + right * w
+        result = 0.0
+        total = 0.0
+        for corner in itertools.product((0, 1), repeat=len(weights)):
+            w = 1.0
+            offset = base
+            for k, bit in enumerate(corner):
+                w *= weights[k] if bit else 1.0 - weights[k]
+                offset += bit * self._strides[k]
+            value = self._flat[offset]
+            if value == value:
+                result += w * value
+                total += w
+        return result / total if total else float("nan")
+
+    def save(self, path):
+        arrays = {f"axis{k}": axis for k, axis in enumerate(self.axes)}
+        np.savez(
+            path,
+            values=self.values,
+            max_error=self.max_error,
+            names=np.array(self.names, dtype=str),
+            **arrays,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            axes = [data[f"axis{k}"] for k in range(data["values"].ndim)]
+            return cls(axes, data["values"], data["max_error"], data["names"].tolist())
+
+
+def build_table(predictor, grid_size=65, tol=None, max_points=2_000_000, workers=1):
+    """
+    Строит LookupTable для predictor.
+
+    Parameters:
+    - grid_size: начальное число точек равномерной сетки на каждый вход.
+    - tol: допустимая погрешность; None — без уточнения сетки.
+    - max_points: предел размера таблицы при сгущении; если он не позволяет
+      достичь tol, выдается RuntimeWarning с достигнутой max_error.
+    - workers: число процессов для вычисления узлов.
+    """
+    inputs = predictor.model.inputs
+    size = grid_size
+    while True:
+        axes = [
+            np.union1d(np.linspace(var.universe[0], var.universe[-1], size), var.universe)
+            for var in inputs
+        ]
+        values = evaluate_points(predictor, _grid(axes), workers)
+        table = LookupTable(axes, values, names=[var.name for var in inputs])
+
+        midpoints = _grid([(axis[1:] + axis[:-1]) / 2 for axis in axes])
+        expected = evaluate_points(predictor, midpoints, workers)
+        actual = table(midpoints)
+        # Точки, где ни одно правило не срабатывает, в оценку не входят;
+        # nan таблицы там, где вывод конечен, — бесконечная погрешность
+        defined = ~np.isnan(expected)
+        error = np.abs(expected[defined] - actual[defined])
+        error[np.isnan(error)] = np.inf
+        table.max_error = float(error.max()) if error.size else 0.0
+
+        next_size = 2 * size - 1
+        if tol is None or table.max_error <= tol:
+            return table
+        if next_size ** len(inputs) > max_points:
+            warnings.warn(
+                f"точность {tol:g} не достигнута: погрешность {table.max_error:.6g} "
+                f"при {table.values.size} точках, сгущение превысило бы max_points={max_points}",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            return table
+        size = next_size
+
+
+def main(argv=None):
+    from .compiled import load_cached
+    from .streaming import add_defuzz_arguments
+
+    parser = argparse.ArgumentParser(description="Компиляция базы правил в таблицу-суррогат")
+    parser.add_argument("config", help="файл базы правил config_*.txt")
+    parser.add_argument("-o", "--output", required=True, help="файл таблицы .npz")
+    parser.add_argument("--grid", type=int, default=65)
+    parser.add_argument("--tol", type=float, default=None)
+    parser.add_argument("--max-points", type=int, default=2_000_000)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--implication", choices=IMPLICATIONS, default="mamdani")
+    add_defuzz_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+
+    model = load_cached(args.config)
+    method = args.method or default_method(model)
+    try:
+        predictor = Predictor(
+            model, method, args.implication, defuzzifier=args.defuzz, fallback=args.fallback
+        )
+    except ValueError as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    table = build_table(predictor, args.grid, args.tol, args.max_points, args.workers)
+    elapsed = time.perf_counter() - start
+    table.save(args.output)
+
+    point = [float(axis[len(axis) // 3]) for axis in table.axes]
+    repeat = 100000
+    start = time.perf_counter()
+    for _ in range(repeat):
+        table.scalar(*point)
+    per_call = (time.perf_counter() - start) / repeat
+    print(f"Таблица {table.values.shape} построена за {elapsed:.2f} с")
+    print(f"Максимальная погрешность в контрольных точках: {table.max_error:.6g}")
+    print(f"Запрос: {per_call * 1e6:.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Параметрические функции принадлежности.
+
+В конфигурации вместо строки значений после «Нечеткое множество имя»
+можно указать функцию и ее параметры:
+
+    Нечеткое множество средне
+    треугольная 450 600 750
+
+Поддерживаются: треугольная a b c, трапециевидная a b c d,
+гауссова c sigma, сигмоидная a c. Функции вычисляются в любых точках,
+поэтому множество определения можно передискретизировать под нужную
+точность (FuzzyModel.resample), а центр тяжести выхода — считать
+адаптивным интегрированием без плотной сетки в памяти.
+"""
+import numpy as np
+
+
+def triangular(x, a, b, c):
+    x = np.asarray(x, dtype=float)
+    left = (x - a) / (b - a) if b > a else (x >= b).astype(float)
+    right = (c - x) / (c - b) if c > b else (x <= b).astype(float)
+    return np.clip(np.minimum(left, right), 0.0, 1.0)
+
+
+def trapezoidal(x, a, b, c, d):
+    x = np.asarray(x, dtype=float)
+    left = (x - a) / (b - a) if b > a else (x >= b).astype(float)
+    right = (d - x) / (d - c) if d > c else (x <= c).astype(float)
+    return np.clip(np.minimum(np.minimum(left, right), 1.0), 0.0, 1.0)
+
+
+def gaussian(x, c, sigma):
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * ((x - c) / sigma) ** 2)
+
+
+def sigmoid(x, a, c):
+    x = np.asarray(x, dtype=float)
+    return 1.0 / (1.0 + np.exp(-a * (x - c)))
+
+
+MEMBERSHIP_FUNCTIONS = {
+    "треугольная": (triangular, 3),
+    "трапециевидная": (trapezoidal, 4),
+    "гауссова": (gaussian, 2),
+    "сигмоидная": (sigmoid, 2),
+}
+
+
+def check_params(kind, params):
+    """ValueError, если параметры не задают функцию: порядок вершин, нулевая ширина."""
+    if not all(np.isfinite(params)):
+        raise ValueError(f"Функция {kind}: параметры должны быть конечными числами")
+    if kind in ("треугольная", "трапециевидная"):
+        if any(left > right for left, right in zip(params, params[1:])):
+            names = " <= ".join("abcd"[: len(params)])
+            raise ValueError(f"Функция {kind}: ожидалось {names}, получено {_format(params)}")
+        if params[0] == params[-1]:
+            raise ValueError(f"Функция {kind}: нулевая ширина основания ({_format(params)})")
+    elif kind == "гауссова" and params[1] <= 0:
+        raise ValueError(f"Функция {kind}: sigma должна быть больше нуля, получено {params[1]:g}")
+    elif kind == "сигмоидная" and params[0] == 0:
+        raise ValueError(f"Функция {kind}: наклон a не может быть нулевым")
+
+
+def _format(params):
+    return " ".join(f"{p:g}" for p in params)
+
+
+def parse_membership(line):
+    """
+    Возвращает (вид, параметры), если строка задает параметрическую
+    функцию, иначе None.
+    """
+    parts = line.split()
+    if not parts or parts[0] not in MEMBERSHIP_FUNCTIONS:
+        return None
+    _, arity = MEMBERSHIP_FUNCTIONS[parts[0]]
+    params = [float(p) for p in parts[1:]]
+    if len(params) != arity:
+        raise ValueError(f"Функция {parts[0]} ожидает {arity} параметров, получено {len(params)}")
+    check_params(parts[0], params)
+    return parts[0], params
+
+
+def evaluate(kind, params, x):
+    func, _ = MEMBERSHIP_FUNCTIONS[kind]
+    return func(x, *params)
+
+
+def _simpson(f, a, fa, b, fb):
+    m = 0.5 * (a + b)
+    fm = f(m)
+    return m, fm, (b - a) / 6.0 * (fa + 4.0 * fm + fb)
+
+
+def adaptive_integral(f, a, b, tol=1e-9, max_depth=50):
+    """
+    Адаптивное интегрирование Симпсона. f(x) должна принимать скаляр и
+    возвращать массив (интегрируется покомпонентно).
+    """
+    fa, fb = f(a), f(b)
+    m, fm, whole = _simpson(f, a, fa, b, fb)
+    stack = [(a, fa, m, fm, b, fb, whole, tol, max_depth)]
+    total = 0.0
+    while stack:
+        a, fa, m, fm, b, fb, whole, eps, depth = stack.pop()
+        lm, flm, left = _simpson(f, a, fa, m, fm)
+        rm, frm, right = _simpson(f, m, fm, b, fb)
+        delta = left + right - whole
+        if depth <= 0 or np.all(np.abs(delta) <= 15.0 * eps):
+            total = total + left + right + delta / 15.0
+        else:
+            stack.append((a, fa, lm, flm, m, fm, left, eps / 2, depth - 1))
+            stack.append((m, fm, rm, frm, b, fb, right, eps / 2, depth - 1))
+    return total
+
+
+def continuous_centroid(membership, lo, hi, tol=1e-9, breakpoints=(), fallback=float("nan")):
+    """
+    Центр тяжести функции membership(y) на отрезке [lo, hi].
+
+    breakpoints — точки излома (вершины треугольников и т.п.); отрезок
+    делится по ним, чтобы интегрирование сходилось быстрее. Если площадь
+    равна нулю, возвращается fallback. Множество определения из одной
+    точки (hi <= lo) дает lo, если степень принадлежности в ней больше
+    нуля, как у дискретных дефаззификаторов.
+    """
+    if hi <= lo:
+        return lo if float(membership(lo)) > 0 else fallback
+    points = sorted({lo, hi, *[p for p in breakpoints if lo < p < hi]})
+
+    def f(y):
+        mu = float(membership(y))
+        return np.array([y * mu, mu])
+
+    moments = sum(adaptive_integral(f, a, b, tol) for a, b in zip(points, points[1:]))
+    return moments[0] / moments[1] if moments[1] > 0 else fallback
@@ -0,0 +1,202 @@
+"""
+Мемоизация вывода для повторяющихся входов.
+
+Ключ — квантованный с шагом step вектор входа и версия базы правил.
+Кэшируются два уровня:
+- степени соответствия входа термам по каждой переменной (истинность
+  отдельных условий «x_v есть терм»), которые совпадают у наблюдений,
+  различающихся только другими входами;
+- итоговые выходы (вектор функции принадлежности и четкое значение).
+
+LRUCache ограничивает число записей и суммарный объем массивов и
+вытесняет давно не использованные записи. При смене версии базы правил
+кэш очищается.
+"""
+import hashlib
+import sys
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from .premises import premise_levels, term_degrees
+
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    def __init__(self, max_entries=65536, max_bytes=64 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = None
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        value = self._entries.get(key, default)
+        if value is default:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= _nbytes(key) + _nbytes(old)
+        self._entries[key] = value
+        self.nbytes += _nbytes(key) + _nbytes(value)
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.nbytes > self.max_bytes
+        ):
+            old_key, old_value = self._entries.popitem(last=False)
+            self.nbytes -= _nbytes(old_key) + _nbytes(old_value)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def validate(self, version):
+        """Очищает кэш, если он заполнялся для другой версии базы правил."""
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+def model_digest(model):
+    """Версия базы правил по содержимому: функции принадлежности и таблица правил."""
+    digest = hashlib.sha256()
+    arrays = [model.rules, model.consequents, model.connectives]
+    for variable in model.inputs + [model.output]:
+        arrays += [variable.universe, variable.terms]
+    if model.coefficients is not None:
+        arrays.append(model.coefficients)
+    for array in arrays:
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+
+# Хеши уже встречавшихся моделей: массивы модели после загрузки не меняются
+_versions = weakref.WeakKeyDictionary()
+
+
+def model_version(model):
+    """model_digest, вычисленный один раз на объект модели."""
+    version = _versions.get(model)
+    if version is None:
+        version = _versions[model] = model_digest(model)
+    return version
+
+
+def quantize(rows, step=1e-6):
+    """Ключи строк (N, k): байты целочисленно округленных rows / step."""
+    codes = np.rint(np.atleast_2d(rows) / step).astype(np.int64)
+    return [row.tobytes() for row in codes]
+
+
+def _group_rows(keys):
+    """Номера строк по каждому различному ключу: повторы в пакете ищутся один раз."""
+    groups = {}
+    for row, key in enumerate(keys):
+        groups.setdefault(key, []).append(row)
+    return groups
+
+
+def cached_degrees(model, givens, cache, step=1e-6, version=None):
+    """
+    term_degrees по каждому входу с кэшированием по переменным.
+    version — версия базы правил (например, model_digest); если задана,
+    кэш другой версии очищается до поиска.
+    """
+    if version is not None:
+        cache.validate(version)
+    degrees = []
+    for var, (variable, given) in enumerate(zip(model.inputs, givens)):
+        given = np.atleast_2d(np.asarray(given, dtype=float))
+        result = np.empty((len(given), len(variable.term_names)))
+        missing = {}
+        for key, rows in _group_rows(quantize(given, step)).items():
+            value = cache.get(("degrees", var, key))
+            if value is None:
+                missing[key] = rows
+            else:
+                result[rows] = value
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            computed = term_degrees(variable, given[first])
+            for (key, rows), value in zip(missing.items(), computed):
+                result[rows] = value
+                cache.put(("degrees", var, key), value)
+        degrees.append(result)
+    return degrees
+
+
+class MemoizedPredictor:
+    """
+    Predictor с кэшем: повторяющиеся входы (с точностью до step) берутся
+    из cache, остальные вычисляются одним пакетом. version — версия базы
+    правил, по умолчанию model_version модели предиктора, поэтому кэш,
+    общий для разных моделей, не отдает чужие результаты.
+    """
+
+    def __init__(self, predictor, cache=None, step=1e-6, version=None):
+        self.predictor = predictor
+        self.model = predictor.model
+        self.cache = cache if cache is not None else LRUCache()
+        self.step = step
+        self.version = version if version is not None else model_version(self.model)
+
+    def _compute(self, givens):
+        if self.predictor.method != "truth":
+            return self.predictor(givens)
+        degrees = cached_degrees(self.model, givens, self.cache, self.step)
+        levels = premise_levels(self.model, None, self.predictor.tnorm, degrees=degrees)
+        return self.predictor.from_levels(givens, levels)
+
+    def __call__(self, givens):
+        self.cache.validate(self.version)
+        givens = [np.atleast_2d(np.asarray(given, dtype=float)) for given in givens]
+        keys = quantize(np.concatenate(givens, axis=1), self.step)
+        outputs = np.empty((len(keys), self.predictor.output_size))
+        crisp = np.empty(len(keys))
+        missing = {}
+        for key, rows in _group_rows(keys).items():
+            value = self.cache.get(("outputs", key))
+            if value is None:
+                missing[key] = rows
+            else:
+                outputs[rows], crisp[rows] = value
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            computed, values = self._compute([given[first] for given in givens])
+            for (key, rows), output, value in zip(missing.items(), computed, values):
+                outputs[rows] = output
+                crisp[rows] = value
+                self.cache.put(("outputs", key), (output.copy(), float(value)))
+        return outputs, crisp
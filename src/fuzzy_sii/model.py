@@ -0,0 +1,134 @@
+"""
+Компактное представление базы правил.
+
+Каждая переменная хранит множество определения и матрицу функций
+принадлежности своих нечетких множеств (термов) формы (термы, |U|).
+Правила хранятся как целочисленная матрица номеров термов
+(правила, входы) и вектор номеров термов следствия. У модели Сугено
+вместо термов следствия — матрица коэффициентов линейных следствий.
+"""
+import numpy as np
+
+from . import membership
+
+
+class Variable:
+    def __init__(self, name, universe, term_names, terms, params=None):
+        self.name = name
+        self.universe = np.asarray(universe, dtype=float)
+        self.term_names = list(term_names)
+        self.terms = np.asarray(terms, dtype=float).reshape(
+            len(self.term_names), len(self.universe)
+        )
+        # (вид, параметры) для параметрических термов, None для заданных значениями
+        self.params = list(params) if params is not None else [None] * len(self.term_names)
+
+    def term_index(self, term_name):
+        return self.term_names.index(term_name)
+
+    def membership(self, term, x):
+        """
+        Значения терма в произвольных точках x: параметрические термы
+        вычисляются точно, заданные значениями — линейной интерполяцией.
+        """
+        if self.params[term] is not None:
+            return membership.evaluate(*self.params[term], x)
+        return np.interp(x, self.universe, self.terms[term])
+
+    def breakpoints(self):
+        """Точки излома функций принадлежности — для адаптивного интегрирования."""
+        points = set(self.universe.tolist())
+        for params in self.params:
+            if params is not None and params[0] in ("треугольная", "трапециевидная"):
+                points.update(params[1])
+        return sorted(points)
+
+    def resample(self, points):
+        """Та же переменная на новом множестве определения points."""
+        points = np.asarray(points, dtype=float)
+        terms = [self.membership(t, points) for t in range(len(self.term_names))]
+        return Variable(self.name, points, self.term_names, terms, self.params)
+
+    def __repr__(self):
+        return f"Variable({self.name!r}, |U|={len(self.universe)}, термы={self.term_names})"
+
+
+class FuzzyModel:
+    def __init__(
+        self, inputs, output, rules, consequents, given=None, connectives=None, coefficients=None
+    ):
+        self.inputs = list(inputs)
+        self.output = output
+        # -1 — вход не участвует в правиле
+        self.rules = np.asarray(rules, dtype=np.int32).reshape(-1, len(self.inputs))
+        self.consequents = np.asarray(consequents, dtype=np.int32)
+        self.given = [np.asarray(g, dtype=float) for g in given or []]
+        # 0 — связка «и», 1 — «или»
+        if connectives is None:
+            connectives = np.zeros(len(self.consequents))
+        self.connectives = np.asarray(connectives, dtype=np.int8)
+        # Вывод Сугено: коэффициенты при входах и свободный член (правила, входы + 1),
+        # номера термов следствия тогда равны -1
+        if coefficients is not None:
+            coefficients = np.asarray(coefficients, dtype=float).reshape(
+                len(self.consequents), len(self.inputs) + 1
+            )
+        self.coefficients = coefficients
+
+    @property
+    def mode(self):
+        return "mamdani" if self.coefficients is None else "sugeno"
+
+    @property
+    def num_rules(self):
+        return len(self.consequents)
+
+    def antecedents(self, var=0):
+        """Функции принадлежности условий правил по входу var: (правила, |U|)."""
+        return self.inputs[var].terms[self.rules[:, var]]
+
+    def consequent_terms(self):
+        """Функции принадлежности следствий правил: (правила, |B|)."""
+        if self.mode == "sugeno":
+            raise ValueError("У модели Сугено следствия правил — линейные функции, а не термы")
+        return self.output.terms[self.consequents]
+
+    def resample(self, resolution):
+        """
+        Модель с равномерными множествами определения из resolution точек
+        (число или словарь {имя переменной: число}). Начальные входы
+        «Пусть» переносятся интерполяцией.
+        """
+
+        def points(variable):
+            n = resolution.get(variable.name) if isinstance(resolution, dict) else resolution
+            if n is None or not len(variable.universe):
+                return variable.universe
+            return np.linspace(variable.universe[0], variable.universe[-1], n)
+
+        inputs = [var.resample(points(var)) for var in self.inputs]
+        given = [
+            np.interp(new.universe, old.universe, g)
+            for new, old, g in zip(inputs, self.inputs, self.given)
+        ]
+        return FuzzyModel(
+            inputs,
+            self.output.resample(points(self.output)),
+            self.rules,
+            self.consequents,
+            given,
+            self.connectives,
+            self.coefficients,
+        )
+
+    def __repr__(self):
+        names = ", ".join(v.name for v in self.inputs)
+        mode = ", Сугено" if self.mode == "sugeno" else ""
+        return f"FuzzyModel([{names}] -> {self.output.name}, правил={self.num_rules}{mode})"
+
+
+def load_model(filename):
+    """Читает текстовую базу правил общим парсером fuzzy_sii.parser."""
+    from .parser import parse_file
+
+    return parse_file(filename)
@@ -0,0 +1,223 @@
+"""
+Параллельный пакетный вывод для больших файлов наблюдений.
+
+Вход делится на порции, которые обрабатываются пулом процессов.
+Каждый рабочий процесс один раз загружает скомпилированный артефакт
+базы правил (fuzzy_sii.compiled) в инициализаторе, поэтому с задачами
+передаются только строки текста или границы диапазона. Входной .npy
+открывается в рабочих процессах через memory map, и задача содержит
+лишь (начало, конец). Результаты выдаются в исходном порядке.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.parallel config_many.txt obs.csv -o out.npy -j 8
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from itertools import chain, islice
+
+import numpy as np
+
+from . import profiling, storage
+from .compiled import cached_artifact, load_compiled
+from .implication import IMPLICATIONS
+from .inference import METHODS, Predictor, check_defuzzifier, default_method, fuzzify
+from .streaming import StreamStats, add_defuzz_arguments, is_header, read_observations
+
+# Состояние рабочего процесса, заполняется в _init_worker
+_predictor = None
+_array = None
+
+
+def split_matrix(matrix, model):
+    """
+    Приводит матрицу наблюдений (N, столбцы) к списку функций
+    принадлежности по входам: столбцов либо по одному четкому значению
+    на вход, либо функции принадлежности всех входов подряд.
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    inputs = model.inputs
+    if matrix.shape[1] == len(inputs):
+        return [fuzzify(matrix[:, k], var.universe) for k, var in enumerate(inputs)]
+    sizes = [len(var.universe) for var in inputs]
+    if matrix.shape[1] != sum(sizes):
+        raise ValueError(
+            f"Ожидалось {len(inputs)} или {sum(sizes)} столбцов, получено {matrix.shape[1]}"
+        )
+    bounds = np.cumsum([0] + sizes)
+    return [matrix[:, bounds[k] : bounds[k + 1]] for k in range(len(inputs))]
+
+
+def _init_worker(artifact, method, implication_name, array_path, defuzzifier, fallback):
+    global _predictor, _array
+    model, _ = load_compiled(artifact)
+    _predictor = Predictor(
+        model, method, implication_name, defuzzifier=defuzzifier, fallback=fallback
+    )
+    if array_path is not None:
+        _array = np.load(array_path, mmap_mode="r")
+
+
+def _run_lines(lines, fmt, first_line):
+    # Заголовок уже пропущен в run_parallel, здесь каждая строка — наблюдение
+    observations = list(
+        read_observations(lines, _predictor.model, fmt, first_line, header=False)
+    )
+    if not observations:
+        return np.empty(0)
+    givens = [np.stack(column) for column in zip(*observations)]
+    return _predictor(givens)[1]
+
+
+def _run_range(start, stop):
+    return _predictor(split_matrix(_array[start:stop], _predictor.model))[1]
+
+
+def _ordered(executor, tasks, in_flight):
+    """Отправляет задачи с ограничением на число незавершенных и выдает результаты по порядку."""
+    pending = deque()
+    for func, *args in tasks:
+        pending.append(executor.submit(func, *args))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _line_chunks(lines, chunk_lines, first_line=1):
+    """Порции строк вместе с номером первой строки порции в файле."""
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            return
+        yield first_line, chunk
+        first_line += len(chunk)
+
+
+def run_parallel(
+    config,
+    input_path,
+    method=None,
+    implication_name="mamdani",
+    workers=None,
+    chunk_size=10000,
+    fmt="auto",
+    stats=None,
+    defuzzifier="centroid",
+    fallback=np.nan,
+):
+    """
+    Генератор массивов четких выходов, по одному на порцию, в порядке входа.
+
+    input_path — текстовый файл (CSV/JSONL) или .npy матрица наблюдений.
+    Некорректные параметры вывода дают ValueError сразу при вызове, а не в
+    рабочих процессах.
+    """
+    workers = workers or os.cpu_count()
+    artifact = cached_artifact(config)
+    model, _ = load_compiled(artifact)
+    method = method or default_method(model)
+    check_defuzzifier(model, defuzzifier)
+    stats = stats if stats is not None else StreamStats()
+
+    is_array = input_path.endswith(".npy")
+    initargs = (
+        artifact,
+        method,
+        implication_name,
+        input_path if is_array else None,
+        defuzzifier,
+        fallback,
+    )
+    return _run(input_path, is_array, workers, chunk_size, fmt, stats, initargs)
+
+
+def _run(input_path, is_array, workers, chunk_size, fmt, stats, initargs):
+    # Пул процессов тянет multiprocessing и logging, импорт только при запуске
+    from concurrent.futures import ProcessPoolExecutor
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as executor:
+        if is_array:
+            total = len(np.load(input_path, mmap_mode="r"))
+            tasks = (
+                (_run_range, lo, min(lo + chunk_size, total))
+                for lo in range(0, total, chunk_size)
+            )
+            yield from _count(_ordered(executor, tasks, 2 * workers), stats, start)
+        else:
+            with open(input_path, "r", encoding="utf-8") as file:
+                # Заголовок CSV проверяется один раз для всего файла, до деления на порции
+                head = file.readline()
+                if is_header(head, fmt):
+                    lines, first_line = file, 2
+                else:
+                    lines, first_line = chain([head], file), 1
+                tasks = (
+                    (_run_lines, chunk, fmt, start)
+                    for start, chunk in _line_chunks(lines, chunk_size, first_line)
+                )
+                yield from _count(_ordered(executor, tasks, 2 * workers), stats, start)
+
+
+def _count(results, stats, start):
+    for result in results:
+        stats.count += len(result)
+        stats.elapsed = time.perf_counter() - start
+        yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Параллельный нечеткий вывод по файлу наблюдений")
+    parser.add_argument("config", help="файл базы правил config_*.txt")
+    parser.add_argument("input", help="файл наблюдений: .csv, .jsonl или .npy")
+    parser.add_argument("-o", "--output", help="файл результатов .npy или текстовый (по умолчанию stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--format", choices=("auto", "csv", "jsonl"), default="auto")
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--implication", choices=IMPLICATIONS, default="mamdani")
+    add_defuzz_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+
+    stats = StreamStats()
+    try:
+        results = run_parallel(
+            args.config,
+            args.input,
+            args.method,
+            args.implication,
+            args.workers,
+            args.chunk_size,
+            args.format,
+            stats,
+            args.defuzz,
+            args.fallback,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    if args.output and args.output.endswith(".npy") and args.input.endswith(".npy"):
+        # Размер известен заранее: результаты пишутся прямо в memmap
+        out = storage.allocate((len(storage.open_array(args.input)),), path=args.output)
+        position = 0
+        for chunk in results:
+            out[position : position + len(chunk)] = chunk
+            position += len(chunk)
+        out.flush()
+    elif args.output and args.output.endswith(".npy"):
+        np.save(args.output, np.concatenate(list(results) or [np.empty(0)]))
+    else:
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            for chunk in results:
+                out.write("".join(f"{value}\n" for value in chunk.tolist()))
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    print(stats, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""
+Однопроходный разбор текстовой базы правил в FuzzyModel.
+
+Грамматика (по строкам, пустые строки и строки с # пропускаются):
+
+    Множество определения <переменная>
+    <числа>                              — точки множества определения
+    Нечеткое множество <терм ...>
+    <числа> | <функция> <параметры>      — значения или параметрическая функция
+    Если <x> <терм> (и|или) <y> <терм> ... то <z> <терм>
+    Пусть <переменная>
+    <числа>                              — функция принадлежности входа
+
+Имена термов могут состоять из нескольких слов. Выходной переменной
+считается та, что стоит после «то»; если правил нет — последняя
+объявленная. Ошибки сообщаются как ParseError с номером строки и
+колонки.
+
+Строка «Вывод Сугено» перед правилами включает вывод Такаги — Сугено —
+Канга: следствия правил — линейные функции четких входов,
+
+    Если <x> <терм> и ... то <z> = 0.2 <x> - 1.5 <y> + 3
+
+а множество определения выходной переменной объявлять не нужно.
+"""
+import re
+
+import numpy as np
+
+from . import membership, profiling
+from .model import FuzzyModel, Variable
+from .premises import CONNECTIVES
+
+UNIVERSE = "Множество определения"
+TERM = "Нечеткое множество"
+RULE = "Если"
+GIVEN = "Пусть"
+MODE = "Вывод"
+
+MODES = {"Мамдани": "mamdani", "Сугено": "sugeno"}
+
+_TOKEN = re.compile(r"\S+")
+_LINEAR_TOKEN = re.compile(r"\d*\.?\d+(?:[eE][+-]?\d+)?|[+\-*]|[^\s+\-*]+")
+
+
+class ParseError(ValueError):
+    def __init__(self, message, filename="<string>", line=0, column=0):
+        super().__init__(f"{filename}:{line}:{column}: {message}")
+        self.filename = filename
+        self.line = line
+        self.column = column
+
+
+class _Variable:
+    """Переменная в процессе разбора."""
+
+    def __init__(self, name):
+        self.name = name
+        self.universe = []
+        self.term_names = []
+        self.index = {}
+        self.terms = []
+        self.params = []
+
+
+class _Parser:
+    def __init__(self, filename):
+        self.filename = filename
+        self.variables = {}
+        self.order = []
+        self.rules = []
+        self.given = {}
+        # Строки «Пусть» по переменным: (номер, текст) — для сообщений об ошибках
+        self.given_lines = {}
+        self.output = None
+        self.mode = "mamdani"
+
+    def error(self, message, number, line, token=None):
+        column = 1
+        if token is not None:
+            for match in _TOKEN.finditer(line):
+                if match.group() == token:
+                    column = match.start() + 1
+                    break
+        return ParseError(message, self.filename, number, column)
+
+    def numbers(self, number, line):
+        try:
+            return [float(x) for x in line.split()]
+        except ValueError:
+            for token in line.split():
+                try:
+                    float(token)
+                except ValueError:
+                    raise self.error(f"ожидалось число, получено {token!r}", number, line, token)
+            raise
+
+    def universe_points(self, number, line, variable):
+        """
+        Добавляет точки множества определения; они должны строго возрастать
+        (fuzzify и интерполяция ищут точки двоичным поиском).
+        """
+        values = self.numbers(number, line)
+        previous = variable.universe[-1] if variable.universe else -np.inf
+        for match, value in zip(_TOKEN.finditer(line), values):
+            if not value > previous:
+                raise ParseError(
+                    f"точки множества определения {variable.name!r} должны строго возрастать: "
+                    f"{value:g} после {previous:g}",
+                    self.filename,
+                    number,
+                    match.start() + 1,
+                )
+            previous = value
+        variable.universe.extend(values)
+
+    def parse(self, lines):
+        expect = None  # что должна содержать следующая значимая строка
+        current = None
+        for number, raw in enumerate(lines, start=1):
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            if expect is not None:
+                kind, target, header = expect
+                if kind == "term":
+                    self.term_values(number, line, current, target, header)
+                    expect = None
+                    continue
+                if kind == "given":
+                    values = self.numbers(number, line)
+                    if len(values) != len(target.universe):
+                        raise self.error(
+                            f"для {target.name} ожидалось {len(target.universe)} значений, "
+                            f"получено {len(values)}",
+                            number,
+                            line,
+                        )
+                    self.given[target.name] = values
+                    expect = None
+                    continue
+                # Точки множества определения: одна или несколько числовых строк
+                if line[0].isdigit() or line[0] in "-+.":
+                    self.universe_points(number, line, current)
+                    continue
+                expect = None
+
+            if line.startswith(UNIVERSE):
+                name = line[len(UNIVERSE) :].strip()
+                if not name:
+                    raise self.error("не указано имя переменной", number, line)
+                if name in self.variables:
+                    raise self.error(f"переменная {name!r} объявлена повторно", number, line)
+                current = self.variables[name] = _Variable(name)
+                self.order.append(name)
+                expect = ("universe", current, number)
+            elif line.startswith(TERM):
+                if current is None:
+                    raise self.error("нечеткое множество вне множества определения", number, line)
+                name = line[len(TERM) :].strip()
+                if name in current.index:
+                    raise self.error(f"терм {name!r} объявлен повторно", number, line)
+                expect = ("term", name, number)
+            elif line.startswith(RULE):
+                self.rule(number, line)
+            elif line.startswith(MODE):
+                name = line[len(MODE) :].strip()
+                if name not in MODES:
+                    raise self.error(
+                        f"неизвестный режим вывода {name!r}, доступны: {', '.join(MODES)}",
+                        number,
+                        line,
+                    )
+                if self.rules:
+                    raise self.error("режим вывода задается до правил", number, line)
+                self.mode = MODES[name]
+            elif line.startswith(GIVEN):
+                name = line[len(GIVEN) :].strip()
+                if name not in self.variables:
+                    raise self.error(f"неизвестная переменная {name!r}", number, line, name.split()[0] if name else None)
+                expect = ("given", self.variables[name], number)
+                self.given_lines[name] = (number, line)
+            else:
+                raise self.error(f"неизвестная конструкция {line.split()[0]!r}", number, line, line.split()[0])
+
+        if expect is not None and expect[0] != "universe":
+            raise ParseError("неожиданный конец файла", self.filename, expect[2], 1)
+        return self.build()
+
+    def term_values(self, number, line, variable, name, header):
+        size = len(variable.universe)
+        first = line.split()[0]
+        params = None
+        if first in membership.MEMBERSHIP_FUNCTIONS:
+            try:
+                params = membership.parse_membership(line)
+            except ValueError as error:
+                raise self.error(str(error), number, line, first) from None
+            values = membership.evaluate(*params, variable.universe).tolist()
+        else:
+            values = self.numbers(number, line)
+            if len(values) > size:
+                raise self.error(
+                    f"терм {name!r}: {len(values)} значений при |U| = {size}", number, line
+                )
+            values += [0.0] * (size - len(values))
+        variable.index[name] = len(variable.term_names)
+        variable.term_names.append(name)
+        variable.terms.append(values)
+        variable.params.append(params)
+
+    def clause(self, number, line, tokens, start, stop):
+        """Разбирает «<переменная> <терм ...>» из tokens[start:stop]."""
+        if start >= stop:
+            raise self.error("пустое условие", number, line, tokens[start - 1] if start else None)
+        variable = self.variables.get(tokens[start])
+        if variable is None:
+            raise self.error(f"неизвестная переменная {tokens[start]!r}", number, line, tokens[start])
+        term = " ".join(tokens[start + 1 : stop])
+        index = variable.index.get(term)
+        if index is None:
+            raise self.error(
+                f"у переменной {variable.name!r} нет терма {term!r}",
+                number,
+                line,
+                tokens[start + 1] if start + 1 < stop else tokens[start],
+            )
+        return variable.name, index
+
+    def rule(self, number, line):
+        tokens = line.split()
+        try:
+            then = tokens.index("то")
+        except ValueError:
+            raise self.error("в правиле нет «то»", number, line) from None
+
+        conditions = {}
+        connective = None
+        start = 1
+        for position in range(1, then + 1):
+            token = tokens[position]
+            if position == then or token in CONNECTIVES:
+                name, index = self.clause(number, line, tokens, start, position)
+                if name in conditions:
+                    raise self.error(f"переменная {name!r} дважды в условии", number, line, name)
+                conditions[name] = index
+                if position != then:
+                    if connective is not None and CONNECTIVES[token] != connective:
+                        raise self.error("смешанные связки «и»/«или» в правиле", number, line, token)
+                    connective = CONNECTIVES[token]
+                start = position + 1
+
+        linear = len(tokens) > then + 2 and tokens[then + 2] == "="
+        if linear != (self.mode == "sugeno"):
+            message = (
+                "линейное следствие допустимо только после «Вывод Сугено»"
+                if linear
+                else "в режиме Сугено следствие записывается как «<переменная> = <выражение>»"
+            )
+            raise self.error(message, number, line, "то")
+        if linear:
+            output = tokens[then + 1]
+            consequent = self.linear(number, line, tokens[then + 3 :], output)
+        else:
+            output, consequent = self.clause(number, line, tokens, then + 1, len(tokens))
+        if self.output is None:
+            self.output = output
+        elif output != self.output:
+            raise self.error(
+                f"выходная переменная {output!r}, ранее была {self.output!r}", number, line, output
+            )
+        if output in conditions:
+            raise self.error(f"выходная переменная {output!r} в условии", number, line, output)
+        self.rules.append((conditions, connective or 0, consequent))
+
+    def linear(self, number, line, tokens, output):
+        """
+        Разбирает «[±] [число] [*] [переменная] ...» в словарь
+        {переменная: коэффициент} и свободный член.
+        """
+        coefficients = {}
+        constant = 0.0
+        items = _LINEAR_TOKEN.findall(" ".join(tokens))
+        if not items:
+            raise self.error("пустое линейное следствие", number, line, "=")
+        position = 0
+        while position < len(items):
+            sign = 1.0
+            while position < len(items) and items[position] in "+-":
+                sign = -sign if items[position] == "-" else sign
+                position += 1
+            factor, name = None, None
+            if position < len(items) and items[position][0] in "0123456789.":
+                factor = float(items[position])
+                position += 1
+                if position < len(items) and items[position] == "*":
+                    position += 1
+            if position < len(items) and items[position] not in "+-*":
+                name = items[position]
+                position += 1
+            if factor is None and name is None:
+                token = items[position] if position < len(items) else items[-1]
+                raise self.error(f"ожидалось число или переменная, получено {token!r}", number, line, token)
+            value = sign * (1.0 if factor is None else factor)
+            if name is None:
+                constant += value
+                continue
+            if name not in self.variables or name == output:
+                raise self.error(f"неизвестная входная переменная {name!r}", number, line, name)
+            coefficients[name] = coefficients.get(name, 0.0) + value
+        return coefficients, constant
+
+    def build(self):
+        if not self.order:
+            raise ParseError("не объявлено ни одного множества определения", self.filename)
+        output_name = self.output or self.order[-1]
+        input_names = [name for name in self.order if name != output_name]
+
+        def variable(name):
+            v = self.variables.get(name)
+            if v is None:
+                # Выход модели Сугено: нечетких множеств у него нет
+                return Variable(name, [], [], [])
+            return Variable(v.name, v.universe, v.term_names, v.terms, v.params)
+
+        rules = np.full((len(self.rules), len(input_names)), -1, dtype=np.int32)
+        position = {name: k for k, name in enumerate(input_names)}
+        for r, (conditions, _, _) in enumerate(self.rules):
+            for name, index in conditions.items():
+                rules[r, position[name]] = index
+        connectives = np.array([c for _, c, _ in self.rules], dtype=np.int8)
+        coefficients = None
+        if self.mode == "sugeno":
+            consequents = np.full(len(self.rules), -1, dtype=np.int32)
+            coefficients = np.zeros((len(self.rules), len(input_names) + 1))
+            for r, (_, _, (linear, constant)) in enumerate(self.rules):
+                for name, value in linear.items():
+                    coefficients[r, position[name]] = value
+                coefficients[r, -1] = constant
+        else:
+            consequents = np.array([c for _, _, c in self.rules], dtype=np.int32)
+        if output_name in self.given_lines:
+            number, line = self.given_lines[output_name]
+            raise self.error(
+                f"«{GIVEN}» для выходной переменной {output_name!r}", number, line, output_name
+            )
+        missing = [name for name in input_names if name not in self.given]
+        if self.given and missing:
+            # Входы модели задаются либо все, либо ни одного
+            number, line = min(self.given_lines.values())
+            raise self.error(
+                f"«{GIVEN}» задано не для всех входов, нет: {', '.join(missing)}", number, line
+            )
+        given = [self.given[name] for name in input_names if name in self.given]
+        return FuzzyModel(
+            [variable(name) for name in input_names],
+            variable(output_name),
+            rules,
+            consequents,
+            given,
+            connectives,
+            coefficients,
+        )
+
+
+@profiling.profiled("parse")
+def parse_lines(lines, filename="<string>"):
+    return _Parser(filename).parse(lines)
+
+
+def parse_file(filename):
+    """Разбирает файл базы правил и возвращает FuzzyModel."""
+    with open(filename, "r", encoding="utf-8") as file:
+        return parse_lines(file, filename)
+
+
+def _number_text(value):
+    """Кратчайшая запись числа, из которой float читает то же самое значение."""
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _numbers_text(values):
+    return " ".join(_number_text(value) for value in values)
+
+
+def linear_text(model, coefficients):
+    """Линейное следствие правила Сугено в записи конфигурации."""
+    parts = [
+        f"{_number_text(value)} {var.name}"
+        for var, value in zip(model.inputs, coefficients[:-1])
+        if value
+    ]
+    if coefficients[-1] or not parts:
+        parts.append(_number_text(coefficients[-1]))
+    return " + ".join(parts).replace("+ -", "- ")
+
+
+def rule_text(model, rule):
+    """Правило с номером rule в записи конфигурации."""
+    words = {index: word for word, index in CONNECTIVES.items()}
+    conditions = [
+        f"{var.name} {var.term_names[t]}"
+        for var, t in zip(model.inputs, model.rules[rule].tolist())
+        if t >= 0
+    ]
+    if model.mode == "sugeno":
+        consequent = f"{model.output.name} = {linear_text(model, model.coefficients[rule])}"
+    else:
+        consequent = f"{model.output.name} {model.output.term_names[model.consequents[rule]]}"
+    connective = f" {words[int(model.connectives[rule])]} "
+    return f"{RULE} {connective.join(conditions)} то {consequent}"
+
+
+def format_model(model):
+    """Текст базы правил в формате, который читает parse_lines."""
+    lines = []
+    if model.mode == "sugeno":
+        lines += [f"{MODE} Сугено", ""]
+    variables = model.inputs + ([model.output] if len(model.output.universe) else [])
+    for variable in variables:
+        lines += [f"{UNIVERSE} {variable.name}", _numbers_text(variable.universe)]
+        for name, values, params in zip(variable.term_names, variable.terms, variable.params):
+            lines.append(f"{TERM} {name}")
+            if params is not None:
+                lines.append(f"{params[0]} {_numbers_text(params[1])}")
+            else:
+                lines.append(_numbers_text(values))
+        lines.append("")
+
+    lines += [rule_text(model, r) for r in range(model.num_rules)]
+
+    if model.given:
+        lines.append("")
+    for variable, given in zip(model.inputs, model.given):
+        lines += [f"{GIVEN} {variable.name}", _numbers_text(given)]
+    return "\n".join(lines) + "\n"
+
+
+def write_model(model, filename):
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(format_model(model))
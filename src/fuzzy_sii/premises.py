@@ -0,0 +1,86 @@
+"""
+Уровни истинности предпосылок для любого числа входов.
+
+Для каждого входа v степени соответствия наблюдения всем термам
+вычисляются одной max-min сверткой (N, термы_v), затем выбираются по
+таблице правил в матрицу (N, правила, входы) и сворачиваются t-нормой
+для правил со связкой «и» или s-нормой для правил со связкой «или».
+Стоимость линейна по правилам × входам.
+"""
+import numpy as np
+
+from . import profiling
+from .composition import MAX_ELEMENTS
+
+AND = 0
+OR = 1
+
+CONNECTIVES = {"и": AND, "или": OR}
+
+TNORMS = {
+    "min": lambda m: m.min(axis=-1),
+    "product": lambda m: m.prod(axis=-1),
+}
+
+SNORMS = {
+    "max": lambda m: m.max(axis=-1),
+    "probsum": lambda m: 1.0 - (1.0 - m).prod(axis=-1),
+}
+
+
+def term_degrees(variable, given):
+    """max-min степени соответствия входов (N, |U|) всем термам: (N, термы)."""
+    given = np.atleast_2d(np.asarray(given, dtype=float))
+    return np.minimum(given[:, None, :], variable.terms[None]).max(axis=2)
+
+
+def premise_matrix(model, degrees):
+    """
+    Матрица (N, правила, входы) степеней выполнения условий. Для входов,
+    не упомянутых в правиле, подставляется нейтральный элемент связки:
+    1 для «и», 0 для «или».
+    """
+    rules = model.rules
+    n = len(degrees[0])
+    matrix = np.empty((n, len(rules), len(model.inputs)))
+    absent = rules < 0
+    neutral = np.where(model.connectives == OR, 0.0, 1.0)
+    for var, var_degrees in enumerate(degrees):
+        matrix[:, :, var] = var_degrees[:, rules[:, var]]
+        matrix[:, absent[:, var], var] = neutral[absent[:, var]]
+    return matrix
+
+
+@profiling.profiled("premises")
+def premise_levels(
+    model, givens, tnorm="min", snorm="max", max_elements=MAX_ELEMENTS, degrees=None
+):
+    """
+    Уровни истинности предпосылок всех правил.
+
+    Parameters:
+    - givens: список массивов (N, |U_v|) по каждому входу.
+    - tnorm: "min" или "product" для связки «и».
+    - snorm: "max" или "probsum" для связки «или».
+    - degrees: уже вычисленные term_degrees по каждому входу (givens тогда
+      не используются).
+
+    Returns: массив (N, правила).
+    """
+    if degrees is None:
+        degrees = [term_degrees(var, given) for var, given in zip(model.inputs, givens)]
+    n = len(degrees[0])
+    is_or = model.connectives == OR
+    levels = np.empty((n, model.num_rules))
+    rows = max(1, max_elements // max(1, model.rules.size))
+    for start in range(0, n, rows):
+        chunk = [d[start : start + rows] for d in degrees]
+        matrix = premise_matrix(model, chunk)
+        result = TNORMS[tnorm](matrix)
+        if is_or.any():
+            result[:, is_or] = SNORMS[snorm](matrix[:, is_or])
+        levels[start : start + rows] = result
+    if profiling.enabled():
+        profiling.count("rules_fired", int(np.count_nonzero(levels)))
+        profiling.count("cells_computed", levels.size * len(model.inputs))
+    return levels
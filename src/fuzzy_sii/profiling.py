@@ -0,0 +1,234 @@
+"""
+Инструментирование конвейера вывода.
+
+Стадии размечаются декоратором profiled (именованные интервалы) и
+счетчиками count. Пока приемник не установлен, обертка profiled сразу
+вызывает функцию, а count сразу выходит, так что отключенная разметка
+стоит одной проверки глобальной переменной. Вложенные интервалы
+получают составное имя «внешний/внутренний».
+
+Приемники: HistogramSink (гистограммы длительностей в памяти) и
+JsonLogSink (по строке JSON на событие). Точки входа командной строки
+вызывают configure_from_env, импорт модуля ничего не настраивает:
+FUZZY_PROFILE=1 — гистограммы стадий в stderr при выходе,
+FUZZY_PROFILE=путь — JSON-журнал в файл, FUZZY_DEBUG=1 — печатать
+промежуточные матрицы.
+"""
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+_sink = None
+_debug = False
+_local = threading.local()
+
+
+class _Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.path = "/".join(stack)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _local.stack.pop()
+        sink = _sink
+        if sink is not None:
+            sink.record_span(self.path, elapsed, self.attrs)
+        return False
+
+
+def profiled(name):
+    """Декоратор: вызов функции замеряется как стадия name."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, value=1):
+    """Увеличивает счетчик name (правила, ячейки, байты и т.п.)."""
+    sink = _sink
+    if sink is not None:
+        stack = getattr(_local, "stack", None)
+        sink.record_count(f"{'/'.join(stack)}:{name}" if stack else name, value)
+
+
+def enabled():
+    return _sink is not None
+
+
+def set_sink(sink):
+    """Устанавливает приемник событий (None — отключить) и возвращает прежний."""
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def get_sink():
+    return _sink
+
+
+def set_debug(flag):
+    global _debug
+    _debug = bool(flag)
+
+
+def debug_enabled():
+    return _debug
+
+
+class HistogramSink:
+    """
+    Гистограммы длительностей по стадиям: корзины по степеням двойки
+    микросекунд, плюс число вызовов, сумма и максимум; суммы счетчиков.
+    """
+
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def record_span(self, name, seconds, attrs):
+        bucket = max(0, math.ceil(math.log2(max(seconds * 1e6, 1.0))))
+        with self._lock:
+            stats = self.spans.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "buckets": {}})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["buckets"][bucket] = stats["buckets"].get(bucket, 0) + 1
+
+    def record_count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @staticmethod
+    def _quantile(stats, q):
+        """Верхняя граница корзины, в которую попадает квантиль q, в секундах."""
+        target = q * stats["count"]
+        seen = 0
+        for bucket in sorted(stats["buckets"]):
+            seen += stats["buckets"][bucket]
+            if seen >= target:
+                return min(2.0**bucket / 1e6, stats["max"])
+        return stats["max"]
+
+    def summary(self):
+        spans = {
+            name: {
+                "count": stats["count"],
+                "total": stats["total"],
+                "mean": stats["total"] / stats["count"],
+                "p50": self._quantile(stats, 0.5),
+                "p99": self._quantile(stats, 0.99),
+                "max": stats["max"],
+            }
+            for name, stats in self.spans.items()
+        }
+        return {"spans": spans, "counters": dict(self.counters)}
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        summary = self.summary()
+        for name, s in sorted(summary["spans"].items()):
+            print(
+                f"{name:<40} n={s['count']:<7} всего={s['total'] * 1e3:10.3f} мс "
+                f"p50≤{s['p50'] * 1e6:.0f} мкс p99≤{s['p99'] * 1e6:.0f} мкс",
+                file=file,
+            )
+        for name, value in sorted(summary["counters"].items()):
+            print(f"{name:<40} {value}", file=file)
+
+
+class JsonLogSink:
+    """Пишет каждое событие строкой JSON в файл или поток."""
+
+    def __init__(self, target):
+        self._own = isinstance(target, str)
+        self.file = open(target, "a", encoding="utf-8") if self._own else target
+        self._lock = threading.Lock()
+
+    def _write(self, event):
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            self.file.write(line + "\n")
+
+    def record_span(self, name, seconds, attrs):
+        self._write({"type": "span", "name": name, "seconds": seconds, "time": time.time(), **attrs})
+
+    def record_count(self, name, value):
+        self._write({"type": "count", "name": name, "value": value})
+
+    def flush(self):
+        with self._lock:
+            self.file.flush()
+
+    def close(self):
+        if self._own:
+            with self._lock:
+                self.file.close()
+        else:
+            self.flush()
+
+
+class MultiSink:
+    """Передает события нескольким приемникам."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def record_span(self, name, seconds, attrs):
+        for sink in self.sinks:
+            sink.record_span(name, seconds, attrs)
+
+    def record_count(self, name, value):
+        for sink in self.sinks:
+            sink.record_count(name, value)
+
+
+# Значения переменных окружения, которые включают или выключают режим,
+# а не задают путь
+ON = ("1", "true", "yes", "on")
+OFF = ("", "0", "false", "no", "off")
+
+
+def configure_from_env(environ=os.environ, debug=False):
+    """
+    Настраивает приемник и уровень отладки по FUZZY_PROFILE и FUZZY_DEBUG.
+    debug — уровень отладки, если FUZZY_DEBUG не задана. Приемник
+    закрывается (гистограммы печатаются) при выходе из процесса.
+    Возвращает установленный приемник или None.
+    """
+    value = environ.get("FUZZY_PROFILE", "").strip()
+    sink = None
+    if value.lower() in ON:
+        sink = HistogramSink()
+        atexit.register(sink.report)
+    elif value.lower() not in OFF:
+        sink = JsonLogSink(value)
+        atexit.register(sink.close)
+    if sink is not None:
+        set_sink(sink)
+    set_debug(environ.get("FUZZY_DEBUG", "1" if debug else "0").strip().lower() not in OFF)
+    return sink
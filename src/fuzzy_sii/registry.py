@@ -0,0 +1,514 @@
+"""
+Реестр многих баз правил в одном процессе.
+
+Массивы моделей (множества определения, матрицы термов, таблица
+правил, начальные входы) хранятся в общем пуле ArrayPool: каждый
+уникальный по содержимому массив записывается один раз в .npy на tmpfs
+(/dev/shm) и открывается через memory map только для чтения. Одинаковые
+множества определения и термы разных баз правил поэтому занимают память
+один раз, а рабочие процессы открывают те же файлы (как в
+fuzzy_sii.parallel) и делят с основным процессом одни и те же страницы.
+Единица разделения — массив целиком: матрица термов переменной делится,
+только если совпадают все ее термы. Механизмы вывода работают с матрицей
+(термы, |U|) одним блоком, и сборка ее из отдельно хранимых строк дала
+бы собственную копию в каждой модели.
+
+ModelRegistry загружает базы по имени при первом обращении и учитывает
+память каждой: общие массивы, массивы, нужные только ей, и собственные
+структуры механизма вывода. Если резидентная память превышает max_bytes
+или моделей больше max_models, выгружаются давно не использованные;
+при следующем запросе модель снова читается из скомпилированного
+артефакта.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.registry config_many.txt config_sugeno.txt --max-mb 64
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from . import profiling, storage
+from .compiled import cache_path, compile_file, load_compiled, source_hash
+from .hotreload import ModelVersion
+from .inference import METHODS, Predictor, default_method
+from .model import FuzzyModel, Variable
+
+SHARED_DIR = "/dev/shm"
+
+# Модели, подключенные в рабочем процессе: {хеш модели: Predictor}
+_attached = OrderedDict()
+WORKER_MODELS = 16
+
+
+def array_key(array):
+    """Ключ массива по содержимому: одинаковые данные дают одинаковый ключ."""
+    digest = hashlib.sha256(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()[:32]
+
+
+def open_shared(directory, ref):
+    """Массив пула по ссылке (ключ, dtype, форма); пустые массивы не хранятся."""
+    key, dtype, shape = ref
+    if key is None:
+        return np.empty(shape, dtype=dtype)
+    return storage.open_array(os.path.join(directory, f"{key}.npy"))
+
+
+class ArrayPool:
+    """Массивы только для чтения, общие для всех моделей, со счетчиком ссылок."""
+
+    def __init__(self, directory=None):
+        parent = SHARED_DIR if os.path.isdir(SHARED_DIR) else None
+        self.directory = directory or tempfile.mkdtemp(prefix="fuzzy-registry-", dir=parent)
+        self._arrays = {}
+        self._refs = {}
+        # Каталог удаляется и при выходе из процесса без явного close()
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    def intern(self, array):
+        """Возвращает (ссылку, массив пула) с тем же содержимым, что и array."""
+        array = np.asarray(array)
+        if array.size == 0:
+            return (None, array.dtype.str, array.shape), array
+        key = array_key(array)
+        shared = self._arrays.get(key)
+        if shared is None:
+            path = os.path.join(self.directory, f"{key}.npy")
+            out = storage.allocate(array.shape, array.dtype, path)
+            out[...] = array
+            out.flush()
+            del out
+            shared = self._arrays[key] = storage.open_array(path)
+        self._refs[key] = self._refs.get(key, 0) + 1
+        return (key, array.dtype.str, array.shape), shared
+
+    def release(self, key):
+        if key is None:
+            return
+        self._refs[key] -= 1
+        if self._refs[key] == 0:
+            # Уже открытые memory map остаются действительными и после удаления файла
+            del self._refs[key], self._arrays[key]
+            os.remove(os.path.join(self.directory, f"{key}.npy"))
+
+    def refs(self, key):
+        return self._refs.get(key, 0)
+
+    def array_nbytes(self, key):
+        return self._arrays[key].nbytes if key in self._arrays else 0
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def close(self):
+        self._arrays.clear()
+        self._refs.clear()
+        self._cleanup()
+
+
+def share_model(model, pool):
+    """
+    Переносит массивы модели в пул.
+
+    Returns: (модель на массивах пула, описание модели для рабочих
+    процессов, список ключей пула).
+    """
+    refs = []
+
+    def put(array):
+        ref, shared = pool.intern(array)
+        refs.append(ref[0])
+        return ref, shared
+
+    def variable(var):
+        universe_ref, universe = put(var.universe)
+        terms_ref, terms = put(var.terms)
+        shared = Variable(var.name, universe, var.term_names, terms, var.params)
+        info = {
+            "name": var.name,
+            "terms": var.term_names,
+            "params": var.params,
+            "universe": universe_ref,
+            "matrix": terms_ref,
+        }
+        return shared, info
+
+    inputs, input_infos = zip(*(variable(var) for var in model.inputs))
+    output, output_info = variable(model.output)
+    given_refs, given = zip(*(put(g) for g in model.given)) if model.given else ((), ())
+    rules_ref, rules = put(model.rules)
+    consequents_ref, consequents = put(model.consequents)
+    connectives_ref, connectives = put(model.connectives)
+    coefficients_ref, coefficients = (
+        put(model.coefficients) if model.coefficients is not None else (None, None)
+    )
+    shared = FuzzyModel(inputs, output, rules, consequents, given, connectives, coefficients)
+    descriptor = {
+        "inputs": list(input_infos),
+        "output": output_info,
+        "given": list(given_refs),
+        "rules": rules_ref,
+        "consequents": consequents_ref,
+        "connectives": connectives_ref,
+        "coefficients": coefficients_ref,
+    }
+    return shared, descriptor, refs
+
+
+def attach_model(directory, descriptor):
+    """Модель по описанию share_model: все массивы открываются из пула без копирования."""
+
+    def variable(info):
+        return Variable(
+            info["name"],
+            open_shared(directory, info["universe"]),
+            info["terms"],
+            open_shared(directory, info["matrix"]),
+            info["params"],
+        )
+
+    coefficients = descriptor["coefficients"]
+    return FuzzyModel(
+        [variable(info) for info in descriptor["inputs"]],
+        variable(descriptor["output"]),
+        open_shared(directory, descriptor["rules"]),
+        open_shared(directory, descriptor["consequents"]),
+        [open_shared(directory, ref) for ref in descriptor["given"]],
+        open_shared(directory, descriptor["connectives"]),
+        open_shared(directory, coefficients) if coefficients is not None else None,
+    )
+
+
+def private_nbytes(obj, seen=None):
+    """
+    Память массивов, принадлежащих только объекту (матрицы отношения,
+    индексы и т. п.); массивы пула (memory map) не учитываются.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.memmap):
+        return 0
+    if isinstance(obj, np.ndarray):
+        if obj.base is not None:
+            return private_nbytes(obj.base, seen)
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(private_nbytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(private_nbytes(item, seen) for item in obj)
+    if type(obj).__module__.startswith(__package__) and hasattr(obj, "__dict__"):
+        return private_nbytes(vars(obj), seen)
+    return 0
+
+
+class _Entry:
+    def __init__(self, version, descriptor, refs, private):
+        self.version = version
+        self.descriptor = descriptor
+        self.refs = refs
+        self.private = private
+        self.hits = 0
+        # Незавершенные задачи рабочих процессов, которым нужны файлы пула
+        self.pinned = 0
+        # Модель выгружена, но файлы пула освобождаются после задач
+        self.unloaded = False
+
+
+class ModelRegistry:
+    """
+    Базы правил по именам с общим пулом массивов и LRU-выгрузкой.
+
+    max_bytes — предел резидентной памяти (пул и собственные структуры
+    моделей), max_models — предел числа загруженных моделей; None —
+    без ограничения. Только что запрошенная модель не выгружается, даже
+    если одна превышает предел.
+    """
+
+    def __init__(
+        self,
+        configs=(),
+        max_bytes=None,
+        max_models=None,
+        method=None,
+        implication_name="mamdani",
+        directory=None,
+        defuzzifier="centroid",
+        fallback=np.nan,
+    ):
+        self.pool = ArrayPool(directory)
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        self.method = method
+        self.implication_name = implication_name
+        self.defuzzifier = defuzzifier
+        self.fallback = fallback
+        self.paths = {}
+        # Артефакт и хеш исходного файла первой загрузки: {имя: (путь, хеш)}
+        self.artifacts = {}
+        self.loads = {}
+        self.evictions = 0
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+        for name, path in configs:
+            self.register(name, path)
+
+    def register(self, name, path):
+        """Добавляет базу правил; загружается она только при первом запросе."""
+        self.paths[name] = path
+
+    def get(self, name):
+        """Текущая версия модели (ModelVersion); загружает и выгружает по необходимости."""
+        with self._lock:
+            return self._acquire(name).version
+
+    def _acquire(self, name):
+        entry = self._resident.get(name)
+        if entry is None:
+            entry = self._resident[name] = self._load(name)
+            self._evict(keep=name)
+        self._resident.move_to_end(name)
+        entry.hits += 1
+        return entry
+
+    def _load(self, name):
+        if name not in self.paths:
+            raise ValueError(f"неизвестная модель {name!r}")
+        path = self.paths[name]
+        if name in self.artifacts:
+            artifact, digest = self.artifacts[name]
+        else:
+            digest = source_hash(path)
+            artifact = cache_path(path, digest)
+        if not os.path.exists(artifact):
+            # Артефакт удален (например, перекомпиляцией измененного файла):
+            # собрать его заново можно, только если исходный файл тот же
+            if name in self.artifacts and (
+                not os.path.exists(path) or source_hash(path) != digest
+            ):
+                raise ValueError(
+                    f"модель {name!r} выгружена, а ее артефакт {artifact} удален "
+                    f"и файл {path} удален или изменился"
+                )
+            artifact = compile_file(path)
+        model, digest = load_compiled(artifact)
+        self.artifacts[name] = (artifact, digest)
+        model, descriptor, refs = share_model(model, self.pool)
+        predictor = Predictor(
+            model,
+            self.method or default_method(model),
+            self.implication_name,
+            defuzzifier=self.defuzzifier,
+            fallback=self.fallback,
+        )
+        self.loads[name] = self.loads.get(name, 0) + 1
+        # Повторная загрузка дает ту же модель, поэтому номер версии не меняется
+        version = ModelVersion(1, digest, model, predictor)
+        return _Entry(version, descriptor, refs, private_nbytes(predictor))
+
+    def _over_limit(self):
+        if self.max_models is not None and len(self._resident) > self.max_models:
+            return True
+        return self.max_bytes is not None and self.resident_nbytes > self.max_bytes
+
+    def _evict(self, keep):
+        # Обход от давно не использованных; модели с задачами в рабочих процессах
+        # не выгружаются, пока задачи не завершатся
+        for name in list(self._resident):
+            if not self._over_limit():
+                break
+            if name != keep and not self._resident[name].pinned:
+                self.unload(name)
+                self.evictions += 1
+
+    def unload(self, name):
+        """
+        Выгружает модель; запросы, уже получившие ее версию, завершаются на
+        ней. Если у модели есть незавершенные задачи рабочих процессов, ее
+        файлы пула освобождаются только после завершения последней из них.
+        """
+        entry = self._resident.pop(name, None)
+        if entry is not None:
+            entry.unloaded = True
+            if not entry.pinned:
+                self._release(entry)
+
+    def _release(self, entry):
+        for key in entry.refs:
+            self.pool.release(key)
+        entry.refs = []
+
+    @property
+    def resident_nbytes(self):
+        return self.pool.nbytes + sum(entry.private for entry in self._resident.values())
+
+    def predict(self, name, givens):
+        """(выходы, четкие значения) модели name для функций принадлежности входов."""
+        return self.get(name).predictor(givens)
+
+    def submit(self, executor, name, matrix):
+        """
+        Отправляет матрицу наблюдений (N, столбцы) модели name в пул
+        процессов; рабочий процесс открывает массивы модели из пула.
+        Возвращает Future с четкими значениями.
+        """
+        with self._lock:
+            entry = self._acquire(name)
+            entry.pinned += 1
+        # fallback передается строкой: nan != nan, и ключ с ним не нашелся бы в _attached
+        key = (
+            entry.version.digest,
+            entry.version.predictor.method,
+            self.implication_name,
+            self.defuzzifier,
+            repr(self.fallback),
+        )
+        future = executor.submit(_run, self.pool.directory, key, entry.descriptor, matrix)
+        future.add_done_callback(lambda _: self._unpin(entry))
+        return future
+
+    def _unpin(self, entry):
+        with self._lock:
+            entry.pinned -= 1
+            if entry.unloaded and not entry.pinned:
+                self._release(entry)
+
+    def handle(self, name):
+        return RegistryHandle(self, name)
+
+    def stats(self):
+        """Память и обращения по моделям, байты."""
+        with self._lock:
+            models = {}
+            for name, entry in self._resident.items():
+                shared = sum(self.pool.array_nbytes(key) for key in set(entry.refs) if key)
+                unique = sum(
+                    self.pool.array_nbytes(key)
+                    for key in set(entry.refs)
+                    if key and self.pool.refs(key) == entry.refs.count(key)
+                )
+                models[name] = {
+                    "shared": shared,
+                    "unique": unique,
+                    "private": entry.private,
+                    "hits": entry.hits,
+                    "loads": self.loads[name],
+                }
+            referenced = sum(
+                self.pool.array_nbytes(key)
+                for entry in self._resident.values()
+                for key in set(entry.refs)
+                if key
+            )
+            return {
+                "models": models,
+                "registered": len(self.paths),
+                "pool_arrays": len(self.pool),
+                "pool": self.pool.nbytes,
+                "without_sharing": referenced,
+                "resident": self.resident_nbytes,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            self._resident.clear()
+            self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RegistryHandle:
+    """Модель реестра в интерфейсе ModelHandle (для fuzzy_sii.server)."""
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.path = registry.paths[name]
+
+    @property
+    def current(self):
+        return self.registry.get(self.name)
+
+    @property
+    def version(self):
+        # Без загрузки: выгруженная модель не возвращается в память ради списка моделей
+        return 1 if self.name in self.registry.artifacts else 0
+
+
+def _run(directory, key, descriptor, matrix):
+    from .parallel import split_matrix
+
+    predictor = _attached.get(key)
+    if predictor is None:
+        model = attach_model(directory, descriptor)
+        digest, method, implication_name, defuzzifier, fallback = key
+        predictor = _attached[key] = Predictor(
+            model, method, implication_name, defuzzifier=defuzzifier, fallback=float(fallback)
+        )
+        while len(_attached) > WORKER_MODELS:
+            _attached.popitem(last=False)
+    _attached.move_to_end(key)
+    return predictor(split_matrix(matrix, predictor.model))[1]
+
+
+def _format_bytes(count):
+    for unit in ("Б", "КБ", "МБ"):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == "Б" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} ГБ"
+
+
+def main(argv=None):
+    from .server import parse_configs
+
+    parser = argparse.ArgumentParser(description="Загрузка баз правил в общий реестр")
+    parser.add_argument("configs", nargs="+", help="базы правил: путь или имя=путь")
+    parser.add_argument("--max-mb", type=float, default=None, help="предел резидентной памяти")
+    parser.add_argument("--max-models", type=int, default=None)
+    parser.add_argument("--method", choices=METHODS, default=None)
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+
+    configs = parse_configs(args.configs)
+    max_bytes = args.max_mb * 2**20 if args.max_mb is not None else None
+    with ModelRegistry(configs, max_bytes, args.max_models, args.method) as registry:
+        for name, _ in configs:
+            registry.get(name)
+        stats = registry.stats()
+        print(f"{'Модель':<24} {'общие':>10} {'только свои':>12} {'механизм':>10}")
+        for name, info in stats["models"].items():
+            print(
+                f"{name:<24} {_format_bytes(info['shared']):>10} "
+                f"{_format_bytes(info['unique']):>12} {_format_bytes(info['private']):>10}"
+            )
+        print(
+            f"\nМоделей {len(stats['models'])} из {stats['registered']}, "
+            f"выгружено {stats['evictions']}"
+        )
+        print(
+            f"Пул: {stats['pool_arrays']} массивов, {_format_bytes(stats['pool'])} "
+            f"(без общего пула {_format_bytes(stats['without_sharing'])}), "
+            f"всего резидентно {_format_bytes(stats['resident'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
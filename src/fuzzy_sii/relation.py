@@ -0,0 +1,88 @@
+"""
+Скомпилированное агрегированное отношение R = max_r R_r.
+
+Для каждой ячейки хранится число правил, на которых достигается
+максимум. Добавление правила обновляет матрицу за O(|A|·|B|), удаление
+пересчитывает только те ячейки, где удаленное правило было единственным
+источником максимума. Сами правила хранятся векторами условия и
+следствия, а их матрицы при пересчете восстанавливаются только в нужных
+ячейках.
+"""
+import numpy as np
+
+from . import composition, implication
+
+
+class CompiledRelation:
+    def __init__(self, size_a, size_b, implication_name="mamdani"):
+        self.implication = implication.get_implication(implication_name)
+        self.matrix = np.zeros((size_a, size_b))
+        self.counts = np.zeros((size_a, size_b), dtype=np.int32)
+        self._rules = {}
+        self._next_id = 0
+
+    @classmethod
+    def from_model(cls, model, implication_name="mamdani"):
+        relation = cls(len(model.inputs[0].universe), len(model.output.universe), implication_name)
+        for a, b in zip(model.antecedents(0), model.consequent_terms()):
+            relation.add_rule(a, b)
+        return relation
+
+    def copy(self):
+        """Независимая копия: изменения копии не затрагивают исходное отношение."""
+        relation = CompiledRelation.__new__(CompiledRelation)
+        relation.implication = self.implication
+        relation.matrix = self.matrix.copy()
+        relation.counts = self.counts.copy()
+        relation._rules = dict(self._rules)
+        relation._next_id = self._next_id
+        return relation
+
+    def __len__(self):
+        return len(self._rules)
+
+    def rule_ids(self):
+        return list(self._rules)
+
+    def add_rule(self, antecedent, consequent):
+        """Добавляет правило и возвращает его идентификатор."""
+        a = np.asarray(antecedent, dtype=float)
+        b = np.asarray(consequent, dtype=float)
+        if a.shape != self.matrix.shape[:1] or b.shape != self.matrix.shape[1:]:
+            raise ValueError(
+                f"Ожидались векторы длины {self.matrix.shape[0]} и {self.matrix.shape[1]}, "
+                f"получены {a.size} и {b.size}"
+            )
+        rule_matrix = self.implication(a[:, None], b[None, :])
+        greater = rule_matrix > self.matrix
+        self.counts[rule_matrix == self.matrix] += 1
+        self.matrix[greater] = rule_matrix[greater]
+        self.counts[greater] = 1
+
+        rule_id = self._next_id
+        self._next_id += 1
+        self._rules[rule_id] = (a, b)
+        return rule_id
+
+    def remove_rule(self, rule_id):
+        a, b = self._rules.pop(rule_id)
+        rule_matrix = self.implication(a[:, None], b[None, :])
+        equal = rule_matrix == self.matrix
+        self.counts[equal] -= 1
+        rows, cols = np.nonzero(equal & (self.counts == 0))
+        if len(rows) == 0:
+            return
+        if not self._rules:
+            self.matrix[rows, cols] = 0.0
+            return
+        # Пересчет только тех ячеек, где правило было единственным максимумом
+        values = np.stack(
+            [self.implication(a[rows], b[cols]) for a, b in self._rules.values()]
+        )
+        best = values.max(axis=0)
+        self.matrix[rows, cols] = best
+        self.counts[rows, cols] = (values == best).sum(axis=0)
+
+    def query(self, givens, tnorm="min", chunk_size=None):
+        """Композиция входов (N, |A|) с агрегированным отношением: (N, |B|)."""
+        return composition.compose(givens, self.matrix, tnorm, chunk_size)
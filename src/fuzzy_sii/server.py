@@ -0,0 +1,378 @@
+"""
+asyncio-сервер нечеткого вывода с пакетированием запросов.
+
+Скомпилированные базы правил загружаются один раз и остаются в памяти.
+Протокол — строки JSON по TCP (localhost) или Unix-сокету:
+
+    {"id": 1, "model": "config_many", "input": [4, 4, 24]}
+    -> {"id": 1, "output": 4.14}
+    {"cmd": "stats"}   -> задержки p50/p99 и пропускная способность
+    {"cmd": "models"}  -> список моделей
+
+Поле input принимает те же формы, что и fuzzy_sii.streaming. Запросы к
+одной модели, пришедшие в пределах окна window, объединяются в один
+векторизованный вызов (не больше max_batch наблюдений).
+
+С --watch файлы баз правил проверяются в фоне и при изменении
+подменяются новой версией без остановки сервера (fuzzy_sii.hotreload).
+С --max-mb или --max-models базы правил обслуживаются общим реестром
+(fuzzy_sii.registry): одинаковые массивы разных баз хранятся один раз,
+а редко используемые базы выгружаются из памяти.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.server config_combined.txt config_many.txt --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from . import profiling
+from .compiled import load_cached
+from .hotreload import ModelHandle
+from .implication import IMPLICATIONS
+from .inference import METHODS, check_defuzzifier
+from .memo import LRUCache, MemoizedPredictor
+from .streaming import add_defuzz_arguments, observation_to_vectors
+
+
+def model_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class LatencyStats:
+    """Задержки последних window запросов и общая пропускная способность."""
+
+    def __init__(self, window=100000):
+        self.latencies = deque(maxlen=window)
+        self.batches = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+
+    def record(self, seconds):
+        self.latencies.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        latencies = np.fromiter(self.latencies, dtype=float)
+        elapsed = time.perf_counter() - self.start
+        result = {
+            "requests": self.count,
+            "errors": self.errors,
+            "throughput": self.count / elapsed if elapsed else 0.0,
+            "mean_batch": float(np.mean(self.batches)) if self.batches else 0.0,
+        }
+        if len(latencies):
+            result["p50_ms"] = float(np.percentile(latencies, 50) * 1e3)
+            result["p99_ms"] = float(np.percentile(latencies, 99) * 1e3)
+        return result
+
+
+class _Batcher:
+    """Очередь запросов к одной модели и задача, обрабатывающая их пакетами."""
+
+    def __init__(self, handle, window, max_batch, stats, cache=None):
+        self.handle = handle
+        self.cache = cache
+        self.memo = None
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = stats
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def submit(self, observation):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((observation, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                while len(batch) < self.max_batch and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self._collect()
+            # Версия фиксируется на весь пакет, перезагрузка подменит ее
+            # только для следующих пакетов
+            try:
+                current = self.handle.current
+            except Exception as error:
+                # Модель не загрузилась (например, реестр не смог вернуть
+                # выгруженную): ответ получает весь пакет, задача продолжает работу
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            model = current.model
+            predictor = current.predictor
+            if self.cache is not None:
+                if self.memo is None or self.memo.predictor is not predictor:
+                    self.memo = MemoizedPredictor(predictor, self.cache, version=current.version)
+                predictor = self.memo
+            ready = []
+            for observation, future in batch:
+                try:
+                    ready.append((observation_to_vectors(observation, model), future))
+                except (ValueError, KeyError, TypeError) as error:
+                    future.set_exception(ValueError(f"некорректный вход: {error}"))
+            if not ready:
+                continue
+            try:
+                givens = [np.stack(column) for column in zip(*(v for v, _ in ready))]
+                _, crisp = predictor(givens)
+            except Exception as error:
+                for _, future in ready:
+                    future.set_exception(error)
+                continue
+            self.stats.batches.append(len(ready))
+            for value, (_, future) in zip(crisp.tolist(), ready):
+                if not future.done():
+                    future.set_result(value)
+
+
+class InferenceServer:
+    def __init__(self, handles, window=0.002, max_batch=1024, cache_entries=0):
+        self.handles = handles
+        self.cache_entries = cache_entries
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = LatencyStats()
+        self._batchers = {}
+
+    def batcher(self, name):
+        batcher = self._batchers.get(name)
+        if batcher is None:
+            if name not in self.handles:
+                raise ValueError(f"неизвестная модель {name!r}")
+            cache = LRUCache(self.cache_entries) if self.cache_entries else None
+            batcher = self._batchers[name] = _Batcher(
+                self.handles[name], self.window, self.max_batch, self.stats, cache
+            )
+        return batcher
+
+    async def handle_request(self, request):
+        start = time.perf_counter()
+        response = {"id": request.get("id")}
+        command = request.get("cmd")
+        try:
+            if command == "stats":
+                response["stats"] = self.stats.summary()
+                caches = {
+                    name: batcher.cache.stats()
+                    for name, batcher in self._batchers.items()
+                    if batcher.cache is not None
+                }
+                if caches:
+                    response["stats"]["cache"] = caches
+            elif command == "models":
+                response["models"] = {
+                    name: handle.version for name, handle in self.handles.items()
+                }
+            else:
+                name = request.get("model")
+                if name is None and len(self.handles) == 1:
+                    name = next(iter(self.handles))
+                response["output"] = await self.batcher(name).submit(request["input"])
+                self.stats.record(time.perf_counter() - start)
+        except (KeyError, ValueError) as error:
+            self.stats.errors += 1
+            response["error"] = str(error)
+        return response
+
+    async def respond(self, request):
+        """Ответ на разобранный запрос; исключения не выходят за пределы запроса."""
+        if not isinstance(request, dict):
+            self.stats.errors += 1
+            return {"error": f"запрос должен быть объектом JSON, получено {type(request).__name__}"}
+        try:
+            return await self.handle_request(request)
+        except Exception as error:
+            # Неожиданная ошибка вывода: ответ все равно получает каждая строка
+            self.stats.errors += 1
+            return {"id": request.get("id"), "error": f"ошибка вывода: {error!r}"}
+
+    async def handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+
+        async def respond(line):
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as error:
+                response = {"error": f"некорректный JSON: {error}"}
+            else:
+                response = await self.respond(request)
+            data = (json.dumps(response, ensure_ascii=False) + "\n").encode()
+            async with lock:
+                writer.write(data)
+                await writer.drain()
+
+        # Запросы одного соединения обрабатываются конкурентно, поэтому
+        # ответы могут приходить не по порядку — их сопоставляют по id
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(respond(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765, unix=None):
+        if unix:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def parse_configs(configs):
+    """Список (имя, путь) из аргументов вида путь или имя=путь."""
+    result = []
+    for entry in configs:
+        name, _, path = entry.rpartition("=")
+        result.append((name or model_name(path), path))
+    return result
+
+
+def load_handles(
+    configs, method=None, implication_name="mamdani", defuzzifier="centroid", fallback=np.nan
+):
+    return {
+        name: ModelHandle(path, method, implication_name, defuzzifier, fallback)
+        for name, path in parse_configs(configs)
+    }
+
+
+def registry_handles(
+    configs,
+    max_bytes=None,
+    max_models=None,
+    method=None,
+    implication_name="mamdani",
+    defuzzifier="centroid",
+    fallback=np.nan,
+):
+    # Реестр (tmpfs, memory map) нужен только при --max-mb/--max-models
+    from .registry import ModelRegistry
+
+    registry = ModelRegistry(
+        parse_configs(configs),
+        max_bytes,
+        max_models,
+        method,
+        implication_name,
+        defuzzifier=defuzzifier,
+        fallback=fallback,
+    )
+    return {name: registry.handle(name) for name in registry.paths}
+
+
+def check_configs(configs, defuzzifier):
+    """
+    Проверяет дефаззификатор для всех баз правил до запуска сервера:
+    реестр загружает модели лениво и иначе сообщил бы об ошибке только
+    в ответе на запрос.
+    """
+    if defuzzifier == "centroid":
+        return
+    for name, path in parse_configs(configs):
+        try:
+            check_defuzzifier(load_cached(path), defuzzifier)
+        except ValueError as error:
+            raise ValueError(f"{name}: {error}") from None
+
+
+def add_server_arguments(parser):
+    parser.add_argument("configs", nargs="+", help="базы правил: путь или имя=путь")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="путь к Unix-сокету вместо TCP")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="окно пакетирования")
+    parser.add_argument("--max-batch", type=int, default=1024)
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--implication", choices=IMPLICATIONS, default="mamdani")
+    add_defuzz_arguments(parser)
+    parser.add_argument(
+        "--cache-entries", type=int, default=0, help="размер LRU-кэша на модель (0 — без кэша)"
+    )
+    parser.add_argument(
+        "--watch", type=float, default=0.0, help="период проверки файлов, с (0 — не следить)"
+    )
+    parser.add_argument(
+        "--max-mb", type=float, default=None, help="предел памяти общего реестра моделей, МБ"
+    )
+    parser.add_argument(
+        "--max-models", type=int, default=None, help="предел числа загруженных моделей реестра"
+    )
+
+
+def make_server(args):
+    if args.max_mb is not None or args.max_models is not None:
+        max_bytes = args.max_mb * 2**20 if args.max_mb is not None else None
+        handles = registry_handles(
+            args.configs,
+            max_bytes,
+            args.max_models,
+            args.method,
+            args.implication,
+            args.defuzz,
+            args.fallback,
+        )
+    else:
+        handles = load_handles(
+            args.configs, args.method, args.implication, args.defuzz, args.fallback
+        )
+        if args.watch > 0:
+            from .hotreload import Watcher
+
+            Watcher(handles.values(), args.watch).start()
+    return InferenceServer(handles, args.window_ms / 1e3, args.max_batch, args.cache_entries)
+
+
+async def serve(args):
+    server = make_server(args)
+    listener = await server.start(args.host, args.port, args.unix)
+    address = args.unix or f"{args.host}:{args.port}"
+    print(f"Модели {', '.join(sorted(server.handles))} доступны на {address}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер нечеткого вывода")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+    if args.watch > 0 and (args.max_mb is not None or args.max_models is not None):
+        parser.error("--watch не поддерживается вместе с реестром (--max-mb, --max-models)")
+    try:
+        check_configs(args.configs, args.defuzz)
+    except ValueError as error:
+        parser.error(str(error))
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
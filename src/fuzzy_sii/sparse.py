@@ -0,0 +1,110 @@
+"""
+Разреженный вывод: вычисляются только правила с ненулевым уровнем
+истинности предпосылки.
+
+Уровень max-min соответствия входа терму больше нуля тогда и только
+тогда, когда носители входа и терма пересекаются. Индекс хранит для
+каждой точки множества определения список термов, ненулевых в ней, и
+для каждого терма — список правил, в которых он встречается. Правила-
+кандидаты со связкой «и» получаются пересечением по входам, начиная с
+самого избирательного, со связкой «или» — объединением. Стоимость
+запроса пропорциональна числу сработавших правил, а не размеру базы.
+"""
+import numpy as np
+
+from . import profiling
+from .premises import OR, SNORMS, TNORMS
+
+
+def _group(keys, values, size):
+    """Список массивов values, сгруппированных по ключу 0..size-1."""
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(size + 1))
+    return [values[order[bounds[k] : bounds[k + 1]]] for k in range(size)]
+
+
+class SparseIndex:
+    def __init__(self, model):
+        self.model = model
+        rules = model.rules
+        rule_ids = np.arange(model.num_rules)
+        is_or = model.connectives == OR
+        self._terms_at = []
+        self._and_by_term = []
+        self._and_free = []
+        self._or_by_term = []
+        for var, variable in enumerate(model.inputs):
+            support = variable.terms > 0
+            self._terms_at.append(_group(*np.nonzero(support.T), len(variable.universe)))
+            column = rules[:, var]
+            used = column >= 0
+            self._and_by_term.append(
+                _group(column[used & ~is_or], rule_ids[used & ~is_or], len(variable.term_names))
+            )
+            self._and_free.append(rule_ids[~used & ~is_or])
+            self._or_by_term.append(
+                _group(column[used & is_or], rule_ids[used & is_or], len(variable.term_names))
+            )
+
+    def active_terms(self, var, given):
+        """Маска термов входа var, чьи носители пересекаются с носителем given."""
+        mask = np.zeros(len(self.model.inputs[var].term_names), dtype=bool)
+        for point in np.flatnonzero(np.asarray(given) > 0):
+            mask[self._terms_at[var][point]] = True
+        return mask
+
+    def candidates(self, givens):
+        """Номера правил с ненулевым уровнем истинности предпосылки."""
+        masks = [self.active_terms(var, given) for var, given in enumerate(givens)]
+        rules = self.model.rules
+
+        # «и»: стартуем с входа с наименьшим числом правил-кандидатов
+        seeds = []
+        for var, mask in enumerate(masks):
+            groups = [self._and_by_term[var][t] for t in np.flatnonzero(mask)]
+            seeds.append(groups + [self._and_free[var]])
+        seed_var = min(range(len(seeds)), key=lambda v: sum(len(g) for g in seeds[v]))
+        found = np.concatenate(seeds[seed_var])
+        for var, mask in enumerate(masks):
+            if var == seed_var or len(found) == 0:
+                continue
+            terms = rules[found, var]
+            found = found[(terms < 0) | mask[terms]]
+
+        # «или»: объединение по входам
+        or_groups = [
+            self._or_by_term[var][t] for var, mask in enumerate(masks) for t in np.flatnonzero(mask)
+        ]
+        return np.unique(np.concatenate([found] + or_groups).astype(np.int64))
+
+    @profiling.profiled("sparse")
+    def infer(self, givens, tnorm="min", snorm="max"):
+        """
+        Вывод для одного наблюдения (список векторов по входам).
+
+        Returns: (агрегированный выход (|B|,), номера сработавших правил,
+        их уровни истинности).
+        """
+        model = self.model
+        active = self.candidates(givens)
+        profiling.count("rules_fired", len(active))
+        output = np.zeros(len(model.output.universe))
+        if len(active) == 0:
+            return output, active, np.zeros(0)
+
+        rules = model.rules[active]
+        matrix = np.ones((len(active), len(model.inputs)))
+        is_or = model.connectives[active] == OR
+        for var, (variable, given) in enumerate(zip(model.inputs, givens)):
+            terms = rules[:, var]
+            used = terms >= 0
+            degrees = np.minimum(variable.terms[terms[used]], given).max(axis=1)
+            matrix[used, var] = degrees
+            matrix[~used & is_or, var] = 0.0
+        levels = TNORMS[tnorm](matrix)
+        if is_or.any():
+            levels[is_or] = SNORMS[snorm](matrix[is_or])
+
+        clipped = np.minimum(levels[:, None], model.output.terms[model.consequents[active]])
+        np.max(clipped, axis=0, out=output)
+        return output, active, levels
@@ -0,0 +1,36 @@
+"""
+Размещение больших массивов: в памяти или в файле .npy через memory map.
+
+Тензоры матриц зависимостей (правила, |A|, |B|) и пакетные выходы
+(N, |B|) при больших множествах определения удобнее держать в файле:
+np.lib.format.open_memmap создает обычный .npy, который потом читается
+через np.load(path, mmap_mode="r") без копирования.
+"""
+import os
+
+import numpy as np
+
+
+def allocate(shape, dtype=np.float64, path=None):
+    """Пустой массив в памяти или, если задан path, .npy файл с memory map."""
+    if path is None:
+        return np.empty(shape, dtype=dtype)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=tuple(shape))
+
+
+def open_array(path, writable=False):
+    """Открывает .npy через memory map без чтения данных в память."""
+    return np.load(path, mmap_mode="r+" if writable else "r")
+
+
+def as_float(array):
+    """
+    Массив с плавающей точкой без копирования, если он уже float32/float64
+    (в том числе memmap); списки и целые массивы преобразуются в float64.
+    """
+    array = np.asarray(array)
+    if array.dtype.kind != "f":
+        array = array.astype(np.float64)
+    return array
@@ -0,0 +1,208 @@
+"""
+Потоковый вывод: база правил загружается один раз, затем наблюдения
+читаются построчно из файла или stdin и выходы выдаются по мере обработки.
+
+Формат строки наблюдения:
+- CSV: числа через запятую, точку с запятой или пробел — либо четкие
+  значения по каждому входу, либо функции принадлежности всех входов подряд;
+- JSONL: число, список (как в CSV), список списков по входам или
+  объект {"имя_входа": число или список}.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.streaming config_combined.txt [input.csv]
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from . import defuzz, profiling
+from .compiled import load_cached
+from .implication import IMPLICATIONS
+from .inference import METHODS, Predictor, default_method, fuzzify
+from .model import load_model
+
+
+class StreamStats:
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"Обработано наблюдений: {self.count} за {self.elapsed:.3f} с "
+            f"({self.throughput:.0f} набл/с)"
+        )
+
+
+def _as_vector(value, variable):
+    if isinstance(value, (int, float)):
+        return fuzzify(value, variable.universe)[0]
+    vector = np.asarray(value, dtype=float)
+    if vector.shape != variable.universe.shape:
+        raise ValueError(
+            f"Для входа {variable.name} ожидалось {len(variable.universe)} значений, "
+            f"получено {vector.size}"
+        )
+    return vector
+
+
+def observation_to_vectors(value, model):
+    """Приводит одно наблюдение к списку функций принадлежности по входам."""
+    inputs = model.inputs
+    if isinstance(value, dict):
+        missing = [var.name for var in inputs if var.name not in value]
+        if missing:
+            raise ValueError(f"Нет значений для входов: {', '.join(missing)}")
+        return [_as_vector(value[var.name], var) for var in inputs]
+    if isinstance(value, (int, float)):
+        value = [value]
+    value = list(value)
+    if value and isinstance(value[0], list):
+        return [_as_vector(v, var) for v, var in zip(value, inputs, strict=True)]
+    if len(value) == len(inputs):
+        return [_as_vector(float(v), var) for v, var in zip(value, inputs)]
+    sizes = [len(var.universe) for var in inputs]
+    if len(value) == sum(sizes):
+        bounds = np.cumsum([0] + sizes)
+        return [np.asarray(value[bounds[k] : bounds[k + 1]], dtype=float) for k in range(len(inputs))]
+    raise ValueError(
+        f"Ожидалось {len(inputs)} четких значений или {sum(sizes)} значений "
+        f"функций принадлежности, получено {len(value)}"
+    )
+
+
+def parse_line(line, fmt):
+    line = line.strip()
+    if fmt == "auto":
+        fmt = "jsonl" if line[:1] in "[{" else "csv"
+    if fmt == "jsonl":
+        return json.loads(line)
+    return [float(x) for x in line.replace(",", " ").replace(";", " ").split()]
+
+
+def is_header(line, fmt="auto"):
+    """Строка CSV, которая не разбирается как числа, — заголовок."""
+    line = line.strip()
+    if fmt == "jsonl" or not line or line[:1] in "#[{":
+        return False
+    try:
+        parse_line(line, "csv")
+    except ValueError:
+        return True
+    return False
+
+
+def read_observations(lines, model, fmt="auto", first_line=1, header=True):
+    """
+    Генератор функций принадлежности наблюдений; пустые строки и # пропускаются.
+
+    first_line — номер первой строки lines в файле (для сообщений об
+    ошибках, когда файл читается порциями). Заголовком может быть только
+    первая строка файла, и только при header=True; любая другая
+    некорректная строка вызывает ValueError с ее номером.
+    """
+    for number, line in enumerate(lines, start=first_line):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if header and number == 1 and is_header(line, fmt):
+            continue
+        try:
+            yield observation_to_vectors(parse_line(line, fmt), model)
+        except ValueError as error:
+            raise ValueError(f"строка {number}: {error}") from None
+
+
+def stream_infer(predictor, observations, batch_size=256, stats=None):
+    """
+    Выдает четкое значение выхода для каждого наблюдения.
+
+    Наблюдения собираются в пакеты по batch_size, поэтому расход памяти
+    не зависит от длины потока. Если чтение прерывается ошибкой, выходы
+    уже прочитанных наблюдений выдаются до того, как ошибка передается
+    дальше.
+    """
+    stats = stats if stats is not None else StreamStats()
+    batch = []
+
+    def flush():
+        start = time.perf_counter()
+        givens = [np.stack(column) for column in zip(*batch)]
+        _, crisp = predictor(givens)
+        stats.elapsed += time.perf_counter() - start
+        stats.count += len(batch)
+        batch.clear()
+        return crisp
+
+    try:
+        for observation in observations:
+            batch.append(observation)
+            if len(batch) >= batch_size:
+                yield from flush().tolist()
+    except ValueError:
+        if batch:
+            yield from flush().tolist()
+        raise
+    if batch:
+        yield from flush().tolist()
+
+
+def add_defuzz_arguments(parser):
+    """Общие для командных строк параметры дефаззификации (см. defuzz)."""
+    parser.add_argument("--defuzz", choices=defuzz.METHODS, default="centroid")
+    parser.add_argument(
+        "--fallback", type=float, default=float("nan"), help="значение, если ни одно правило не сработало"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Потоковый нечеткий вывод")
+    parser.add_argument("config", help="файл базы правил config_*.txt")
+    parser.add_argument("input", nargs="?", help="файл наблюдений (по умолчанию stdin)")
+    parser.add_argument("--format", choices=("auto", "csv", "jsonl"), default="auto")
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--implication", choices=IMPLICATIONS, default="mamdani")
+    add_defuzz_arguments(parser)
+    parser.add_argument(
+        "--resolution",
+        type=int,
+        default=None,
+        help="точек множеств определения: термы пересчитываются по параметрам",
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--no-cache", action="store_true", help="не использовать скомпилированный артефакт")
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+
+    model = load_model(args.config) if args.no_cache else load_cached(args.config)
+    if args.resolution:
+        model = model.resample(args.resolution)
+    method = args.method or default_method(model)
+    try:
+        predictor = Predictor(
+            model, method, args.implication, defuzzifier=args.defuzz, fallback=args.fallback
+        )
+    except ValueError as error:
+        parser.error(str(error))
+
+    source = open(args.input, "r", encoding="utf-8") if args.input else sys.stdin
+    stats = StreamStats()
+    start = time.perf_counter()
+    try:
+        observations = read_observations(source, model, args.format)
+        for value in stream_infer(predictor, observations, args.batch_size, stats):
+            print(value)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    total = time.perf_counter() - start
+    print(f"{stats}; всего с чтением {total:.3f} с", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
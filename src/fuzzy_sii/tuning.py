@@ -0,0 +1,396 @@
+"""
+Подбор функций принадлежности по размеченным данным.
+
+Параметры — значения степеней принадлежности в точках множества
+определения (для термов, заданных числами) или параметры функций
+(треугольная, гауссова, ...). Поиск ведется дифференциальной эволюцией:
+на каждом поколении оценивается вся популяция баз правил сразу.
+
+BatchEvaluator считает выходы для P кандидатов и N наблюдений одним
+векторизованным проходом: входы фаззифицируются один раз, затем степени
+соответствия (P, N, термы), уровни истинности правил (P, N, правила) и
+выходы (P, N, |B|) с центром тяжести, как механизм "truth". Популяция
+делится на порции по max_elements, а порции — между процессами пула.
+
+Данные — CSV (или столбцы через пробел): четкие значения входов и
+ожидаемый выход последним столбцом; строка заголовка пропускается.
+
+Запуск: PYTHONPATH=src python -m fuzzy_sii.tuning config_many.txt data.csv -o tuned.txt -j 4
+"""
+import argparse
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import profiling
+from .composition import MAX_ELEMENTS
+from .inference import crisp_inputs, fuzzify, sugeno_outputs
+from .model import FuzzyModel, Variable, load_model
+from .parser import write_model
+from .premises import OR, SNORMS, TNORMS
+
+
+def read_dataset(filename, model):
+    """Возвращает четкие входы (N, V) и ожидаемые выходы (N,)."""
+    columns = len(model.inputs) + 1
+    rows = []
+    with open(filename, "r", encoding="utf-8") as file:
+        for number, line in enumerate(file, start=1):
+            fields = [f for f in re.split(r"[,;\s]+", line.strip()) if f]
+            if not fields or fields[0].startswith("#"):
+                continue
+            try:
+                values = [float(f) for f in fields]
+            except ValueError:
+                if number == 1:
+                    continue  # заголовок
+                raise ValueError(f"{filename}:{number}: ожидались числа") from None
+            if len(values) != columns:
+                raise ValueError(
+                    f"{filename}:{number}: ожидалось {columns} столбцов, получено {len(values)}"
+                )
+            rows.append(values)
+    data = np.array(rows, dtype=float).reshape(-1, columns)
+    return data[:, :-1], data[:, -1]
+
+
+# Наименьшая ширина основания треугольной и трапециевидной функций,
+# доля размаха множества определения: check_params отвергает нулевую
+MIN_WIDTH = 1e-6
+
+
+def _sorted_params(params):
+    return np.sort(params, axis=-1)
+
+
+def _widened(params, lower, upper, min_width):
+    """
+    Упорядоченные вершины (P, k) с шириной основания не меньше
+    min_width, по возможности в границах [lower, upper]: вершины,
+    прижатые к одной границе, раздвигаются, а не сливаются в точку.
+    """
+    p = _sorted_params(params)
+    deficit = np.maximum(min_width - (p[:, -1] - p[:, 0]), 0.0)
+    p[:, 0] -= deficit / 2
+    p[:, -1] += deficit / 2
+    shift = np.maximum(lower - p[:, 0], 0.0) - np.maximum(p[:, -1] - upper, 0.0)
+    return p + shift[:, None]
+
+
+def _membership_batch(kind, params, x):
+    """Параметрическая функция для P наборов параметров (P, k) в точках x: (P, |U|)."""
+    x = x[None, :]
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        if kind in ("треугольная", "трапециевидная"):
+            p = _sorted_params(params)
+            a, b = p[:, :1], p[:, 1:2]
+            c, d = (p[:, 1:2], p[:, 2:3]) if kind == "треугольная" else (p[:, 2:3], p[:, 3:4])
+            left = np.where(b > a, (x - a) / (b - a), (x >= b).astype(float))
+            right = np.where(d > c, (d - x) / (d - c), (x <= c).astype(float))
+            return np.clip(np.minimum(np.minimum(left, right), 1.0), 0.0, 1.0)
+        if kind == "гауссова":
+            return np.exp(-0.5 * ((x - params[:, :1]) / params[:, 1:2]) ** 2)
+        return 1.0 / (1.0 + np.exp(-params[:, :1] * (x - params[:, 1:2])))
+
+
+def _param_bounds(kind, values, universe):
+    lo, hi = universe[0], universe[-1]
+    span = (hi - lo) or 1.0
+    if kind in ("треугольная", "трапециевидная"):
+        return [lo - span / 2] * len(values), [hi + span / 2] * len(values)
+    if kind == "гауссова":
+        return [lo, span / 100], [hi, span]
+    slope = values[0] or 1.0 / span
+    return [min(slope / 10, slope * 10), lo], [max(slope / 10, slope * 10), hi]
+
+
+class ParameterSpace:
+    """
+    Вектор настраиваемых параметров модели. names ограничивает
+    настройку переменными с этими именами; у модели Сугено выходных
+    термов нет, настраиваются только входы.
+    """
+
+    def __init__(self, model, names=None):
+        self.model = model
+        variables = model.inputs + ([] if model.mode == "sugeno" else [model.output])
+        if names:
+            unknown = set(names) - {var.name for var in variables}
+            if unknown:
+                raise ValueError(f"Нет настраиваемых переменных {', '.join(sorted(unknown))}")
+            variables = [var for var in variables if var.name in names]
+        self.variables = variables
+        # (переменная, терм, вид функции или None, начало, конец)
+        self.blocks = []
+        lo, hi, initial = [], [], []
+        for var in variables:
+            for term, params in enumerate(var.params):
+                if params is None:
+                    values = var.terms[term]
+                    bounds = [0.0] * len(values), [1.0] * len(values)
+                    kind = None
+                else:
+                    kind, values = params[0], list(params[1])
+                    bounds = _param_bounds(kind, values, var.universe)
+                start = len(initial)
+                initial.extend(values)
+                lo.extend(bounds[0])
+                hi.extend(bounds[1])
+                self.blocks.append((var, term, kind, start, len(initial)))
+        self.lower = np.array(lo, dtype=float)
+        self.upper = np.array(hi, dtype=float)
+        self.initial = np.clip(np.array(initial, dtype=float), self.lower, self.upper)
+
+    @property
+    def size(self):
+        return len(self.initial)
+
+    def _block(self, population, var, kind, start, stop):
+        """Параметры блока для популяции (P, k) в том виде, в каком они будут записаны."""
+        block = population[:, start:stop]
+        if kind in ("треугольная", "трапециевидная"):
+            span = (var.universe[-1] - var.universe[0]) or 1.0
+            block = _widened(block, self.lower[start], self.upper[start], MIN_WIDTH * span)
+        return block
+
+    def terms(self, population):
+        """Словарь {имя переменной: термы (P, термы, |U|)} для популяции (P, D)."""
+        population = np.atleast_2d(population)
+        result = {}
+        for var, term, kind, start, stop in self.blocks:
+            if var.name not in result:
+                result[var.name] = np.broadcast_to(
+                    var.terms, (len(population),) + var.terms.shape
+                ).copy()
+            block = self._block(population, var, kind, start, stop)
+            if kind is not None:
+                block = _membership_batch(kind, block, var.universe)
+            result[var.name][:, term] = block
+        return result
+
+    def to_model(self, vector):
+        """FuzzyModel с параметрами из vector."""
+        vector = np.atleast_2d(np.asarray(vector, dtype=float))
+        terms = self.terms(vector)
+        params = {}
+        for var, term, kind, start, stop in self.blocks:
+            if kind is not None:
+                values = self._block(vector, var, kind, start, stop)[0]
+                params[var.name, term] = (kind, [float(v) for v in values])
+
+        def rebuild(var):
+            if var.name not in terms:
+                return var
+            new_params = [params.get((var.name, t), p) for t, p in enumerate(var.params)]
+            return Variable(var.name, var.universe, var.term_names, terms[var.name][0], new_params)
+
+        model = self.model
+        return FuzzyModel(
+            [rebuild(var) for var in model.inputs],
+            rebuild(model.output),
+            model.rules,
+            model.consequents,
+            model.given,
+            model.connectives,
+            model.coefficients,
+        )
+
+
+class BatchEvaluator:
+    def __init__(self, space, inputs, targets, tnorm="min", snorm="max", max_elements=MAX_ELEMENTS):
+        self.space = space
+        self.model = model = space.model
+        self.targets = np.asarray(targets, dtype=float)
+        self.givens = [fuzzify(inputs[:, k], var.universe) for k, var in enumerate(model.inputs)]
+        self.tnorm = TNORMS[tnorm]
+        self.snorm = SNORMS[snorm]
+        self.max_elements = max_elements
+        self.absent = model.rules < 0
+        self.is_or = model.connectives == OR
+        self.neutral = np.where(self.is_or, 0.0, 1.0)
+        if model.mode == "sugeno":
+            self.values = sugeno_outputs(model, crisp_inputs(model, self.givens))
+        # Штраф за наблюдения, на которых не сработало ни одно правило
+        spread = np.ptp(self.targets) if len(self.targets) else 1.0
+        self.penalty = (spread or 1.0) ** 2
+
+    def _levels(self, terms, size):
+        """Уровни истинности правил (size, N, правила) для порции популяции."""
+        model = self.model
+        matrix = np.empty((size, len(self.targets), model.num_rules, len(model.inputs)))
+        for v, (var, given) in enumerate(zip(model.inputs, self.givens)):
+            var_terms = terms.get(var.name, var.terms[None])
+            degrees = np.minimum(given[None, :, None, :], var_terms[:, None]).max(axis=-1)
+            matrix[..., v] = degrees[:, :, np.maximum(model.rules[:, v], 0)]
+            matrix[:, :, self.absent[:, v], v] = self.neutral[self.absent[:, v]]
+        levels = self.tnorm(matrix)
+        if self.is_or.any():
+            levels[..., self.is_or] = self.snorm(matrix[..., self.is_or])
+        return levels
+
+    def _predict_chunk(self, population):
+        terms = self.space.terms(population)
+        levels = self._levels(terms, len(population))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.model.mode == "sugeno":
+                return (levels * self.values).sum(axis=-1) / levels.sum(axis=-1)
+            output = self.model.output
+            output_terms = terms.get(output.name, output.terms[None])
+            consequents = output_terms[:, self.model.consequents]
+            outputs = np.minimum(levels[..., None], consequents[:, None]).max(axis=2)
+            return outputs @ output.universe / outputs.sum(axis=-1)
+
+    def predict(self, population):
+        """Четкие выходы (P, N) для популяции (P, D)."""
+        population = np.atleast_2d(population)
+        model = self.model
+        width = max(len(model.inputs), len(model.output.universe), 1)
+        per_candidate = max(1, len(self.targets) * model.num_rules * width)
+        rows = max(1, self.max_elements // per_candidate)
+        return np.concatenate(
+            [self._predict_chunk(population[s : s + rows]) for s in range(0, len(population), rows)]
+        )
+
+    def loss(self, population):
+        """Среднеквадратичная ошибка каждого кандидата: (P,)."""
+        errors = (self.predict(population) - self.targets) ** 2
+        return np.where(np.isnan(errors), self.penalty, errors).mean(axis=1)
+
+
+# Оценщик рабочего процесса, создается в _init_worker
+_evaluator = None
+
+
+def _init_worker(model, names, inputs, targets):
+    global _evaluator
+    _evaluator = BatchEvaluator(ParameterSpace(model, names), inputs, targets)
+
+
+def _worker_loss(population):
+    return _evaluator.loss(population)
+
+
+def differential_evolution(
+    loss,
+    lower,
+    upper,
+    initial=None,
+    size=None,
+    generations=100,
+    mutation=0.7,
+    crossover=0.9,
+    seed=None,
+    callback=None,
+):
+    """
+    DE/rand/1/bin. loss принимает популяцию (P, D) и возвращает (P,).
+    initial входит в начальную популяцию. Возвращает (лучший вектор,
+    его ошибка, ошибки лучших по поколениям).
+    """
+    rng = np.random.default_rng(seed)
+    dim = len(lower)
+    size = size or max(10, min(15 * dim, 200))
+    population = lower + rng.random((size, dim)) * (upper - lower)
+    if initial is not None:
+        population[0] = initial
+    fitness = loss(population)
+    history = [float(fitness.min())]
+    rows = np.arange(size)
+    others = np.array([np.delete(rows, i) for i in rows])
+    for generation in range(generations):
+        # Три различных кандидата, отличных от текущего
+        picks = np.argsort(rng.random((size, size - 1)), axis=1)[:, :3]
+        a, b, c = (population[others[rows, picks[:, k]]] for k in range(3))
+        mutant = np.clip(a + mutation * (b - c), lower, upper)
+        mask = rng.random((size, dim)) < crossover
+        mask[rows, rng.integers(0, dim, size)] = True
+        trial = np.where(mask, mutant, population)
+        trial_fitness = loss(trial)
+        better = trial_fitness <= fitness
+        population[better] = trial[better]
+        fitness[better] = trial_fitness[better]
+        history.append(float(fitness.min()))
+        if callback is not None:
+            callback(generation, history[-1])
+    best = int(np.argmin(fitness))
+    return population[best], float(fitness[best]), history
+
+
+def tune(model, inputs, targets, names=None, workers=1, **options):
+    """
+    Настраивает функции принадлежности. Возвращает (новая модель,
+    ошибка исходной модели, ошибка найденной, история).
+    """
+    space = ParameterSpace(model, names)
+    if workers <= 1:
+        evaluator = BatchEvaluator(space, inputs, targets)
+        initial_loss = float(evaluator.loss(space.initial)[0])
+        best, best_loss, history = differential_evolution(
+            evaluator.loss, space.lower, space.upper, space.initial, **options
+        )
+        return space.to_model(best), initial_loss, best_loss, history
+
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(model, names, inputs, targets)
+    ) as pool:
+
+        def loss(population):
+            parts = [part for part in np.array_split(population, workers) if len(part)]
+            return np.concatenate(list(pool.map(_worker_loss, parts)))
+
+        initial_loss = float(loss(space.initial[None])[0])
+        best, best_loss, history = differential_evolution(
+            loss, space.lower, space.upper, space.initial, **options
+        )
+    return space.to_model(best), initial_loss, best_loss, history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Подбор функций принадлежности по данным")
+    parser.add_argument("config", help="файл базы правил config_*.txt")
+    parser.add_argument("data", help="CSV: входы и ожидаемый выход")
+    parser.add_argument("-o", "--output", required=True, help="куда записать настроенную базу")
+    parser.add_argument("--variables", nargs="+", help="настраивать только эти переменные")
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--population", type=int, default=None)
+    parser.add_argument("--mutation", type=float, default=0.7)
+    parser.add_argument("--crossover", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-j", "--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+    profiling.configure_from_env()
+
+    model = load_model(args.config)
+    inputs, targets = read_dataset(args.data, model)
+    start = time.perf_counter()
+
+    def progress(generation, loss):
+        if generation % 10 == 9 or generation == args.generations - 1:
+            print(f"Поколение {generation + 1}: MSE {loss:.6g}", file=sys.stderr)
+
+    tuned, initial_loss, best_loss, _ = tune(
+        model,
+        inputs,
+        targets,
+        args.variables,
+        args.workers,
+        size=args.population,
+        generations=args.generations,
+        mutation=args.mutation,
+        crossover=args.crossover,
+        seed=args.seed,
+        callback=progress,
+    )
+    write_model(tuned, args.output)
+    print(
+        f"MSE {initial_loss:.6g} -> {best_loss:.6g} за {time.perf_counter() - start:.1f} с, "
+        f"результат: {args.output}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
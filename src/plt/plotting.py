@@ -1,17 +1,30 @@
-import matplotlib.pyplot as plt
+"""
+Графики сравнения импликаций.
+
+plot_* открывают окна через pyplot; render_comparison рисует без окон
+на Agg. pyplot и бэкенд PDF импортируются внутри функций, которым они
+нужны, — модуль можно импортировать без выбора графического бэкенда.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+from matplotlib.figure import Figure
 
 
 def plot_comparison_Q(correspondences_mamdani, correspondences_larsen, A, B):
     """
     Строит графики сравнения методов импликации Мамдани и Ларсена.
     """
+    import matplotlib.pyplot as plt
+
     num_rules = len(correspondences_mamdani)
 
     for rule_idx in range(num_rules):
         # Получаем матрицы для текущего правила
-        mamdani_matrix = np.array(correspondences_mamdani[rule_idx])
-        larsen_matrix = np.array(correspondences_larsen[rule_idx])
+        mamdani_matrix = np.asarray(correspondences_mamdani[rule_idx])
+        larsen_matrix = np.asarray(correspondences_larsen[rule_idx])
 
         # Создаем фигуру
         fig, axes = plt.subplots(1, 2, figsize=(12, 6))
@@ -49,12 +62,14 @@ def plot_comparison_curve(correspondences_mamdani, correspondences_larsen, A, B)
     """
     Строит график разницы значений между методами импликации Мамдани и Ларсена.
     """
+    import matplotlib.pyplot as plt
+
     num_rules = len(correspondences_mamdani)
 
     # Для каждой матрицы различий создаем кривую
     for rule_idx in range(num_rules):
-        mamdani_matrix = np.array(correspondences_mamdani[rule_idx])
-        larsen_matrix = np.array(correspondences_larsen[rule_idx])
+        mamdani_matrix = np.asarray(correspondences_mamdani[rule_idx])
+        larsen_matrix = np.asarray(correspondences_larsen[rule_idx])
 
         # Вычисляем разницу между матрицами
         difference_matrix = mamdani_matrix - larsen_matrix
@@ -89,6 +104,8 @@ def plot_mamdani_larsen(x, mamdani_values, larsen_values):
     - mamdani_values: numpy.ndarray или список, значения агрегации Мамдани.
     - larsen_values: numpy.ndarray или список, значения агрегации Ларсена.
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
 
     # Построение графиков
@@ -106,3 +123,132 @@ def plot_mamdani_larsen(x, mamdani_values, larsen_values):
 
     # Отображение графика
     plt.show()
+
+
+class _ComparisonSheet:
+    """
+    Одна фигура Agg (без pyplot и окон) с сеткой пар графиков
+    «Мамдани | Ларсен». Для каждой страницы меняются только данные
+    изображений и заголовки, сами оси и подписи создаются один раз.
+    """
+
+    def __init__(self, shape, A, B, per_page=1):
+        self.per_page = per_page
+        cols = math.ceil(math.sqrt(per_page))
+        rows = math.ceil(per_page / cols)
+        figsize = (12, 6) if per_page == 1 else (6 * cols, 3 * rows + 1)
+        self.figure = Figure(figsize=figsize, layout="constrained")
+        axes = self.figure.subplots(rows, 2 * cols, squeeze=False).ravel()
+        a_values, b_values = _axis_labels(A), _axis_labels(B)
+        self.cells = []
+        empty = np.zeros(shape)
+        for k in range(per_page):
+            pair = []
+            for ax, method in zip(axes[2 * k : 2 * k + 2], ("Мамдани", "Ларсен")):
+                image = ax.imshow(empty, cmap="viridis", aspect="auto", vmin=0.0, vmax=1.0)
+                ax.set_xticks(range(len(b_values)), b_values, fontsize=7)
+                ax.set_yticks(range(len(a_values)), a_values, fontsize=7)
+                ax.set_xlabel(B.columns[-1], fontsize=8)
+                ax.set_ylabel(A.columns[-1], fontsize=8)
+                pair.append((ax, image, method))
+            self.cells.append(pair)
+        for ax in axes[2 * per_page :]:
+            ax.set_visible(False)
+        self.figure.colorbar(image, ax=axes.tolist())
+        # Раскладка считается один раз: оси и подписи от страницы к странице не меняются
+        for k in range(per_page):
+            self.cells[k][0][0].set_title(f"Правило {k + 1}: Мамдани", fontsize=9)
+        if per_page == 1:
+            self.figure.suptitle("Сравнение методов импликации для правила 1")
+        self.figure.draw_without_rendering()
+        self.figure.set_layout_engine("none")
+
+    def draw(self, mamdani, larsen, first):
+        """Заполняет страницу правилами first, first + 1, ... (до per_page)."""
+        for k, pair in enumerate(self.cells):
+            visible = k < len(mamdani)
+            for (ax, image, method), matrices in zip(pair, (mamdani, larsen)):
+                ax.set_visible(visible)
+                if visible:
+                    image.set_data(np.asarray(matrices[k]))
+                    ax.set_title(f"Правило {first + k + 1}: {method}", fontsize=9)
+        if self.per_page == 1:
+            self.figure.suptitle(f"Сравнение методов импликации для правила {first + 1}")
+        return self.figure
+
+
+def _axis_labels(frame):
+    """Подписи осей — точки множества определения (последний столбец таблицы)."""
+    return [f"{value:g}" for value in frame[frame.columns[-1]].tolist()]
+
+
+def _render_sheets(mamdani, larsen, A, B, per_page, first, paths, dpi):
+    sheet = _ComparisonSheet(np.shape(mamdani[0]), A, B, per_page)
+    for page, path in enumerate(paths):
+        start = page * per_page
+        figure = sheet.draw(mamdani[start : start + per_page], larsen[start : start + per_page], first + start)
+        figure.savefig(path, dpi=dpi)
+    return paths
+
+
+def render_comparison(
+    correspondences_mamdani, correspondences_larsen, A, B, output, per_page=None, workers=1, dpi=100
+):
+    """
+    Неинтерактивный вариант plot_comparison_Q для больших баз правил.
+
+    Parameters:
+    - output: путь .pdf — многостраничный PDF (по умолчанию одно правило
+      на страницу), или .png — контактные листы output-001.png, ...
+      (по умолчанию 12 правил на лист).
+    - per_page: число правил на странице или листе.
+    - workers: число процессов для PNG; PDF пишется последовательно.
+
+    Returns: список записанных файлов.
+    """
+    mamdani = np.asarray(correspondences_mamdani)
+    larsen = np.asarray(correspondences_larsen)
+    num_rules = len(mamdani)
+    stem, extension = os.path.splitext(output)
+    extension = extension.lower()
+    if extension not in (".pdf", ".png"):
+        raise ValueError(f"Ожидался файл .pdf или .png, получено {output!r}")
+    if per_page is None:
+        per_page = 1 if extension == ".pdf" else 12
+    per_page = max(1, min(per_page, num_rules))
+    pages = math.ceil(num_rules / per_page)
+
+    if extension == ".pdf":
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        sheet = _ComparisonSheet(mamdani.shape[1:], A, B, per_page)
+        with PdfPages(output) as pdf:
+            for page in range(pages):
+                start = page * per_page
+                stop = start + per_page
+                pdf.savefig(sheet.draw(mamdani[start:stop], larsen[start:stop], start))
+        return [output]
+
+    paths = [f"{stem}-{page + 1:03d}.png" for page in range(pages)]
+    if workers <= 1 or pages <= 1:
+        return _render_sheets(mamdani, larsen, A, B, per_page, 0, paths, dpi)
+    # Каждому процессу — непрерывный диапазон листов и только его правила
+    step = math.ceil(pages / workers)
+    with ProcessPoolExecutor(workers) as pool:
+        futures = []
+        for first_page in range(0, pages, step):
+            start, stop = first_page * per_page, (first_page + step) * per_page
+            futures.append(
+                pool.submit(
+                    _render_sheets,
+                    mamdani[start:stop],
+                    larsen[start:stop],
+                    A,
+                    B,
+                    per_page,
+                    start,
+                    paths[first_page : first_page + step],
+                    dpi,
+                )
+            )
+        return [path for future in futures for path in future.result()]
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from fuzzy_sii import profiling
+from fuzzy_sii.model import FuzzyModel, Variable
+from synthetic import random_terms
+
+CONFIGS = {
+    name: os.path.join(ROOT, f"config_{name}.txt") for name in ("combined", "many", "sugeno")
+}
+
+
+def random_model(
+    seed=0, num_inputs=3, size=9, num_terms=5, num_rules=20, or_share=0.0, absent_share=0.0
+):
+    """
+    Случайная модель Мамдани; or_share — доля правил со связкой «или»,
+    absent_share — доля условий, в которых вход не участвует.
+    """
+    rng = np.random.default_rng(seed)
+
+    def variable(name):
+        return Variable(
+            name,
+            np.linspace(0, 10, size),
+            [f"{name}_t{t}" for t in range(num_terms)],
+            random_terms(rng, num_terms, size),
+        )
+
+    inputs = [variable(f"x{k}") for k in range(num_inputs)]
+    rules = rng.integers(num_terms, size=(num_rules, num_inputs))
+    if absent_share:
+        rules[rng.random(rules.shape) < absent_share] = -1
+        # В каждом правиле остается хотя бы одно условие
+        empty = (rules < 0).all(axis=1)
+        rules[empty, 0] = 0
+    connectives = (rng.random(num_rules) < or_share).astype(np.int8)
+    given = [rng.random(size) for _ in inputs]
+    return FuzzyModel(
+        inputs,
+        variable("y"),
+        rules,
+        rng.integers(num_terms, size=num_rules),
+        given,
+        connectives,
+    )
+
+
+def loop_compose(given, relation, tnorm=min):
+    """Эталонная max-t композиция вложенными циклами, как в исходном core_combined."""
+    return [
+        max(tnorm(given[i], relation[i][j]) for i in range(len(given)))
+        for j in range(len(relation[0]))
+    ]
+
+
+def random_givens(model, n, seed=1):
+    rng = np.random.default_rng(seed)
+    givens = [rng.random((n, len(var.universe))) for var in model.inputs]
+    # Часть наблюдений с нулями, чтобы встречались несработавшие правила
+    for given in givens:
+        given[rng.random(given.shape) < 0.4] = 0.0
+    return givens
+
+
+@pytest.fixture(autouse=True)
+def quiet_profiling():
+    """Без отладочной печати и приемника профилирования между тестами."""
+    previous = profiling.set_sink(None)
+    profiling.set_debug(False)
+    yield
+    profiling.set_sink(previous)
+    profiling.set_debug(False)
@@ -0,0 +1,62 @@
+"""Перебор входного пространства и оценки чувствительности."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS, random_model
+from fuzzy_sii import analysis
+from fuzzy_sii.analysis import Sweep, chunk_points, default_points, finite_differences, grid_points
+from fuzzy_sii.composition import MAX_ELEMENTS
+
+
+def test_chunk_size_follows_rules_and_output():
+    small = random_model(0, num_rules=20)
+    large = random_model(0, size=100, num_rules=500)
+    assert chunk_points(large) * 500 * 100 <= MAX_ELEMENTS
+    assert chunk_points(small) > chunk_points(large)
+    assert Sweep(large).chunk_size == chunk_points(large)
+
+
+def test_sweep_does_not_depend_on_chunks():
+    model = random_model(1, num_inputs=2, num_rules=15)
+    points = grid_points(model, 9)
+    whole, chunked = Sweep(model), Sweep(model, chunk_size=7)
+    np.testing.assert_allclose(chunked(points), whole(points))
+    np.testing.assert_array_equal(chunked.max_levels, whole.max_levels)
+
+
+class LinearSweep:
+    """Выход 3·x0 + x1 вместо вывода: точная производная известна."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, points):
+        return 3.0 * points[:, 0] + points[:, 1]
+
+
+def test_finite_differences_at_bounds():
+    model = random_model(2, num_inputs=2)
+    # Точки на границах: сдвиг в одну сторону обрезается
+    points = np.array([[0.0, 0.0], [10.0, 10.0], [5.0, 0.0], [10.0, 5.0]])
+    slopes = finite_differences(LinearSweep(model), points)
+    np.testing.assert_allclose(slopes, [3.0 * 10, 1.0 * 10])
+
+
+def test_default_points_switch_to_latin_hypercube():
+    small = random_model(0, num_inputs=analysis.MAX_GRID_INPUTS)
+    large = random_model(0, num_inputs=8)
+    assert len(default_points(small)) == analysis.GRID_POINTS**analysis.MAX_GRID_INPUTS
+    points = default_points(large, seed=0)
+    assert points.shape == (analysis.GRID_POINTS**analysis.MAX_GRID_INPUTS, 8)
+    # Латинский гиперкуб: в каждом слое по каждому входу ровно одна точка
+    strata = np.floor(points / 10 * len(points)).astype(int)
+    assert all(len(np.unique(column)) == len(points) for column in strata.T)
+
+
+@pytest.mark.parametrize(
+    "argv", [["--defuzz", "bogus"], ["--grid", "10000"], ["--tnorm", "bogus"]]
+)
+def test_bad_arguments_are_usage_errors(argv):
+    with pytest.raises(SystemExit) as exit_info:
+        analysis.main([CONFIGS["many"]] + argv)
+    assert exit_info.value.code == 2
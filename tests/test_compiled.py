@@ -0,0 +1,37 @@
+"""Артефакты скомпилированных баз правил в общем каталоге кэша."""
+import os
+import shutil
+
+from conftest import CONFIGS
+from fuzzy_sii.compiled import cached_artifact, compile_file
+
+
+def test_same_name_in_different_directories_share_cache_dir(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    paths = []
+    for directory in ("first", "second"):
+        os.makedirs(tmp_path / directory)
+        paths.append(str(tmp_path / directory / "config.txt"))
+    shutil.copy(CONFIGS["combined"], paths[0])
+    shutil.copy(CONFIGS["many"], paths[1])
+    artifacts = [cached_artifact(path, cache_dir) for path in paths]
+    assert artifacts[0] != artifacts[1]
+    # Повторная загрузка находит оба артефакта, а не перекомпилирует
+    assert all(os.path.exists(path) for path in artifacts)
+    assert [cached_artifact(path, cache_dir) for path in paths] == artifacts
+
+
+def test_recompile_removes_only_own_stale_artifacts(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    path = str(tmp_path / "config.txt")
+    other = str(tmp_path / "other" / "config.txt")
+    os.makedirs(os.path.dirname(other))
+    shutil.copy(CONFIGS["combined"], path)
+    shutil.copy(CONFIGS["combined"], other)
+    old = compile_file(path, cache_dir)
+    kept = compile_file(other, cache_dir)
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("\n")
+    new = compile_file(path, cache_dir)
+    assert not os.path.exists(old)
+    assert os.path.exists(new) and os.path.exists(kept)
@@ -0,0 +1,51 @@
+"""Пакетная max-min и max-product композиция в сравнении с циклами."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS, loop_compose
+from fuzzy_sii import composition, implication, storage
+from fuzzy_sii.model import load_model
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 7])
+def test_compose_matches_loops(chunk_size):
+    rng = np.random.default_rng(0)
+    givens = rng.random((20, 6))
+    relation = rng.random((6, 4))
+    expected = [loop_compose(g.tolist(), relation.tolist()) for g in givens]
+    np.testing.assert_allclose(composition.compose(givens, relation, chunk_size=chunk_size), expected)
+    expected = [loop_compose(g.tolist(), relation.tolist(), lambda x, y: x * y) for g in givens]
+    np.testing.assert_allclose(composition.compose(givens, relation, "product", chunk_size), expected)
+
+
+def test_compose_into_npy_file_matches_memory(tmp_path):
+    model = load_model(CONFIGS["combined"])
+    correspondences = implication.relation_tensor(model.antecedents(0), model.consequent_terms())
+    givens = np.random.default_rng(4).random((30, len(model.inputs[0].universe)))
+    path = str(tmp_path / "outputs.npy")
+    out = storage.allocate((len(givens), correspondences.shape[2]), path=path)
+    result = composition.compose(givens, correspondences[0], chunk_size=7, out=out)
+    assert result is out
+    out.flush()
+    saved = storage.open_array(path)
+    assert saved.shape == (len(givens), correspondences.shape[2])
+    assert saved.dtype == np.float64
+    np.testing.assert_array_equal(saved, composition.compose(givens, correspondences[0]))
+
+    path = str(tmp_path / "rules.npy")
+    out = storage.allocate((len(givens),) + correspondences.shape[::2], path=path)
+    composition.compose_rules(givens, correspondences, chunk_size=7, out=out)
+    out.flush()
+    np.testing.assert_array_equal(
+        storage.open_array(path), composition.compose_rules(givens, correspondences)
+    )
+
+
+def test_batch_aggregations_match_single_observations():
+    model = load_model(CONFIGS["combined"])
+    correspondences = implication.relation_tensor(model.antecedents(0), model.consequent_terms())
+    givens = np.random.default_rng(3).random((50, len(model.inputs[0].universe)))
+    for aggregation in ("outputs", "rules"):
+        batch = composition.AGGREGATIONS[aggregation](givens, correspondences, chunk_size=8)
+        single = [composition.AGGREGATIONS[aggregation](g, correspondences)[0] for g in givens]
+        np.testing.assert_allclose(batch, single)
@@ -0,0 +1,95 @@
+"""Методы дефаззификации и значение для наблюдений без сработавших правил."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS, random_model
+from fuzzy_sii import defuzz, membership, streaming
+from fuzzy_sii.inference import Predictor
+from fuzzy_sii.model import load_model
+from fuzzy_sii.parallel import run_parallel
+
+VALUES = np.array([0.0, 1, 2, 3, 4])
+
+
+@pytest.mark.parametrize("method", sorted(defuzz.DEFUZZIFIERS))
+@pytest.mark.parametrize("fallback", [np.nan, -1.0])
+def test_empty_rows_get_fallback(method, fallback):
+    outputs = np.array([[0.0, 0, 0, 0, 0], [0, 0.5, 1, 0.5, 0]])
+    result = defuzz.defuzzify(outputs, VALUES, method, fallback)
+    np.testing.assert_array_equal(result[:1], [fallback])
+    assert result[1] == pytest.approx(2.0)
+
+
+def test_known_values():
+    outputs = np.array([[0.0, 0.5, 1.0, 0.0, 0.0], [1.0, 0.2, 0.2, 0.2, 1.0]])
+    np.testing.assert_allclose(defuzz.centroid(outputs, VALUES)[:1], [2.5 / 1.5])
+    np.testing.assert_allclose(defuzz.som(outputs, VALUES), [2, 0])
+    np.testing.assert_allclose(defuzz.lom(outputs, VALUES), [2, 4])
+    np.testing.assert_allclose(defuzz.mom(outputs, VALUES), [2, 2])
+    # Симметричная функция принадлежности делится пополам в центре
+    assert defuzz.bisector(outputs[1:], VALUES)[0] == pytest.approx(2.0)
+
+
+def test_bisector_halves_area():
+    outputs = np.random.default_rng(0).random((20, 5))
+    points = defuzz.bisector(outputs, VALUES)
+    fine = np.linspace(0, 4, 40001)
+    for row, point in zip(outputs, points):
+        curve = np.interp(fine, VALUES, row)
+        left = np.trapezoid(curve[fine <= point], fine[fine <= point])
+        assert left == pytest.approx(np.trapezoid(curve, fine) / 2, abs=1e-3)
+
+
+def test_height_fallback():
+    levels = np.array([[0.0, 0.0], [0.5, 1.0]])
+    result = defuzz.height(levels, np.array([1.0, 4.0]), fallback=7.0)
+    np.testing.assert_allclose(result, [7.0, 3.0])
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError, match="Неизвестный метод"):
+        defuzz.get_defuzzifier("median")
+    with pytest.raises(ValueError):
+        Predictor(random_model(0), "truth", defuzzifier="median")
+
+
+@pytest.mark.parametrize("defuzzifier", defuzz.METHODS)
+@pytest.mark.parametrize("method", ["truth", "sparse"])
+def test_predictor_fallback_without_fired_rules(defuzzifier, method):
+    model = random_model(0)
+    givens = [np.zeros((3, len(var.universe))) for var in model.inputs]
+    givens[0][1] = 1.0
+    givens[1][1] = 1.0
+    givens[2][1] = 1.0
+    _, crisp = Predictor(model, method, defuzzifier=defuzzifier, fallback=-1.0)(givens)
+    np.testing.assert_array_equal(crisp[[0, 2]], -1.0)
+    assert 0 <= crisp[1] <= 10
+
+
+def test_continuous_centroid_single_point_universe():
+    assert membership.continuous_centroid(lambda y: 0.5, 3.0, 3.0) == 3.0
+    assert np.isnan(membership.continuous_centroid(lambda y: 0.0, 3.0, 3.0))
+    assert membership.continuous_centroid(lambda y: 0.0, 3.0, 3.0, fallback=-1.0) == -1.0
+    # Как дискретный центр тяжести на той же одной точке
+    np.testing.assert_array_equal(defuzz.centroid(np.array([[0.5]]), np.array([3.0])), [3.0])
+
+
+@pytest.mark.parametrize("defuzzifier", ["bisector", "height", "continuous"])
+def test_sugeno_rejects_defuzzifier(defuzzifier):
+    model = load_model(CONFIGS["sugeno"])
+    Predictor(model, "truth")
+    with pytest.raises(ValueError, match="Сугено"):
+        Predictor(model, "truth", defuzzifier=defuzzifier)
+
+
+def test_sugeno_defuzzifier_reported_by_cli(tmp_path, capsys):
+    path = str(tmp_path / "obs.csv")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("1 2\n")
+    with pytest.raises(SystemExit) as exit_info:
+        streaming.main([CONFIGS["sugeno"], path, "--defuzz", "mom"])
+    assert exit_info.value.code == 2
+    assert "Сугено" in capsys.readouterr().err
+    # Параллельный вывод проверяет параметры до запуска рабочих процессов
+    with pytest.raises(ValueError, match="Сугено"):
+        run_parallel(CONFIGS["sugeno"], path, defuzzifier="mom", workers=1)
@@ -0,0 +1,69 @@
+"""Горячая перезагрузка дает ту же модель, что и сборка с нуля."""
+import shutil
+
+import numpy as np
+
+from conftest import CONFIGS, random_givens
+from fuzzy_sii.hotreload import ModelHandle
+from fuzzy_sii.inference import Predictor
+from fuzzy_sii.model import load_model
+
+
+RULES = [
+    "Если золото_в_минуту средне то навык_игры опытный",
+    "Если золото_в_минуту много то навык_игры бывалый",
+]
+
+
+def reload_with(handle, path, text):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+    return handle.reload()
+
+
+def assert_matches_fresh(handle, path):
+    fresh = Predictor(load_model(path), handle.current.predictor.method)
+    givens = random_givens(fresh.model, 30)
+    outputs, crisp = handle.current.predictor(givens)
+    expected = fresh(givens)
+    np.testing.assert_allclose(outputs, expected[0])
+    np.testing.assert_allclose(crisp, expected[1])
+
+
+def test_hot_reload_matches_fresh_build(tmp_path):
+    path = tmp_path / "config.txt"
+    shutil.copy(CONFIGS["combined"], path)
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    handle = ModelHandle(str(path))
+    assert handle.version == 1
+    assert not handle.reload()
+
+    # Удаление правила, затем добавление другого: обновляется только отношение
+    relation = handle.current.predictor.relation
+    assert reload_with(handle, path, text.replace(RULES[0] + "\n", ""))
+    assert handle.version == 2
+    assert handle.current.predictor.relation is not relation
+    assert_matches_fresh(handle, path)
+
+    extra = "Если золото_в_минуту мало то навык_игры профессионал\n"
+    assert reload_with(handle, path, text.replace(RULES[1] + "\n", RULES[1] + "\n" + extra))
+    assert handle.version == 3
+    assert_matches_fresh(handle, path)
+
+    # Изменение терма — полная пересборка
+    assert reload_with(handle, path, text.replace("1 0.1 0.02 0 0", "1 0.5 0.02 0 0"))
+    assert_matches_fresh(handle, path)
+
+
+def test_old_version_is_unchanged_after_reload(tmp_path):
+    path = tmp_path / "config.txt"
+    shutil.copy(CONFIGS["combined"], path)
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    handle = ModelHandle(str(path))
+    old = handle.current
+    givens = random_givens(old.model, 10)
+    before = old.predictor(givens)[1]
+    reload_with(handle, path, text.replace(RULES[0] + "\n", ""))
+    np.testing.assert_allclose(old.predictor(givens)[1], before)
@@ -0,0 +1,81 @@
+"""Тензор отношений и агрегация core_combined в сравнении с вложенными циклами."""
+import numpy as np
+import pytest
+
+import core_combined
+from conftest import CONFIGS, loop_compose
+from fuzzy_sii import implication, storage
+from fuzzy_sii.model import load_model
+
+
+def loop_relation(a, b, func):
+    return [[[func(a[r][i], b[r][j]) for j in range(len(b[r]))] for i in range(len(a[r]))] for r in range(len(a))]
+
+
+@pytest.mark.parametrize(
+    "name, func",
+    [("mamdani", min), ("larsen", lambda a, b: a * b), ("lukasiewicz", lambda a, b: min(1.0, 1.0 - a + b))],
+)
+def test_relation_tensor_matches_loops(name, func):
+    model = load_model(CONFIGS["combined"])
+    a, b = model.antecedents(0), model.consequent_terms()
+    expected = loop_relation(a.tolist(), b.tolist(), func)
+    np.testing.assert_allclose(implication.relation_tensor(a, b, name), expected)
+
+
+def test_relation_tensor_fills_out_by_rule():
+    model = load_model(CONFIGS["combined"])
+    a, b = model.antecedents(0), model.consequent_terms()
+    out = np.empty((len(a), a.shape[1], b.shape[1]))
+    implication.relation_tensor(a, b, "larsen", out=out)
+    np.testing.assert_allclose(out, implication.relation_tensor(a, b, "larsen"))
+
+
+def test_outputs_and_rules_aggregation_match_loops(capsys):
+    model = load_model(CONFIGS["combined"])
+    given = model.given[0]
+    correspondences = core_combined.get_correspondences_Mamdani(model)
+    relations = correspondences.tolist()
+
+    outputs = [loop_compose(given.tolist(), relation) for relation in relations]
+    expected_outputs = np.max(outputs, axis=0)
+    np.testing.assert_allclose(core_combined.outputs_aggregation(correspondences, given), expected_outputs)
+
+    merged = np.max(relations, axis=0).tolist()
+    np.testing.assert_allclose(
+        core_combined.rules_aggregation(correspondences, given), loop_compose(given.tolist(), merged)
+    )
+    capsys.readouterr()
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_correspondences_in_npy_file_match_memory(tmp_path, capsys, dtype):
+    model = load_model(CONFIGS["combined"])
+    a, b = model.antecedents(0), model.consequent_terms()
+    for get in (core_combined.get_correspondences_Mamdani, core_combined.get_correspondences_Larsen):
+        path = str(tmp_path / f"{get.__name__}.npy")
+        mapped = get(model, path, dtype)
+        assert isinstance(mapped, np.memmap)
+        mapped.flush()
+        saved = storage.open_array(path)
+        assert saved.shape == (len(a), a.shape[1], b.shape[1])
+        assert saved.dtype == dtype
+        np.testing.assert_array_equal(saved, get(model, dtype=dtype))
+    capsys.readouterr()
+
+
+def test_correspondences_in_memory_use_one_broadcast(monkeypatch, capsys):
+    calls = []
+    relation_tensor = implication.relation_tensor
+
+    def spy(*args, out=None):
+        calls.append(out)
+        return relation_tensor(*args, out=out)
+
+    monkeypatch.setattr(implication, "relation_tensor", spy)
+    model = load_model(CONFIGS["combined"])
+    core_combined.get_correspondences_Mamdani(model)
+    core_combined.get_correspondences_Larsen(model)
+    # Без path тензор строится одним вызовом без out, а не по правилам
+    assert calls == [None, None]
+    capsys.readouterr()
@@ -0,0 +1,93 @@
+"""Таблица-суррогат: уточнение сетки до заданной погрешности, запросы и сохранение."""
+import warnings
+
+import numpy as np
+import pytest
+
+from conftest import CONFIGS
+from fuzzy_sii.inference import Predictor, default_method
+from fuzzy_sii.lookup import LookupTable, build_table, evaluate_points
+from fuzzy_sii.model import load_model
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    model = load_model(CONFIGS["combined"])
+    return Predictor(model, default_method(model))
+
+
+def test_refines_until_tolerance(predictor):
+    coarse = build_table(predictor, grid_size=5)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        table = build_table(predictor, grid_size=5, tol=coarse.max_error / 2)
+    assert table.max_error <= coarse.max_error / 2
+    assert table.values.size > coarse.values.size
+
+
+def test_warns_when_limit_stops_refinement(predictor):
+    coarse = build_table(predictor, grid_size=5)
+    with pytest.warns(RuntimeWarning, match="не достигнута") as record:
+        table = build_table(predictor, grid_size=5, tol=1e-9, max_points=coarse.values.size + 1)
+    assert f"{table.max_error:.6g}" in str(record[0].message)
+    assert table.max_error > 1e-9
+    np.testing.assert_array_equal(table.values, coarse.values)
+
+
+@pytest.fixture(scope="module", params=["combined", "many"])
+def table(request):
+    model = load_model(CONFIGS[request.param])
+    predictor = Predictor(model, default_method(model))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return predictor, build_table(predictor, grid_size=9, tol=0.1, max_points=50_000)
+
+
+def random_points(axes, n, seed=0):
+    rng = np.random.default_rng(seed)
+    lower = [axis[0] for axis in axes]
+    upper = [axis[-1] for axis in axes]
+    return rng.uniform(lower, upper, (n, len(axes)))
+
+
+def test_table_matches_predictor_off_grid(table):
+    predictor, table = table
+    points = random_points(table.axes, 2000)
+    expected = evaluate_points(predictor, points)
+    actual = table(points)
+    defined = ~np.isnan(expected)
+    # Там, где вывод конечен, таблица не отдает nan
+    assert not np.isnan(actual[defined]).any()
+    # max_error измерена в центрах ячеек: между ними ошибка может быть чуть больше
+    error = np.abs(actual[defined] - expected[defined])
+    assert np.quantile(error, 0.99) <= table.max_error
+    assert error.max() <= 1.25 * table.max_error
+
+
+def test_scalar_matches_batch(table):
+    _, table = table
+    points = random_points(table.axes, 200, seed=1)
+    scalar = [table.scalar(*point) for point in points.tolist()]
+    np.testing.assert_allclose(scalar, table(points), rtol=1e-12, atol=1e-12)
+
+
+def test_nan_nodes_do_not_spread():
+    table = LookupTable([[0.0, 1.0, 2.0]], [np.nan, 1.0, 3.0])
+    np.testing.assert_allclose(table([0.5, 1.5]), [1.0, 2.0])
+    assert table.scalar(0.5) == 1.0
+    assert np.isnan(table([0.0]))[0] and np.isnan(table.scalar(0.0))
+
+
+def test_save_load_round_trip(table, tmp_path):
+    _, table = table
+    path = str(tmp_path / "table.npz")
+    table.save(path)
+    again = LookupTable.load(path)
+    for axis, other in zip(table.axes, again.axes):
+        np.testing.assert_array_equal(axis, other)
+    np.testing.assert_array_equal(again.values, table.values)
+    assert again.max_error == table.max_error
+    assert again.names == table.names
+    points = random_points(table.axes, 100, seed=2)
+    np.testing.assert_array_equal(again(points), table(points))
+    assert again.scalar(*points[0]) == table.scalar(*points[0])
@@ -0,0 +1,107 @@
+"""LRU-кэш и мемоизированный вывод дают те же выходы, что и вывод без кэша."""
+import numpy as np
+import pytest
+
+from conftest import random_givens, random_model
+from fuzzy_sii import memo
+from fuzzy_sii.inference import Predictor
+from fuzzy_sii.premises import premise_levels, term_degrees
+
+
+def test_lru_evicts_by_entries():
+    cache = memo.LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+
+def test_lru_bytes_do_not_grow_on_reput():
+    cache = memo.LRUCache()
+    cache.put(("k", b"12345678"), np.zeros(16))
+    nbytes = cache.nbytes
+    for _ in range(10):
+        cache.put(("k", b"12345678"), np.zeros(16))
+    assert cache.nbytes == nbytes
+    cache.clear()
+    assert cache.nbytes == 0
+
+
+def test_lru_evicts_by_bytes():
+    cache = memo.LRUCache(max_bytes=3 * 8 * 100)
+    for key in range(10):
+        cache.put(key, np.zeros(100))
+    assert cache.nbytes <= cache.max_bytes
+    assert 0 < len(cache) < 10
+
+
+def test_validate_clears_other_version():
+    cache = memo.LRUCache()
+    cache.validate(1)
+    cache.put("k", 1)
+    cache.validate(1)
+    assert cache.get("k") == 1
+    cache.validate(2)
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("method", ["truth", "sparse"])
+def test_memoized_predictor_matches_predictor(method):
+    model = random_model(2, num_inputs=3, or_share=0.2)
+    givens = random_givens(model, 40)
+    # Повторы внутри пакета и между пакетами
+    givens = [np.concatenate([g, g[::3]]) for g in givens]
+    predictor = Predictor(model, method)
+    memoized = memo.MemoizedPredictor(predictor, memo.LRUCache())
+    expected = predictor(givens)
+    for _ in range(2):
+        outputs, crisp = memoized(givens)
+        np.testing.assert_allclose(outputs, expected[0])
+        np.testing.assert_allclose(crisp, expected[1])
+    assert memoized.cache.hits > 0
+
+
+def test_cached_degrees_match_and_follow_version():
+    model = random_model(3)
+    givens = random_givens(model, 20)
+    cache = memo.LRUCache()
+    version = memo.model_digest(model)
+    degrees = memo.cached_degrees(model, givens, cache, version=version)
+    for variable, given, result in zip(model.inputs, givens, degrees):
+        np.testing.assert_allclose(result, term_degrees(variable, given))
+
+    changed = random_model(3)
+    changed.inputs[0].terms[:] *= 0.5
+    assert memo.model_digest(changed) != version
+    degrees = memo.cached_degrees(
+        changed, givens, cache, version=memo.model_digest(changed)
+    )
+    np.testing.assert_allclose(degrees[0], term_degrees(changed.inputs[0], givens[0]))
+    levels = premise_levels(changed, None, degrees=degrees)
+    np.testing.assert_allclose(levels, premise_levels(changed, givens))
+
+
+def test_model_version_is_hashed_once(monkeypatch):
+    calls = []
+    digest = memo.model_digest
+    monkeypatch.setattr(memo, "model_digest", lambda model: calls.append(model) or digest(model))
+    first, second = random_model(0), random_model(1)
+    assert memo.model_version(first) == memo.model_version(first) == digest(first)
+    assert memo.model_version(second) != memo.model_version(first)
+    assert len(calls) == 2
+
+
+def test_memoized_predictors_sharing_cache_follow_model():
+    model = random_model(4)
+    changed = random_model(4)
+    changed.output.terms[:] *= 0.5
+    givens = random_givens(model, 10)
+    cache = memo.LRUCache()
+    memo.MemoizedPredictor(Predictor(model, "truth"), cache)(givens)
+    misses = cache.misses
+    outputs, _ = memo.MemoizedPredictor(Predictor(changed, "truth"), cache)(givens)
+    assert cache.misses > misses
+    np.testing.assert_allclose(outputs, Predictor(changed, "truth")(givens)[0])
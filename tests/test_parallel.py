@@ -0,0 +1,76 @@
+"""Параллельный вывод по файлу наблюдений в сравнении с потоковым."""
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import CONFIGS
+from fuzzy_sii import compiled
+from fuzzy_sii.inference import Predictor
+from fuzzy_sii.model import load_model
+from fuzzy_sii.parallel import run_parallel
+from fuzzy_sii.streaming import read_observations, stream_infer
+
+
+@pytest.fixture
+def config(tmp_path):
+    # Артефакт компиляции пишется рядом с базой правил, а не в репозиторий
+    path = tmp_path / "config.txt"
+    shutil.copy(CONFIGS["combined"], path)
+    return str(path)
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    return str(path)
+
+
+def streamed(config, lines):
+    model = load_model(config)
+    return np.array(
+        list(stream_infer(Predictor(model, "rules"), read_observations(lines, model), batch_size=3))
+    )
+
+
+@pytest.mark.parametrize("header", [True, False])
+@pytest.mark.parametrize("chunk_size", [1, 4, 100])
+def test_parallel_matches_streaming(tmp_path, config, header, chunk_size):
+    values = [f"{x:.1f}" for x in np.linspace(300, 900, 11)]
+    lines = (["gold"] if header else []) + values
+    path = write_lines(tmp_path / "input.csv", lines)
+    result = np.concatenate(list(run_parallel(config, path, "rules", workers=2, chunk_size=chunk_size)))
+    assert len(result) == len(values)
+    np.testing.assert_allclose(result, streamed(config, lines))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_parallel_bad_row_has_file_line_number(tmp_path, config, chunk_size):
+    # Некорректная строка 4 (с заголовком) попадает в начало порции при chunk_size 1 и 2
+    path = write_lines(tmp_path / "input.csv", ["gold", "300", "400", "bad", "500"])
+    with pytest.raises(ValueError, match="строка 4"):
+        list(run_parallel(config, path, "rules", workers=1, chunk_size=chunk_size))
+
+
+def test_parallel_npy_matches_streaming(tmp_path, config):
+    matrix = np.random.default_rng(0).random((10, 5))
+    path = str(tmp_path / "input.npy")
+    np.save(path, matrix)
+    result = np.concatenate(list(run_parallel(config, path, "rules", workers=2, chunk_size=3)))
+    lines = [" ".join(map(repr, row.tolist())) for row in matrix]
+    np.testing.assert_allclose(result, streamed(config, lines))
+
+
+def test_parallel_reuses_compiled_artifact(tmp_path, config, monkeypatch):
+    path = write_lines(tmp_path / "input.csv", ["300", "600"])
+    compiles = []
+    compile_file = compiled.compile_file
+    monkeypatch.setattr(compiled, "compile_file", lambda *a: compiles.append(a) or compile_file(*a))
+    first = np.concatenate(list(run_parallel(config, path, "rules", workers=1)))
+    second = np.concatenate(list(run_parallel(config, path, "rules", workers=1)))
+    assert len(compiles) == 1
+    np.testing.assert_array_equal(first, second)
+    # Изменение файла меняет хеш, и артефакт собирается заново
+    with open(config, "a", encoding="utf-8") as file:
+        file.write("\n")
+    list(run_parallel(config, path, "rules", workers=1))
+    assert len(compiles) == 2
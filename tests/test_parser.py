@@ -0,0 +1,167 @@
+"""Разбор базы правил: модель, позиции ошибок, запись обратно в текст."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS
+from fuzzy_sii.model import load_model
+from fuzzy_sii.parser import ParseError, format_model, parse_lines
+
+BASE = """\
+Множество определения a
+0 5 10
+Нечеткое множество мало
+1 0.5 0
+Нечеткое множество много
+0 0.5 1
+
+Множество определения b
+0 1
+Нечеткое множество нет
+1 0
+Нечеткое множество да
+0 1
+
+Множество определения y
+0 50 100
+Нечеткое множество низко
+1 0.2 0
+Нечеткое множество высоко
+0 0.2 1
+
+Если a мало и b да то y низко
+Если a много или b нет то y высоко
+"""
+
+GIVEN_A = "Пусть a\n0 1 0\n"
+GIVEN_B = "Пусть b\n0.3 0.7\n"
+
+
+def parse(text):
+    return parse_lines(text.splitlines(), "test.txt")
+
+
+def error_of(text):
+    with pytest.raises(ParseError) as info:
+        parse(text)
+    return info.value
+
+
+def test_parses_model():
+    model = parse(BASE + GIVEN_A + GIVEN_B)
+    assert [v.name for v in model.inputs] == ["a", "b"]
+    assert model.output.name == "y"
+    np.testing.assert_array_equal(model.rules, [[0, 1], [1, 0]])
+    np.testing.assert_array_equal(model.consequents, [0, 1])
+    np.testing.assert_array_equal(model.connectives, [0, 1])
+    np.testing.assert_array_equal(model.given[1], [0.3, 0.7])
+
+
+def test_given_is_optional():
+    assert parse(BASE).given == []
+
+
+@pytest.mark.parametrize("given", [GIVEN_A, GIVEN_B])
+def test_partial_given_is_rejected(given):
+    error = error_of(BASE + given)
+    assert "не для всех входов" in str(error)
+    assert error.line == len(BASE.splitlines()) + 1
+    assert error.column == 1
+
+
+def test_given_for_output_is_rejected():
+    error = error_of(BASE + GIVEN_A + GIVEN_B + "Пусть y\n0 1 0\n")
+    assert error.line == len(BASE.splitlines()) + 5
+    assert error.column == len("Пусть ") + 1
+
+
+@pytest.mark.parametrize(
+    "line, column, message",
+    [
+        ("Если c мало то y низко", 6, "неизвестная переменная"),
+        ("Если a мало и b да или a много то y низко", 20, "смешанные связки"),
+        ("Если a мало y низко", 1, "«то»"),
+    ],
+)
+def test_rule_error_positions(line, column, message):
+    text = BASE + line + "\n"
+    error = error_of(text)
+    assert message in str(error)
+    assert error.line == len(text.splitlines())
+    assert error.column == column
+    assert str(error).startswith(f"test.txt:{error.line}:{column}:")
+
+
+def test_bad_number_position():
+    text = BASE.replace("1 0.5 0", "1 x5 0", 1)
+    error = error_of(text)
+    assert (error.line, error.column) == (4, 3)
+
+
+def test_wrong_given_length():
+    error = error_of(BASE + "Пусть a\n0 1\n" + GIVEN_B)
+    assert error.line == len(BASE.splitlines()) + 2
+
+
+def test_unexpected_end_of_file():
+    error = error_of(BASE + "Пусть a\n")
+    assert "конец файла" in str(error)
+    assert error.line == len(BASE.splitlines()) + 1
+
+
+@pytest.mark.parametrize("name", sorted(CONFIGS))
+def test_format_model_round_trip(name):
+    model = load_model(CONFIGS[name])
+    rng = np.random.default_rng(0)
+    for variable in model.inputs:
+        variable.terms[:] = np.clip(variable.terms + rng.normal(0, 1e-3, variable.terms.shape), 0, 1)
+    again = parse(format_model(model))
+    for old, new in zip(model.inputs + [model.output], again.inputs + [again.output]):
+        assert old.term_names == new.term_names
+        np.testing.assert_array_equal(old.universe, new.universe)
+        np.testing.assert_array_equal(old.terms, new.terms)
+    np.testing.assert_array_equal(model.rules, again.rules)
+    np.testing.assert_array_equal(model.consequents, again.consequents)
+    if model.coefficients is not None:
+        np.testing.assert_array_equal(model.coefficients, again.coefficients)
+    for old, new in zip(model.given, again.given):
+        np.testing.assert_array_equal(old, new)
+
+
+@pytest.mark.parametrize(
+    "universe, line, column",
+    [
+        ("10 5 0", 2, 4),
+        ("0 5 5", 2, 5),
+        ("0 5\n3", 3, 1),
+    ],
+)
+def test_universe_must_increase(universe, line, column):
+    text = BASE.replace("0 5 10", universe, 1)
+    error = error_of(text)
+    assert "строго возрастать" in str(error)
+    assert (error.line, error.column) == (line, column)
+
+
+@pytest.mark.parametrize(
+    "function, message",
+    [
+        ("треугольная 5 0 10", "a <= b <= c"),
+        ("треугольная 5 5 5", "нулевая ширина"),
+        ("трапециевидная 0 6 4 10", "a <= b <= c <= d"),
+        ("гауссова 5 0", "sigma"),
+        ("сигмоидная 0 5", "наклон"),
+        ("треугольная 0 5 nan", "конечными"),
+    ],
+)
+def test_bad_membership_parameters(function, message):
+    text = BASE.replace("1 0.5 0", function, 1)
+    error = error_of(text)
+    assert message in str(error)
+    assert (error.line, error.column) == (4, 1)
+
+
+def test_membership_shoulders_are_allowed():
+    text = BASE.replace("1 0.5 0", "треугольная 0 0 10", 1)
+    text = text.replace("0 0.5 1", "трапециевидная 0 5 10 10", 1)
+    model = parse(text)
+    np.testing.assert_allclose(model.inputs[0].terms, [[1, 0.5, 0], [0, 1, 1]])
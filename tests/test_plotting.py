@@ -0,0 +1,46 @@
+"""Отчеты сравнения импликаций без окон: PDF и контактные листы PNG."""
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("pandas")
+
+from conftest import CONFIGS
+from fuzzy_sii import frames
+from fuzzy_sii.implication import relation_tensor
+from fuzzy_sii.model import load_model
+from plt.plotting import render_comparison
+
+
+@pytest.fixture
+def comparison():
+    model = load_model(CONFIGS["combined"])
+    A, B, *_ = frames.combined_tables(model)
+    a, b = model.antecedents(0), model.consequent_terms()
+    return relation_tensor(a, b, "mamdani"), relation_tensor(a, b, "larsen"), A, B
+
+
+def test_render_pdf(comparison, tmp_path):
+    mamdani, larsen, A, B = comparison
+    output = str(tmp_path / "report.pdf")
+    assert render_comparison(mamdani, larsen, A, B, output) == [output]
+    data = (tmp_path / "report.pdf").read_bytes()
+    assert data.startswith(b"%PDF")
+    # По умолчанию одно правило на страницу
+    assert data.count(b"/Type /Page\n") + data.count(b"/Type /Page ") == len(mamdani)
+
+
+def test_render_png_sheets(comparison, tmp_path):
+    mamdani, larsen, A, B = comparison
+    files = render_comparison(mamdani, larsen, A, B, str(tmp_path / "sheet.png"), per_page=2)
+    assert files == [str(tmp_path / f"sheet-{page:03d}.png") for page in range(1, len(files) + 1)]
+    assert len(files) == -(-len(mamdani) // 2)
+    for path in files:
+        with open(path, "rb") as file:
+            assert file.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+def test_render_rejects_other_formats(comparison, tmp_path):
+    mamdani, larsen, A, B = comparison
+    with pytest.raises(ValueError, match=".pdf или .png"):
+        render_comparison(mamdani, larsen, A, B, str(tmp_path / "report.svg"))
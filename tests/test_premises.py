@@ -0,0 +1,76 @@
+"""Уровни истинности предпосылок для N входов и механизм "truth" в сравнении с циклами."""
+import numpy as np
+import pytest
+
+import core_many
+from conftest import CONFIGS, random_givens, random_model
+from fuzzy_sii.inference import Predictor, truth_outputs
+from fuzzy_sii.model import load_model
+from fuzzy_sii.premises import premise_levels
+
+
+def loop_levels(model, givens):
+    """Уровни истинности как в исходном core_many: min по входам от max-min."""
+    levels = []
+    for rule, connective in zip(model.rules, model.connectives):
+        degrees = []
+        for var, term in enumerate(rule):
+            if term < 0:
+                continue
+            values = model.inputs[var].terms[term]
+            degrees.append(max(min(g, t) for g, t in zip(givens[var], values)))
+        levels.append(max(degrees) if connective else min(degrees))
+    return levels
+
+
+def loop_centroid(values, universe):
+    total = sum(values)
+    return sum(x * mu for x, mu in zip(universe, values)) / total
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_premise_levels_match_loops(seed):
+    model = random_model(seed, num_inputs=4, or_share=0.3, absent_share=0.2)
+    givens = random_givens(model, 30, seed)
+    levels = premise_levels(model, givens, max_elements=50)
+    for row in range(30):
+        expected = loop_levels(model, [g[row].tolist() for g in givens])
+        np.testing.assert_allclose(levels[row], expected)
+
+
+def test_core_many_matches_loops(capsys):
+    model = load_model(CONFIGS["many"])
+    levels = core_many.levels_of_truth_of_premises(model, model.given)
+    np.testing.assert_allclose(levels, loop_levels(model, [g.tolist() for g in model.given]))
+
+    aggregation = core_many.outputs_aggregation(core_many.get_outputs(model, levels))
+    expected = [
+        max(min(level, model.output.terms[c][j]) for level, c in zip(levels, model.consequents))
+        for j in range(len(model.output.universe))
+    ]
+    np.testing.assert_allclose(aggregation, expected)
+    _, crisp = core_many.defuzzification(model, model.given, aggregation)
+    assert crisp == pytest.approx(loop_centroid(expected, model.output.universe))
+    capsys.readouterr()
+
+
+def test_truth_predictor_matches_loops():
+    model = random_model(4, num_inputs=2, num_rules=15)
+    givens = random_givens(model, 25)
+    outputs, crisp = Predictor(model, "truth")(givens)
+    for row in range(25):
+        levels = loop_levels(model, [g[row].tolist() for g in givens])
+        expected = truth_outputs(model, np.array([levels]))[0]
+        np.testing.assert_allclose(outputs[row], expected)
+        if expected.sum() > 0:
+            assert crisp[row] == pytest.approx(loop_centroid(expected, model.output.universe))
+        else:
+            assert np.isnan(crisp[row])
+
+
+@pytest.mark.parametrize("max_elements", [1, 50, 10**6])
+def test_truth_outputs_in_chunks(max_elements):
+    model = random_model(6, num_rules=30)
+    levels = premise_levels(model, random_givens(model, 25))
+    expected = np.minimum(levels[:, :, None], model.consequent_terms()[None]).max(axis=1)
+    np.testing.assert_allclose(truth_outputs(model, levels, max_elements), expected)
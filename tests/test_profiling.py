@@ -0,0 +1,65 @@
+"""Настройка профилирования из переменных окружения."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from fuzzy_sii import profiling
+
+
+@pytest.fixture
+def exit_hooks(monkeypatch):
+    hooks = []
+    monkeypatch.setattr(profiling.atexit, "register", hooks.append)
+    return hooks
+
+
+@pytest.mark.parametrize("value", ["1", "true", "ON"])
+def test_boolean_value_enables_histograms(tmp_path, monkeypatch, exit_hooks, value):
+    monkeypatch.chdir(tmp_path)
+    sink = profiling.configure_from_env({"FUZZY_PROFILE": value})
+    assert isinstance(sink, profiling.HistogramSink)
+    assert profiling.get_sink() is sink
+    assert exit_hooks == [sink.report]
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("value", ["", "0", "false"])
+def test_disabled(exit_hooks, value):
+    assert profiling.configure_from_env({"FUZZY_PROFILE": value}) is None
+    assert profiling.get_sink() is None
+    assert exit_hooks == []
+
+
+def test_path_writes_json_log_closed_at_exit(tmp_path, exit_hooks):
+    path = str(tmp_path / "profile.jsonl")
+    sink = profiling.configure_from_env({"FUZZY_PROFILE": path})
+    with profiling._Span("stage", {}):
+        profiling.count("cells", 3)
+    assert exit_hooks == [sink.close]
+    exit_hooks[0]()
+    with open(path, encoding="utf-8") as file:
+        events = [json.loads(line) for line in file]
+    assert [(e["type"], e["name"]) for e in events] == [("count", "stage:cells"), ("span", "stage")]
+
+
+def test_debug_level():
+    profiling.configure_from_env({})
+    assert not profiling.debug_enabled()
+    profiling.configure_from_env({}, debug=True)
+    assert profiling.debug_enabled()
+    profiling.configure_from_env({"FUZZY_DEBUG": "0"}, debug=True)
+    assert not profiling.debug_enabled()
+
+
+def test_import_does_not_configure(tmp_path):
+    env = dict(os.environ, FUZZY_PROFILE="1", PYTHONPATH=os.path.join(ROOT, "src"))
+    code = "from fuzzy_sii import profiling, inference; print(profiling.enabled())"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True
+    )
+    assert result.stdout.strip() == "False"
+    assert os.listdir(tmp_path) == []
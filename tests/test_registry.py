@@ -0,0 +1,133 @@
+"""Реестр моделей: выгрузка и повторная загрузка той же версии."""
+import asyncio
+import os
+import shutil
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from conftest import CONFIGS, random_givens
+from fuzzy_sii.inference import Predictor
+from fuzzy_sii.model import load_model
+from fuzzy_sii.registry import ModelRegistry
+from fuzzy_sii.server import InferenceServer
+
+
+@pytest.fixture
+def configs(tmp_path):
+    paths = {}
+    for name in ("combined", "many"):
+        paths[name] = str(tmp_path / f"{name}.txt")
+        shutil.copy(CONFIGS[name], paths[name])
+    return paths
+
+
+@pytest.fixture
+def registry(configs):
+    registry = ModelRegistry(list(configs.items()), max_models=1)
+    yield registry
+    registry.close()
+
+
+def test_shared_model_matches_direct_prediction(registry, configs):
+    for name, path in configs.items():
+        model = load_model(path)
+        givens = random_givens(model, 10)
+        expected = Predictor(model, registry.get(name).predictor.method)(givens)
+        np.testing.assert_allclose(registry.predict(name, givens)[1], expected[1])
+    assert registry.evictions == 1
+
+
+def _pool_file(array):
+    while not isinstance(array, np.memmap):
+        array = array.base
+    return array.filename
+
+
+def test_identical_configs_share_pool_files(tmp_path):
+    paths = []
+    for name in ("first", "second"):
+        paths.append((name, str(tmp_path / f"{name}.txt")))
+        shutil.copy(CONFIGS["many"], paths[-1][1])
+    with ModelRegistry(paths) as registry:
+        first, second = registry.get("first").model, registry.get("second").model
+        for a, b in zip(first.inputs + [first.output], second.inputs + [second.output]):
+            for array, other in ((a.universe, b.universe), (a.terms, b.terms)):
+                assert os.path.dirname(_pool_file(array)) == registry.pool.directory
+                assert _pool_file(array) == _pool_file(other)
+        assert _pool_file(first.rules) == _pool_file(second.rules)
+        stats = registry.stats()
+        assert stats["pool"] * 2 == stats["without_sharing"]
+        assert stats["models"]["first"]["unique"] == 0
+
+
+class _PendingExecutor:
+    """Задачи не выполняются, пока тест не завершит их Future."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, *args):
+        self.futures.append(Future())
+        return self.futures[-1]
+
+
+def test_unload_keeps_pool_files_of_pinned_model(registry):
+    executor = _PendingExecutor()
+    registry.submit(executor, "combined", np.array([[500.0]]))
+    files = os.listdir(registry.pool.directory)
+    registry.unload("combined")
+    assert "combined" not in registry.stats()["models"]
+    assert os.listdir(registry.pool.directory) == files
+    executor.futures[0].set_result(None)
+    assert len(registry.pool) == 0
+    assert os.listdir(registry.pool.directory) == []
+
+
+def test_evicted_model_returns_same_version(registry, configs):
+    before = registry.get("combined")
+    registry.get("many")
+    # Файл изменился после загрузки: реестр не следит за изменениями
+    with open(configs["combined"], "a", encoding="utf-8") as file:
+        file.write("Если золото_в_минуту мало то навык_игры профессионал\n")
+    shutil.move(configs["combined"], configs["combined"] + ".moved")
+    again = registry.get("combined")
+    assert registry.loads["combined"] == 2
+    assert (again.version, again.digest) == (before.version, before.digest)
+    np.testing.assert_array_equal(again.model.rules, before.model.rules)
+
+
+def test_missing_artifact_of_changed_file(registry, configs):
+    registry.get("combined")
+    registry.get("many")
+    artifact, _ = registry.artifacts["combined"]
+    os.remove(artifact)
+    with open(configs["combined"], "a", encoding="utf-8") as file:
+        file.write("\n")
+    with pytest.raises(ValueError, match="изменился"):
+        registry.get("combined")
+
+
+def test_server_answers_when_reload_fails(registry, configs):
+    handles = {name: registry.handle(name) for name in registry.paths}
+    server = InferenceServer(handles, window=0.0)
+
+    async def run():
+        first = await server.respond({"id": 1, "model": "combined", "input": 500})
+        await server.respond({"id": 2, "model": "many", "input": [4, 4, 24]})
+        os.remove(registry.artifacts["combined"][0])
+        os.remove(configs["combined"])
+        failed = await asyncio.wait_for(
+            server.respond({"id": 3, "model": "combined", "input": 500}), 5
+        )
+        # Задача пакетирования модели продолжает работать
+        shutil.copy(CONFIGS["combined"], configs["combined"])
+        again = await asyncio.wait_for(
+            server.respond({"id": 4, "model": "combined", "input": 500}), 5
+        )
+        return first, failed, again
+
+    first, failed, again = asyncio.run(run())
+    assert "изменился" in failed["error"]
+    assert again["output"] == pytest.approx(first["output"])
@@ -0,0 +1,73 @@
+"""Инкрементальное отношение CompiledRelation в сравнении с полной пересборкой."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS
+from fuzzy_sii import implication
+from fuzzy_sii.inference import Predictor
+from fuzzy_sii.model import load_model
+from fuzzy_sii.relation import CompiledRelation
+
+
+def rebuilt(size_a, size_b, rules, name):
+    relation = CompiledRelation(size_a, size_b, name)
+    for a, b in rules:
+        relation.add_rule(a, b)
+    return relation
+
+
+@pytest.mark.parametrize("name", ["mamdani", "larsen"])
+def test_from_model_matches_relation_tensor(name):
+    model = load_model(CONFIGS["combined"])
+    relation = CompiledRelation.from_model(model, name)
+    tensor = implication.relation_tensor(model.antecedents(0), model.consequent_terms(), name)
+    np.testing.assert_allclose(relation.matrix, tensor.max(axis=0))
+
+
+@pytest.mark.parametrize("name", ["mamdani", "larsen"])
+def test_add_remove_matches_rebuild(name):
+    rng = np.random.default_rng(0)
+    # Значения на грубой сетке, чтобы максимумы часто достигались несколькими правилами
+    rules = [(rng.integers(0, 5, 6) / 4, rng.integers(0, 5, 4) / 4) for _ in range(30)]
+    relation = CompiledRelation(6, 4, name)
+    ids = [relation.add_rule(a, b) for a, b in rules]
+    alive = dict(zip(ids, rules))
+    for rule_id in rng.permutation(ids)[:25]:
+        relation.remove_rule(rule_id)
+        del alive[rule_id]
+        expected = rebuilt(6, 4, alive.values(), name)
+        np.testing.assert_allclose(relation.matrix, expected.matrix)
+        np.testing.assert_array_equal(relation.counts, expected.counts)
+    for rule_id in list(alive):
+        relation.remove_rule(rule_id)
+    np.testing.assert_array_equal(relation.matrix, 0.0)
+    assert len(relation) == 0
+
+
+def test_copy_is_independent():
+    model = load_model(CONFIGS["combined"])
+    relation = CompiledRelation.from_model(model)
+    before = relation.matrix.copy()
+    copy = relation.copy()
+    copy.remove_rule(relation.rule_ids()[0])
+    copy.add_rule(np.ones(5), np.ones(6))
+    np.testing.assert_array_equal(relation.matrix, before)
+    assert len(relation) == model.num_rules
+
+
+def test_add_rule_checks_sizes():
+    relation = CompiledRelation(3, 2)
+    with pytest.raises(ValueError):
+        relation.add_rule(np.ones(4), np.ones(2))
+
+
+def test_predictor_keeps_empty_relation():
+    model = load_model(CONFIGS["combined"])
+    relation = CompiledRelation.from_model(model)
+    for rule_id in list(relation.rule_ids()):
+        relation.remove_rule(rule_id)
+    assert len(relation) == 0
+    predictor = Predictor(model, "rules", relation=relation, fallback=-1.0)
+    assert predictor.relation is relation
+    _, crisp = predictor([model.given[0]])
+    np.testing.assert_array_equal(crisp, [-1.0])
@@ -0,0 +1,70 @@
+"""Ответы сервера на корректные и некорректные запросы."""
+import asyncio
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import CONFIGS
+from fuzzy_sii.server import InferenceServer, load_handles, main
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = tmp_path / "combined.txt"
+    shutil.copy(CONFIGS["combined"], path)
+    return InferenceServer(load_handles([str(path)], "rules", fallback=-1.0), window=0.0)
+
+
+def respond(server, *requests):
+    async def run():
+        return await asyncio.gather(*(server.respond(request) for request in requests))
+
+    return asyncio.run(run())
+
+
+def test_inference_request(server):
+    (response,) = respond(server, {"id": 1, "input": 512.5})
+    assert response["id"] == 1
+    assert np.isfinite(response["output"])
+    assert server.stats.errors == 0
+
+
+@pytest.mark.parametrize("request_", [[1, 2, 3], "text", 5, None])
+def test_non_object_request(server, request_):
+    (response,) = respond(server, request_)
+    assert "объектом JSON" in response["error"]
+    assert server.stats.errors == 1
+
+
+def test_request_errors(server):
+    responses = respond(
+        server,
+        {"id": 1},
+        {"id": 2, "model": "нет", "input": 1},
+        {"id": 3, "input": [1, 2]},
+        {"id": 4, "input": 600},
+    )
+    assert [r["id"] for r in responses] == [1, 2, 3, 4]
+    assert all("error" in r for r in responses[:3])
+    assert "output" in responses[3]
+    assert server.stats.errors == 3
+
+
+def test_unexpected_error_is_answered(server, monkeypatch):
+    def broken(name):
+        raise RuntimeError("сбой")
+
+    monkeypatch.setattr(server, "batcher", broken)
+    (response,) = respond(server, {"id": 7, "input": 1})
+    assert response["id"] == 7
+    assert "ошибка вывода" in response["error"]
+    assert server.stats.errors == 1
+
+
+@pytest.mark.parametrize("option", ["--method", "--implication"])
+def test_unknown_option_value_is_a_usage_error(option, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([CONFIGS["combined"], option, "bogus"])
+    assert exit_info.value.code == 2
+    assert option in capsys.readouterr().err
@@ -0,0 +1,46 @@
+"""Разреженный вывод по сработавшим правилам в сравнении с плотным."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS, random_givens, random_model
+from fuzzy_sii.inference import Predictor
+from fuzzy_sii.model import load_model
+from fuzzy_sii.premises import premise_levels
+from fuzzy_sii.sparse import SparseIndex
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+@pytest.mark.parametrize("tnorm", ["min", "product"])
+def test_sparse_matches_dense(seed, tnorm):
+    model = random_model(seed, num_inputs=3, num_rules=40, or_share=0.25, absent_share=0.2)
+    givens = random_givens(model, 20, seed)
+    levels = premise_levels(model, givens, tnorm)
+    index = SparseIndex(model)
+    for row in range(20):
+        observation = [g[row] for g in givens]
+        output, active, active_levels = index.infer(observation, tnorm)
+        dense = np.zeros(model.num_rules)
+        dense[active] = active_levels
+        np.testing.assert_allclose(dense, levels[row])
+        # Кандидаты — все правила с ненулевым уровнем
+        assert set(np.flatnonzero(levels[row] > 0)) <= set(active.tolist())
+        expected = np.minimum(levels[row][:, None], model.consequent_terms()).max(axis=0)
+        np.testing.assert_allclose(output, expected)
+
+
+def test_sparse_without_fired_rules():
+    model = random_model(0)
+    givens = [np.zeros(len(var.universe)) for var in model.inputs]
+    output, active, levels = SparseIndex(model).infer(givens)
+    assert len(active) == 0
+    np.testing.assert_array_equal(output, 0.0)
+
+
+def test_single_input_methods_agree():
+    model = load_model(CONFIGS["combined"])
+    givens = [np.random.default_rng(5).random((40, len(model.inputs[0].universe)))]
+    reference = Predictor(model, "outputs")(givens)
+    for method in ("rules", "truth", "sparse"):
+        outputs, crisp = Predictor(model, method)(givens)
+        np.testing.assert_allclose(outputs, reference[0])
+        np.testing.assert_allclose(crisp, reference[1])
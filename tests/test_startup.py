@@ -0,0 +1,83 @@
+"""
+Бюджет времени запуска.
+
+Каждая цель запускается в отдельном процессе (лучший из REPEAT
+запусков): библиотечные модули импортируются с -X importtime и не должны
+тянуть pandas и matplotlib, а для скриптов core_* без отладочной печати
+замеряется полное время процесса. Время сравнивается не с абсолютным
+пределом, а с процессом BASELINE, который импортирует только numpy и
+asyncio: так проверка не зависит от скорости и загрузки машины.
+"""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import ROOT
+
+SRC = os.path.join(ROOT, "src")
+# Процесс, без которого не обходится ни одна цель
+BASELINE = "import numpy, asyncio"
+# Допустимое превышение времени BASELINE
+BUDGET_MS = 60.0
+SCRIPT_BUDGET_MS = 250.0
+REPEAT = 3
+
+# Модули, которые должны импортироваться без pandas и matplotlib
+LIBRARY = [
+    "fuzzy_sii",
+    "fuzzy_sii.inference",
+    "fuzzy_sii.compiled",
+    "fuzzy_sii.streaming",
+    "fuzzy_sii.parallel",
+    "fuzzy_sii.server",
+]
+FORBIDDEN = ("pandas", "matplotlib")
+SCRIPTS = ["core_many.py"]
+
+
+def loaded_packages(module):
+    """Пакеты верхнего уровня, загруженные импортом модуля (по -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            loaded.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return loaded
+
+
+def process_ms(args, cwd=SRC):
+    """Лучшее из REPEAT время процесса python args, мс."""
+    env = dict(os.environ, FUZZY_DEBUG="0", MPLBACKEND="Agg")
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable] + args, cwd=cwd, env=env, stdout=subprocess.DEVNULL, check=True
+        )
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+@pytest.fixture(scope="module")
+def baseline_ms():
+    return process_ms(["-c", BASELINE])
+
+
+@pytest.mark.parametrize("module", LIBRARY)
+def test_import_budget(module, baseline_ms):
+    assert not loaded_packages(module).intersection(FORBIDDEN), f"{module} импортирует тяжелые пакеты"
+    assert process_ms(["-c", f"import {module}"]) - baseline_ms <= BUDGET_MS
+
+
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_script_budget(script, baseline_ms):
+    assert process_ms([os.path.join(SRC, script)], cwd=ROOT) - baseline_ms <= SCRIPT_BUDGET_MS
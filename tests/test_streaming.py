@@ -0,0 +1,83 @@
+"""Чтение наблюдений: четкие значения, заголовок CSV, некорректные строки."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS
+from fuzzy_sii.inference import Predictor, default_method, fuzzify
+from fuzzy_sii.model import load_model
+from fuzzy_sii.streaming import is_header, read_observations, stream_infer
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("gold", True),
+        ("золото_в_минуту", True),
+        ("512.5", False),
+        ("0.1, 0.2; 0.3 0.4 0.5", False),
+        ("[512.5]", False),
+        ('{"gold": 1}', False),
+        ("# комментарий", False),
+        ("", False),
+    ],
+)
+def test_is_header(line, expected):
+    assert is_header(line) is expected
+
+
+def test_is_header_never_in_jsonl():
+    assert not is_header("gold", "jsonl")
+
+
+def test_header_is_skipped_only_on_first_line():
+    model = load_model(CONFIGS["combined"])
+    observations = list(read_observations(["gold", "512.5", "600"], model))
+    assert len(observations) == 2
+    # Нечисловая строка не на первой строке файла — ошибка, а не заголовок
+    with pytest.raises(ValueError, match="строка 2"):
+        list(read_observations(["512.5", "gold"], model))
+    with pytest.raises(ValueError, match="строка 1"):
+        list(read_observations(["gold"], model, header=False))
+
+
+def test_bad_row_reports_line_number():
+    model = load_model(CONFIGS["combined"])
+    lines = ["gold", "300", "", "# комментарий", "1 2 3", "400"]
+    with pytest.raises(ValueError, match="строка 5"):
+        list(read_observations(lines, model))
+    with pytest.raises(ValueError, match="строка 14"):
+        list(read_observations(lines[1:], model, first_line=11, header=False))
+
+
+def test_jsonl_observations_match_csv():
+    model = load_model(CONFIGS["combined"])
+    csv = list(read_observations(["512.5", "0.1 0.2 0.3 0.2 0.1"], model))
+    jsonl = list(
+        read_observations(
+            ['{"золото_в_минуту": 512.5}', "[[0.1, 0.2, 0.3, 0.2, 0.1]]"], model, "jsonl"
+        )
+    )
+    for a, b in zip(csv, jsonl):
+        np.testing.assert_allclose(a, b)
+
+
+def test_jsonl_object_missing_input_reports_line_number():
+    model = load_model(CONFIGS["many"])
+    lines = ['{"обслуживание": 3, "еда": 2, "ожидание": 1}', '{"обслуживание": 3, "еда": 2}']
+    with pytest.raises(ValueError, match="строка 2: .*ожидание"):
+        list(read_observations(lines, model, "jsonl"))
+
+    # Выход первой строки, уже собранной в пакет, не теряется
+    outputs = []
+    with pytest.raises(ValueError, match="строка 2"):
+        for value in stream_infer(Predictor(model, default_method(model)), read_observations(lines, model, "jsonl")):
+            outputs.append(value)
+    assert len(outputs) == 1
+
+
+def test_fuzzify_keeps_crisp_value_as_centroid():
+    universe = np.array([300.0, 450, 600, 750, 900])
+    values = np.array([300.0, 512.5, 900, 1000, 100])
+    vectors = fuzzify(values, universe)
+    np.testing.assert_allclose(vectors.sum(axis=1), 1.0)
+    np.testing.assert_allclose(vectors @ universe, np.clip(values, 300, 900))
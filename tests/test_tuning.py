@@ -0,0 +1,95 @@
+"""Подбор параметров функций принадлежности."""
+import numpy as np
+import pytest
+
+from conftest import CONFIGS
+from fuzzy_sii.inference import Predictor, fuzzify
+from fuzzy_sii.model import load_model
+from fuzzy_sii.parser import write_model
+from fuzzy_sii.tuning import BatchEvaluator, ParameterSpace, differential_evolution
+
+CONFIG = """\
+Множество определения x
+0 1 2 3 4 5 6 7 8 9 10
+Нечеткое множество низкий
+треугольная -5 0 5
+Нечеткое множество высокий
+гауссова 10 3
+
+Множество определения y
+0 2.5 5 7.5 10
+Нечеткое множество мало
+трапециевидная -1 0 2 6
+Нечеткое множество много
+треугольная 4 10 16
+
+Если x низкий то y мало
+Если x высокий то y много
+"""
+
+
+def test_written_model_keeps_tuned_parameters(config_path, tmp_path):
+    space = ParameterSpace(load_model(config_path))
+    rng = np.random.default_rng(0)
+    inputs = rng.uniform(0, 10, (50, 1))
+    evaluator = BatchEvaluator(space, inputs, 0.8 * inputs[:, 0] + 1)
+    # Параметры со знаками после шестого, которые округление потеряло бы
+    vector = space.initial + rng.uniform(-0.3, 0.3, space.size) * 1e-3 + 1e-7
+    tuned = space.to_model(vector)
+
+    write_model(tuned, str(tmp_path / "tuned.txt"))
+    again = load_model(str(tmp_path / "tuned.txt"))
+    for before, after in zip(tuned.inputs + [tuned.output], again.inputs + [again.output]):
+        assert after.params == before.params
+        np.testing.assert_array_equal(after.terms, before.terms)
+    again_space = ParameterSpace(again)
+    again_loss = BatchEvaluator(again_space, inputs, evaluator.targets).loss(again_space.initial)
+    assert again_loss[0] == evaluator.loss(vector)[0]
+
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.txt"
+    path.write_text(CONFIG, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("config", ["inline", "many"])
+def test_batch_predict_matches_truth_predictor(config, config_path):
+    model = load_model(config_path if config == "inline" else CONFIGS[config])
+    rng = np.random.default_rng(1)
+    inputs = np.column_stack(
+        [rng.uniform(var.universe[0], var.universe[-1], 30) for var in model.inputs]
+    )
+    space = ParameterSpace(model)
+    evaluator = BatchEvaluator(space, inputs, np.zeros(len(inputs)))
+    givens = [fuzzify(inputs[:, k], var.universe) for k, var in enumerate(model.inputs)]
+    _, expected = Predictor(model, "truth")(givens)
+    np.testing.assert_allclose(evaluator.predict(space.initial)[0], expected)
+
+
+def test_differential_evolution_lowers_loss(config_path):
+    space = ParameterSpace(load_model(config_path))
+    rng = np.random.default_rng(0)
+    inputs = rng.uniform(0, 10, (40, 1))
+    evaluator = BatchEvaluator(space, inputs, 0.8 * inputs[:, 0] + 1)
+    initial = evaluator.loss(space.initial)[0]
+    best, best_loss, history = differential_evolution(
+        evaluator.loss, space.lower, space.upper, space.initial, size=20, generations=10, seed=0
+    )
+    assert best_loss < initial
+    assert history == sorted(history, reverse=True)
+    assert evaluator.loss(best)[0] == pytest.approx(best_loss)
+
+
+def test_collapsed_parameters_are_written_with_nonzero_width(config_path, tmp_path):
+    space = ParameterSpace(load_model(config_path))
+    # Все параметры прижаты к нижней границе: основания стянулись бы в точку
+    tuned = space.to_model(space.lower.copy())
+    write_model(tuned, str(tmp_path / "tuned.txt"))
+    again = load_model(str(tmp_path / "tuned.txt"))
+    for variable in again.inputs + [again.output]:
+        for kind, params in filter(None, variable.params):
+            if kind in ("треугольная", "трапециевидная"):
+                assert params[0] < params[-1]